@@ -2,6 +2,7 @@ import os
 from typing import Literal
 
 from pydantic import BaseSettings
+from pydantic import validator
 
 
 class CacheControlSettings(BaseSettings):
@@ -13,8 +14,23 @@ class WebAPISettings(BaseSettings):
     ENV: Literal["production", "development"] = "production"
     CACHE_CONTROL: CacheControlSettings
     ADD_ETAG: bool = True
+    SERVER_TIMING: bool = False
+    METRICS: bool = True
+    COMPRESSION: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    # seconds the responses are kept in the memory of each worker, from 1 to
+    # 5, 0 disabling
+    MICROCACHE_TTL: float = 0
+    MICROCACHE_MAX_ENTRIES: int = 1024
     MIMETYPE: str = _mimetypes[os.getenv("API_REPRESENTATION_TYPE", "json")]
 
+    @validator("MICROCACHE_TTL")
+    def _validate_microcache_ttl(cls, ttl):
+        # longer, the changes would be served stale for too long
+        if ttl != 0 and not 1 <= ttl <= 5:
+            raise ValueError("must be 0, or from 1 to 5 seconds")
+        return ttl
+
     class Config:
         env_file = ".env"
         env_prefix = "API_"
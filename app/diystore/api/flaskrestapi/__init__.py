@@ -1,19 +1,77 @@
 from flask import Flask
+from flask import g
+from sqlalchemy.orm import configure_mappers
 
+from . import blueprints
 from .blueprints import products_bp
-from .blueprints.dev_bp import bp as dev_bp
+from .blueprints.catalog_bp import bp as catalog_bp
+from .blueprints.schema_bp import bp as schema_bp
+from .blueprints.metrics_bp import bp as metrics_bp
+from .blueprints.hot_keys_bp import bp as hot_keys_bp
+from .microcache import ResponseMicroCache
 from ..api_settings import WebAPISettings
+from ...infrastructure.main import get_ioc_container
+from ...infrastructure.main import shutdown_ioc_container
+
+
+def open_ioc_scope():
+    # the container is kept with the token, as it may be shut down and
+    # created anew before the request ends
+    ioc = get_ioc_container()
+    g.ioc_scope = (ioc, ioc.start_scope())
+
+
+def close_ioc_scope(exc):
+    scope = g.pop("ioc_scope", None)
+    if scope is not None:
+        ioc, token = scope
+        ioc.stop_scope(token)
 
 
 def _configure_app(app: Flask, settings: WebAPISettings):
     if settings.ENV == "development":
+        # imported only here, with the stubs it populates the database with
+        from .blueprints.dev_bp import bp as dev_bp
+
         app.register_blueprint(dev_bp)
     
     app.config.update(settings.dict())
+    # the scoped bindings of the container live as long as a request
+    app.before_request(open_ioc_scope)
+    app.teardown_request(close_ioc_scope)
     app.register_blueprint(products_bp)
+    app.register_blueprint(catalog_bp)
+    app.register_blueprint(schema_bp)
+    app.register_blueprint(hot_keys_bp)
+    if settings.METRICS:
+        app.register_blueprint(metrics_bp)
+    if settings.MICROCACHE_TTL > 0:
+        app.extensions["microcache"] = ResponseMicroCache(
+            settings.MICROCACHE_TTL, settings.MICROCACHE_MAX_ENTRIES
+        )
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     _configure_app(app, WebAPISettings())
     return app
+
+
+def preload():
+    """Builds, in the gunicorn master, the state the workers share copy on
+    write once forked. The connections opened meanwhile are closed, so that
+    no worker inherits them."""
+    configure_mappers()
+    blueprints.get_product_controller().dispose()
+
+
+def reset_after_fork():
+    """Drops the connections inherited from the master, which each worker
+    opens anew."""
+    if blueprints.product_controller is not None:
+        blueprints.product_controller.dispose(close=False)
+
+
+def shutdown():
+    """Closes the engines and pools of the process, before it exits."""
+    shutdown_ioc_container()
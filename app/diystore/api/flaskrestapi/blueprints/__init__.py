@@ -1,3 +1,7 @@
+import json
+import logging
+from threading import Lock
+
 from flask import Blueprint
 from flask import Response
 from flask import jsonify
@@ -10,8 +14,19 @@ from .product_bp import bp as productbp
 from .vendor_bp import bp as vendorbp
 from .review_bp import bp as reviewbp
 from ....infrastructure.controllers.web import ProductController
+from ....infrastructure.controllers.web import start_conditional_request
+from ....infrastructure.controllers.web import stop_conditional_request
+from ....infrastructure.controllers.web import ENCODINGS
+from ....infrastructure.controllers.web import start_content_coding
+from ....infrastructure.controllers.web import stop_content_coding
+from ....infrastructure.controllers.web import get_content_coding
 from ....infrastructure.controllers.web.exceptions import BadRequest
-from ....infrastructure.controllers.web.factories import ProductControllerFactory
+from ....infrastructure.controllers.web.exceptions import NotModified
+from ....infrastructure.instrumentation import start_timings
+from ....infrastructure.instrumentation import stop_timings
+from ....infrastructure.instrumentation import get_timings
+from ....infrastructure.main import get_ioc_container
+from ..microcache import ResponseMicroCache
 
 
 products_bp = Blueprint("products", __name__)
@@ -20,7 +35,31 @@ products_bp.register_blueprint(productbp)
 products_bp.register_blueprint(vendorbp)
 products_bp.register_blueprint(reviewbp)
 
-product_controller: ProductController = ProductControllerFactory()
+# created on the first request, so that importing the api does not connect
+# to the configured database and cache
+product_controller: ProductController = None
+# the first requests can be handled concurrently by threaded or gevent workers
+_product_controller_lock = Lock()
+
+
+def get_product_controller() -> ProductController:
+    global product_controller
+    if product_controller is None:
+        # with factory_boy and its dependencies, which the import of the api
+        # is spared
+        from ....infrastructure.controllers.web.factories import ProductControllerFactory
+
+        with _product_controller_lock:
+            if product_controller is None:
+                product_controller = ProductControllerFactory()
+                # built anew from the next container
+                get_ioc_container().on_shutdown(_forget_product_controller)
+    return product_controller
+
+
+def _forget_product_controller():
+    global product_controller
+    product_controller = None
 
 
 @products_bp.errorhandler(BadRequest)
@@ -30,9 +69,117 @@ def handle_bad_request(e):
     return response
 
 
+@products_bp.errorhandler(NotModified)
+def handle_not_modified(e):
+    response = Response(status=e.code)
+    response.set_etag(e.etag)
+    return response
+
+
 @products_bp.before_request
 def configure_globals():
-    g.controller = product_controller
+    g.controller = get_product_controller()
+
+
+@products_bp.record_once
+def enable_timings_log(state):
+    # the app logger falls back to the WARNING level of the root logger,
+    # which would drop the timings logged at the INFO level
+    app = state.app
+    if app.config.get("SERVER_TIMING") and not app.logger.isEnabledFor(logging.INFO):
+        app.logger.setLevel(logging.INFO)
+
+
+@products_bp.before_request
+def start_request_timings():
+    if current_app.config.get("SERVER_TIMING"):
+        g.timings_token = start_timings()
+
+
+# registered first, so that it runs after the other after_request hooks, and
+# stores the response as sent
+@products_bp.after_request
+def store_in_microcache(response: Response):
+    key = g.pop("microcache_key", None)
+    if key is not None and response.status_code == 200:
+        current_app.extensions["microcache"].set(key, response)
+    return response
+
+
+@products_bp.after_request
+def set_server_timing(response: Response):
+    timings = get_timings()
+    if timings is not None:
+        response.headers["Server-Timing"] = timings.generate_server_timing_header()
+        current_app.logger.info(
+            json.dumps(
+                dict(
+                    event="request_timings",
+                    method=request.method,
+                    path=request.full_path.rstrip("?"),
+                    status=response.status_code,
+                    **timings.as_dict(),
+                )
+            )
+        )
+    return response
+
+
+@products_bp.teardown_request
+def stop_request_timings(exc):
+    token = g.pop("timings_token", None)
+    if token is not None:
+        stop_timings(token)
+
+
+@products_bp.before_request
+def start_conditional():
+    # the controller compares the ETags with the one of its cached
+    # representation, and answers 304 before doing any work on a match
+    if current_app.config.get("ADD_ETAG") and request.if_none_match:
+        g.conditional_token = start_conditional_request(
+            request.if_none_match.as_set(include_weak=True)
+        )
+
+
+@products_bp.teardown_request
+def stop_conditional(exc):
+    token = g.pop("conditional_token", None)
+    if token is not None:
+        stop_conditional_request(token)
+
+
+@products_bp.before_request
+def negotiate_content_coding():
+    if not current_app.config.get("COMPRESSION"):
+        return
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is not None:
+        g.content_coding_token = start_content_coding(
+            encoding, current_app.config.get("COMPRESSION_MIN_SIZE", 0)
+        )
+
+
+@products_bp.before_request
+def serve_from_microcache():
+    # after the negotiation of the content coding, which tells apart the
+    # representations of a same URL
+    microcache: ResponseMicroCache = current_app.extensions.get("microcache")
+    if microcache is None or request.method != "GET":
+        return
+    coding = get_content_coding()
+    key = microcache.generate_key(request, coding.encoding if coding else "")
+    response = microcache.get(key)
+    if response is None:
+        g.microcache_key = key
+    return response
+
+
+@products_bp.teardown_request
+def stop_negotiated_content_coding(exc):
+    token = g.pop("content_coding_token", None)
+    if token is not None:
+        stop_content_coding(token)
 
 
 @products_bp.after_request
@@ -48,6 +195,20 @@ def set_client_side_caching(response: Response):
     response.cache_control.max_age = cache_control.get("MAX_AGE")
     response.cache_control.public = True
     if add_etag:
-        response.add_etag()
+        if response.get_etag()[0] is None:
+            response.add_etag()
         response.make_conditional(request)
     return response
+
+
+# registered last, so that it runs before the other after_request hooks, and
+# the ETag of the compressed representation is not computed again
+@products_bp.after_request
+def set_content_coding(response: Response):
+    if current_app.config.get("COMPRESSION"):
+        response.vary.add("Accept-Encoding")
+    coding = get_content_coding()
+    if coding is not None and coding.applied:
+        response.content_encoding = coding.encoding
+        response.set_etag(coding.etag)
+    return response
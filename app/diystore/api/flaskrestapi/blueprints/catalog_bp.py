@@ -0,0 +1,165 @@
+from uuid import UUID
+from pathlib import Path
+from typing import TextIO
+from typing import TYPE_CHECKING
+from datetime import datetime
+from datetime import timedelta
+
+import click
+import pendulum
+from flask import Blueprint
+
+from ....application.usecases.product.repository import ProductRepository
+from ....infrastructure.main.ioc_factory import get_ioc_container
+
+# the bulk import and export modules are imported by their commands, as the
+# api does not need them
+if TYPE_CHECKING:
+    from ....infrastructure.repositories.sqlrepository.bulkimport import ImportProgress
+
+
+bp = Blueprint("catalog", __name__, cli_group="catalog")
+
+
+@bp.cli.command("recompute-prices")
+@click.option("--vat-id", type=click.UUID, help="Only products with this VAT.")
+@click.option(
+    "--discount-id", type=click.UUID, help="Only products with this discount."
+)
+@click.option(
+    "-b", "--batch-size", default=1000, help="Number of products updated at once."
+)
+def recompute_prices(vat_id: UUID, discount_id: UUID, batch_size: int):
+    """Recomputes the persisted final prices of the products"""
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
+    click.echo("Recomputing final prices...")
+    updated = repo.recompute_final_prices(
+        vat_id=vat_id, discount_id=discount_id, batch_size=batch_size
+    )
+    click.echo(f"Final prices recomputed for {updated} products.")
+
+
+@bp.cli.command("recompute-ratings")
+@click.option(
+    "-b", "--batch-size", default=1000, help="Number of products updated at once."
+)
+def recompute_ratings(batch_size: int):
+    """Rebuilds the products review aggregates from the persisted reviews"""
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
+    click.echo("Recomputing review aggregates...")
+    updated = repo.recompute_rating_aggregates(batch_size=batch_size)
+    click.echo(f"Review aggregates updated for {updated} products.")
+
+
+def _echo_progress(progress: "ImportProgress"):
+    click.echo(
+        f"{progress.rows_read} rows read, {progress.rows_imported} imported, "
+        f"{progress.rows_failed} failed ({progress.rows_per_second:.0f} rows/s)"
+    )
+
+
+@bp.cli.command("import")
+@click.argument("catalog", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(("csv", "jsonl")),
+    help="Catalog format. Inferred from the file extension by default.",
+)
+@click.option(
+    "-b", "--batch-size", default=1000, help="Number of rows written at once."
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    help="Number of validation processes. Defaults to the number of CPUs.",
+)
+@click.option(
+    "-e",
+    "--errors-file",
+    type=click.File("w", encoding="utf-8"),
+    help="File where the rejected rows are reported, one JSON object per line.",
+)
+def import_catalog(
+    catalog: TextIO, fmt: str, batch_size: int, workers: int, errors_file: TextIO
+):
+    """Imports a product catalog from a CSV or JSON Lines file"""
+    from ....infrastructure.repositories.sqlrepository.bulkimport import CatalogImporter
+    from ....infrastructure.repositories.sqlrepository.bulkimport import read_rows
+
+    fmt = fmt or Path(catalog.name).suffix.lstrip(".")
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
+    importer = CatalogImporter(
+        repo, batch_size=batch_size, workers=workers, on_progress=_echo_progress
+    )
+    try:
+        rows = read_rows(catalog, fmt)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--format")
+    click.echo("Importing catalog...")
+    report = importer.run(rows)
+    click.echo(f"Catalog imported: {report}.")
+    if errors_file is not None:
+        errors_file.writelines(error.json() + "\n" for error in report.errors)
+    elif report.errors:
+        click.echo("Rejected rows (first 20):")
+        for error in report.errors[:20]:
+            click.echo(f"  line {error.line}: {error.error}")
+
+
+def _parse_since(ctx, param, value: str):
+    if value is None:
+        return None
+    try:
+        return pendulum.parse(value)
+    except ValueError:
+        raise click.BadParameter(f"{value} is not an ISO 8601 timestamp")
+
+
+@bp.cli.command("export")
+@click.argument("output", type=click.File("w", encoding="utf-8"))
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(("ndjson", "csv")),
+    help="Export format. Inferred from the file extension by default.",
+)
+@click.option(
+    "-s",
+    "--since",
+    callback=_parse_since,
+    help="Only export products changed after this ISO 8601 timestamp.",
+)
+@click.option(
+    "-o",
+    "--overlap",
+    default=5.0,
+    help="Seconds before --since from which changed products are exported again.",
+)
+@click.option(
+    "-b", "--batch-size", default=1000, help="Number of rows fetched at once."
+)
+def export(
+    output: TextIO, fmt: str, since: datetime, overlap: float, batch_size: int
+):
+    """Exports the product catalog to a NDJSON or CSV file"""
+    from ....infrastructure.repositories.sqlrepository.bulkexport import export_catalog
+
+    fmt = fmt or Path(output.name).suffix.lstrip(".")
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
+    click.echo("Exporting catalog...", err=output.name == "<stdout>")
+    try:
+        report = export_catalog(
+            repo,
+            output,
+            fmt,
+            since,
+            batch_size=batch_size,
+            overlap=timedelta(seconds=overlap),
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--format")
+    click.echo(f"Catalog exported: {report}.", err=output.name == "<stdout>")
@@ -3,8 +3,7 @@ from flask import Blueprint
 from uuid import uuid4
 
 from ....application.usecases.product.repository import ProductRepository
-from ....infrastructure.main.ioc_factory import create_ioc_container
-from ....infrastructure.repositories.sqlrepository.models import Base
+from ....infrastructure.main.ioc_factory import get_ioc_container
 from ....infrastructure.repositories.sqlrepository.models.stubs import (
     TerminalCategoryOrmModelStub,
     LoadedProductOrmModelStub,
@@ -13,7 +12,6 @@ from ....infrastructure.repositories.sqlrepository.models.stubs import (
 
 
 bp = Blueprint("dev", __name__, cli_group="dev")
-ioc = create_ioc_container()
 
 
 @bp.get("/ping")
@@ -37,12 +35,9 @@ def db():
     default=True,
     help="Whether to return the id of the product category.",
 )
-def populate_db(
-    n,
-    return_id: bool,
-    repo: ProductRepository = ioc.provide(ProductRepository),
-):
+def populate_db(n, return_id: bool):
     """Populates the db with dummy data"""
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
     click.echo("Populating the database...")
     category_id = uuid4()
     category = TerminalCategoryOrmModelStub(id=category_id)
@@ -51,7 +46,7 @@ def populate_db(
         n, discount=discount, category=category
     )
 
-    with repo._session as s:
+    with repo.session() as s:
         s.add_all(products)
         s.commit()
 
@@ -63,7 +58,8 @@ def populate_db(
 
 @db.command("clean")
 @click.option("-y", "--yes", "skip", default=False, help="Skip confirmation prompt.")
-def clean_db(skip: bool, repo: ProductRepository = ioc.provide(ProductRepository)):
+def clean_db(skip: bool):
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
     if not skip:
         confirm = click.confirm(
             "You are about to erase all the database records.",
@@ -74,7 +70,7 @@ def clean_db(skip: bool, repo: ProductRepository = ioc.provide(ProductRepository
         if not confirm:
             return click.echo("Aborting...")
 
-    Base.metadata.drop_all(repo._engine)
-    Base.metadata.create_all(repo._engine)
+    repo.drop_schema()
+    repo.create_schema()
 
     click.echo("Database cleaned. Exiting...")
@@ -0,0 +1,27 @@
+import os
+
+from flask import Blueprint
+from flask import jsonify
+
+from ....infrastructure.cache.interfaces import Cache
+from ....infrastructure.main.ioc_factory import get_ioc_container
+
+
+# served with the Prometheus metrics disabled as well, the hot keys being
+# tracked by the cache
+bp = Blueprint("hot_keys", __name__)
+
+
+@bp.get("/metrics/hot-keys")
+def get_hot_keys():
+    """The keys the answering worker found hot, and their estimated counts.
+    Each worker tracks its own reads, so that the ones of the others are
+    seen over several requests."""
+    hot_keys = getattr(get_ioc_container().provide(Cache), "hot_keys", None)
+    return jsonify(
+        pid=os.getpid(),
+        hot_keys=[
+            dict(key=key, count=count)
+            for key, count in (hot_keys() if hot_keys is not None else ())
+        ],
+    )
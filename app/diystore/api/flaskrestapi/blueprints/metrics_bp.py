@@ -0,0 +1,39 @@
+from time import perf_counter
+
+from flask import Blueprint
+from flask import Response
+from flask import request
+from flask import g
+
+from ....infrastructure.instrumentation import HTTP_REQUESTS
+from ....infrastructure.instrumentation import HTTP_REQUEST_DURATION
+from ....infrastructure.instrumentation import HTTP_RESPONSE_SIZE
+from ....infrastructure.instrumentation import generate_metrics
+
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/metrics")
+def get_metrics():
+    data, content_type = generate_metrics()
+    return Response(data, content_type=content_type)
+
+
+@bp.before_app_request
+def start_request_clock():
+    g.request_start = perf_counter()
+
+
+@bp.after_app_request
+def observe_request(response: Response):
+    start = g.pop("request_start", None)
+    if start is None or request.endpoint == "metrics.get_metrics":
+        return response
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    HTTP_REQUESTS.labels(request.method, route, response.status_code).inc()
+    HTTP_REQUEST_DURATION.labels(request.method, route).observe(perf_counter() - start)
+    size = response.calculate_content_length()
+    if size is not None:
+        HTTP_RESPONSE_SIZE.labels(request.method, route).observe(size)
+    return response
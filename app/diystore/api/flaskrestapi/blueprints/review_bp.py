@@ -1,5 +1,7 @@
 from flask import Blueprint
+from flask import request
 from flask import escape
+from flask import g
 
 from ..helpers import request_controller
 from ....infrastructure.controllers.web.product import ProductController
@@ -7,6 +9,15 @@ from ....infrastructure.controllers.web.product import ProductController
 
 bp = Blueprint("review", __name__)
 
+# allowed GET /products/<id>/reviews endpoint parameters
+AGREP = ("limit", "cursor")
+
+
+@bp.before_request
+def parse_args():
+    args = request.args
+    g.parsed_args = {param: escape(args[param]) for param in AGREP if param in args}
+
 
 @bp.get("/reviews/<string:review_id>")
 @request_controller
@@ -17,4 +28,4 @@ def get_review(review_id: str, controller: ProductController):
 @bp.get("/products/<string:product_id>/reviews")
 @request_controller
 def get_reviews(product_id: str, controller: ProductController):
-    return controller.get_reviews(product_id=escape(product_id))
+    return controller.get_reviews(product_id=escape(product_id), **g.parsed_args)
@@ -0,0 +1,31 @@
+import click
+from flask import Blueprint
+
+from ....application.usecases.product.repository import ProductRepository
+from ....infrastructure.main.ioc_factory import get_ioc_container
+
+
+bp = Blueprint("schema", __name__, cli_group="schema")
+
+
+@bp.cli.command("create")
+def create_schema():
+    """Creates the missing tables, before serving the api"""
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
+    click.echo("Creating the database schema...")
+    repo.create_schema()
+    click.echo("Database schema created.")
+
+
+@bp.cli.command("drop")
+@click.option("-y", "--yes", "skip", is_flag=True, help="Skip confirmation prompt.")
+def drop_schema(skip: bool):
+    """Drops the tables and all their records"""
+    if not skip and not click.confirm(
+        "You are about to drop all the tables. Do you really wish to proceed?",
+        default=False,
+    ):
+        return click.echo("Aborting...")
+    repo: ProductRepository = get_ioc_container().provide(ProductRepository)
+    repo.drop_schema()
+    click.echo("Database schema dropped.")
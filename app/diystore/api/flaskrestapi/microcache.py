@@ -0,0 +1,71 @@
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from typing import Optional
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from flask import Request
+from flask import Response
+
+
+# set again on every request, when enabled
+_uncached_headers = frozenset(("Server-Timing", "Set-Cookie"))
+
+
+class ResponseMicroCache:
+    """Responses kept in the memory of a worker for a few seconds, so that
+    the hottest URLs are answered without reaching the controller. The
+    least recently used ones are evicted beyond ``max_entries``."""
+
+    def __init__(
+        self, ttl: float, max_entries: int = 1024, clock: Callable[[], float] = monotonic
+    ):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def generate_key(request: Request, variant: str = "") -> str:
+        """Key of the path and the query of the request, whatever the order of
+        its arguments. ``variant`` tells apart the representations of a same
+        URL, e.g. their content coding."""
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f"{request.path}?{query}|{variant}"
+
+    def get(self, key: str) -> Optional[Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, status, headers, body = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return Response(body, status=status, headers=headers)
+
+    def set(self, key: str, response: Response):
+        if response.is_streamed:
+            return
+        headers = [(k, v) for k, v in response.headers if k not in _uncached_headers]
+        entry = (
+            self._clock() + self._ttl,
+            response.status_code,
+            headers,
+            response.get_data(),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -36,3 +36,4 @@ from .getreview import get_review
 from .getreviews import GetProductReviewsInputDTO
 from .getreviews import GetProductReviewsOutputDTO
 from .getreviews import get_reviews
+from .getreviews import ReviewsCursor
@@ -1,3 +1,4 @@
 from .inputdto import GetProductReviewsInputDTO
 from .outputdto import GetProductReviewsOutputDTO
 from .getreviews import get_reviews
+from .cursor import ReviewsCursor
@@ -0,0 +1,40 @@
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from binascii import Error as DecodingError
+from uuid import UUID
+
+import pendulum
+from pendulum.datetime import DateTime
+
+from .....domain.entities.product import ProductReview
+
+
+class ReviewsCursor(str):
+    """Opaque keyset cursor pointing at the last review of a page."""
+
+    separator = "|"
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, v):
+        if not isinstance(v, str):
+            raise TypeError("cursor should be a str")
+        cursor = cls(v)
+        cursor.decode()
+        return cursor
+
+    @classmethod
+    def from_review(cls, review: ProductReview) -> "ReviewsCursor":
+        raw = f"{review.creation_date.isoformat()}{cls.separator}{review.id.hex}"
+        return cls(urlsafe_b64encode(raw.encode()).decode())
+
+    def decode(self) -> tuple[DateTime, UUID]:
+        try:
+            raw = urlsafe_b64decode(self.encode()).decode()
+            date, _id = raw.split(self.separator)
+            return pendulum.parse(date), UUID(_id)
+        except (DecodingError, UnicodeDecodeError, ValueError):
+            raise ValueError(f"invalid cursor {self!s}")
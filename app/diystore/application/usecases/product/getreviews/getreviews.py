@@ -1,14 +1,29 @@
 from typing import Optional
 
+from .cursor import ReviewsCursor
 from .inputdto import GetProductReviewsInputDTO
 from .outputdto import GetProductReviewsOutputDTO
 from ..repository import ProductRepository
 
 
+def _get_keyset(input_dto: GetProductReviewsInputDTO) -> dict:
+    if input_dto.cursor is None:
+        return {}
+    after_date, after_id = input_dto.cursor.decode()
+    return dict(after_date=after_date, after_id=after_id)
+
+
 def get_reviews(
     input_dto: GetProductReviewsInputDTO, repository: ProductRepository
 ) -> Optional[GetProductReviewsOutputDTO]:
-    reviews = repository.get_reviews(input_dto.product_id)
-    if reviews is not None:
-        return GetProductReviewsOutputDTO.from_entities(reviews)
-    return None
+    # one extra review is fetched to know whether there is a next page
+    reviews = repository.get_reviews(
+        input_dto.product_id, limit=input_dto.limit + 1, **_get_keyset(input_dto)
+    )
+    if reviews is None:
+        return None
+    next_cursor = None
+    if len(reviews) > input_dto.limit:
+        reviews = reviews[: input_dto.limit]
+        next_cursor = ReviewsCursor.from_review(reviews[-1])
+    return GetProductReviewsOutputDTO.from_entities(reviews, next_cursor)
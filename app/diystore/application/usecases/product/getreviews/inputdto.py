@@ -1,10 +1,14 @@
 from uuid import UUID
 
+from pydantic import Field
 from pydantic.dataclasses import dataclass
 
+from .cursor import ReviewsCursor
 from ....dto import DTO
 
 
 @dataclass(frozen=True)
 class GetProductReviewsInputDTO(DTO):
     product_id: UUID
+    limit: int = Field(default=20, ge=1, le=100)
+    cursor: ReviewsCursor = Field(default=None)
@@ -1,4 +1,5 @@
 from typing import Iterable
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -9,7 +10,13 @@ from .....domain.entities.product import ProductReview
 
 class GetProductReviewsOutputDTO(BaseModel, DTO):
     reviews: tuple[GetProductReviewOutputDTO, ...]
+    next_cursor: Optional[str] = None
 
     @classmethod
-    def from_entities(cls, reviews: Iterable[ProductReview]):
-        return cls(reviews=(GetProductReviewOutputDTO.from_entity(r) for r in reviews))
+    def from_entities(
+        cls, reviews: Iterable[ProductReview], next_cursor: Optional[str] = None
+    ):
+        return cls(
+            reviews=(GetProductReviewOutputDTO.from_entity(r) for r in reviews),
+            next_cursor=next_cursor,
+        )
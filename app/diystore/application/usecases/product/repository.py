@@ -3,6 +3,7 @@ from abc import abstractmethod
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
+from datetime import datetime
 
 from ....domain.entities.product import Product
 from ....domain.entities.product import ProductVendor
@@ -15,7 +16,7 @@ from ....domain.entities.product import TerminalLevelProductCategory
 class ProductRepository(ABC):
     @abstractmethod
     def get_product(
-        self, product_id: UUID, with_reviews: bool = False
+        self, product_id: UUID, with_reviews: bool = False, reviews_limit: int = 20
     ) -> Optional[Product]:
         ...
 
@@ -104,5 +105,25 @@ class ProductRepository(ABC):
         ...
 
     @abstractmethod
-    def get_reviews(self, product_id: UUID) -> Optional[tuple[ProductReview]]:
+    def get_reviews(
+        self,
+        product_id: UUID,
+        limit: int = None,
+        after_date: datetime = None,
+        after_id: UUID = None,
+    ) -> Optional[tuple[ProductReview]]:
+        ...
+
+    @abstractmethod
+    def count_reviews(self, product_id: UUID) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def recompute_final_prices(
+        self, vat_id: UUID = None, discount_id: UUID = None, batch_size: int = 1000
+    ) -> int:
+        ...
+
+    @abstractmethod
+    def recompute_rating_aggregates(self, batch_size: int = 1000) -> int:
         ...
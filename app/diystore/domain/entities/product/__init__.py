@@ -7,7 +7,9 @@ from .dimensions import ProductDimensions
 from .discount import Discount
 from .photo import ProductPhotoUrl
 from .price import ProductPrice
+from .price import calculate_final_price
 from .review import ProductReview
 from .vat import VAT
 from .vendor import ProductVendor
 from .product import Product
+from .product import calculate_average_rating
@@ -4,40 +4,36 @@ from typing import Optional
 
 from pydantic import BaseModel
 from pydantic import Field
-from pydantic import PrivateAttr
 
 from .discount import Discount
 from .vat import VAT
 from ...helpers import optional
+from ...helpers import round_decimal
+
+
+def calculate_final_price(
+    value: Decimal, vat_rate: Decimal, discount_rate: Optional[Decimal] = None
+) -> Decimal:
+    if discount_rate is not None:
+        value = value - (value * discount_rate)
+    return round_decimal(value + (value * vat_rate), "1.00")
 
 
 class ProductPrice(BaseModel):
     value: Decimal = Field(ge=0.01, le=999_999.99, decimal_places=2)
     vat: VAT = Field(...)
     discount: Discount = Field(default=None)
-    _rounding_template: Decimal = PrivateAttr(default=Decimal("1.00"))
 
     class Config:
         validate_assignment = True
 
-    def _apply_discount(self) -> Decimal:
-        return self.value - (self.value * self.discount)
-
-    def _add_vat(self, value: Decimal) -> Decimal:
-        return value + (value * self.vat)
-
-    def _round(self, value: Decimal) -> Decimal:
-        return value.quantize(self._rounding_template)
-
     def calculate_without_discount(self) -> Decimal:
-        return self._round(self._add_vat(self.value))
+        return calculate_final_price(self.value, self.vat.rate)
 
     def calculate(self) -> Decimal:
-        try:
-            v = self._apply_discount()
-        except TypeError:
-            v = self.value
-        return self._round(self._add_vat(v))
+        return calculate_final_price(
+            self.value, self.vat.rate, self.get_discount_rate()
+        )
 
     @optional()
     def get_discount_id(self) -> Optional[UUID]:
@@ -31,6 +31,15 @@ from ...helpers import round_decimal
 from ...helpers import optional
 
 
+def calculate_average_rating(
+    review_count: int, rating_sum: Decimal
+) -> Optional[Decimal]:
+    if not review_count:
+        return None
+    rating_avg = rating_sum / review_count
+    return round_decimal(rating_avg, "1.0") if rating_avg else None
+
+
 class Product(BaseModel):
     id: UUID = Field(default_factory=uuid4)
     ean: EAN13 = Field(...)
@@ -47,6 +56,8 @@ class Product(BaseModel):
     category: TerminalLevelProductCategory = Field(...)
     rating: ProductRating = Field(default=None)
     reviews: dict[int, ProductReview] = Field(default_factory=dict)
+    review_count: conint(ge=0) = Field(default=None)
+    rating_sum: Decimal = Field(default=None, ge=0)
     photo_url: ProductPhotoUrl = Field(default=None)
     vendor: ProductVendor = Field(...)
 
@@ -231,6 +242,19 @@ class Product(BaseModel):
     def _convert_reviews_iter_to_dict(cls, reviews: Iterable[ProductReview]):
         return {r.id.int : r for r in reviews}
 
+    @validator("review_count", always=True)
+    def _count_reviews(cls, count: Optional[int], values: dict):
+        if count is None:
+            return len(values.get("reviews", ()))
+        return count
+
+    @validator("rating_sum", always=True)
+    def _sum_reviews_ratings(cls, rating_sum: Optional[Decimal], values: dict):
+        if rating_sum is None:
+            reviews = values.get("reviews", {})
+            return sum((r.rating for r in reviews.values()), Decimal(0))
+        return rating_sum
+
     def get_client_rating(self) -> Optional[ProductRating]:
         return self.rating
 
@@ -240,16 +264,26 @@ class Product(BaseModel):
     def get_client_reviews(self) -> tuple[ProductReview]:
         return tuple(self.reviews[rev_id] for rev_id in self.reviews)
 
+    def get_review_count(self) -> int:
+        return self.review_count
+
     def calculate_rating(self):
-        n = len(self.reviews)
-        rating_avg = sum((self.reviews[rev_id].rating for rev_id in self.reviews)) / n
-        return round_decimal(rating_avg, "1.0") if rating_avg else None
+        return calculate_average_rating(self.review_count, self.rating_sum)
+
+    def _update_rating_aggregates(self, count_delta: int, rating_delta: Decimal):
+        self.review_count += count_delta
+        self.rating_sum += rating_delta
+        self.rating = self.calculate_rating()
 
     def add_client_review(self, review: ProductReview):
         if not isinstance(review, ProductReview):
             raise TypeError(f"invalid review object type")
+        replaced_review = self.reviews.get(review.id.int)
         self.reviews[review.id.int] = review
-        self.rating = self.calculate_rating()
+        if replaced_review is not None:
+            self._update_rating_aggregates(0, review.rating - replaced_review.rating)
+            return
+        self._update_rating_aggregates(1, review.rating)
 
     def delete_client_review(self, review_id: UUID) -> ProductReview:
         if not isinstance(review_id, UUID):
@@ -258,7 +292,7 @@ class Product(BaseModel):
         if int_id not in self.reviews:
             raise ValueError(f"no review with id {review_id!r}")
         deleted_review = self.reviews.pop(int_id)
-        self.rating = self.calculate_rating()
+        self._update_rating_aggregates(-1, -deleted_review.rating)
         return deleted_review
 
     def get_thumbnail_photo_url(self) -> str:
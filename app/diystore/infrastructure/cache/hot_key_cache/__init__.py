@@ -0,0 +1,3 @@
+from .sketch import CountMinSketch
+from .sketch import HotKeyTracker
+from .hot_key_cache import HotKeyCache
@@ -0,0 +1,111 @@
+from time import monotonic
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from .sketch import HotKeyTracker
+from ..interfaces import Cache
+
+
+class HotKeyCache(Cache):
+    """Wraps a cache, keeping in the process the representations, ETags and
+    compressed variants of its hot keys for ``local_ttl`` seconds, so that
+    the few keys taking most of the traffic are not read from the shard, or
+    server, holding them on every request. The copies are dropped on the
+    writes of the worker; the ones of the other workers are seen once the
+    copies expire."""
+
+    def __init__(
+        self,
+        cache: Cache,
+        tracker: HotKeyTracker = None,
+        local_ttl: float = 1.0,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self._cache = cache
+        self._tracker = HotKeyTracker() if tracker is None else tracker
+        self._local_ttl = local_ttl
+        self._clock = clock
+        # by key, the copies of its variants and their expiration, shared by
+        # the threads of the worker
+        self._local: dict[str, dict[str, tuple[float, Any]]] = {}
+        self._lock = Lock()
+
+    def hot_keys(self) -> list[tuple[str, int]]:
+        return self._tracker.hot_keys()
+
+    def dispose(self, close: bool = True):
+        with self._lock:
+            self._local.clear()
+        dispose = getattr(self._cache, "dispose", None)
+        if dispose is not None:
+            dispose(close=close)
+
+    def _generate_key(self, **kwargs: dict):
+        return ":".join(str(v) for v in kwargs.values())
+
+    def _read(self, variant: str, read: Callable[[], Any], **kwargs) -> Any:
+        key = self._generate_key(**kwargs)
+        if not self._tracker.record(key):
+            with self._lock:
+                self._local.pop(key, None)
+            return read()
+        now = self._clock()
+        with self._lock:
+            copies = self._local.get(key)
+            copy = None if copies is None else copies.get(variant)
+        if copy is not None and copy[0] > now:
+            return copy[1]
+        # read with the lock released, the other threads being served
+        # meanwhile
+        value = read()
+        if value is None or value == (None, None):
+            return value
+        with self._lock:
+            copies = self._local.get(key)
+            if copies is None:
+                self._prune()
+                copies = self._local.setdefault(key, {})
+            copies[variant] = (now + self._local_ttl, value)
+        return value
+
+    def _prune(self):
+        # the copies of the keys which cooled down and were not read since,
+        # with the lock held
+        if len(self._local) >= len(self._tracker):
+            for key in list(self._local):
+                if not self._tracker.is_hot(key):
+                    self._local.pop(key, None)
+
+    def _drop(self, **kwargs):
+        with self._lock:
+            self._local.pop(self._generate_key(**kwargs), None)
+
+    def get(self, **kwargs) -> Optional[str]:
+        return self._read("", lambda: self._cache.get(**kwargs), **kwargs)
+
+    def set(self, representation: str, etag: str = None, **kwargs):
+        self._drop(**kwargs)
+        return self._cache.set(representation, etag, **kwargs)
+
+    def get_etag(self, **kwargs) -> Optional[str]:
+        return self._read("etag", lambda: self._cache.get_etag(**kwargs), **kwargs)
+
+    def get_encoded(
+        self, encoding: str, **kwargs
+    ) -> tuple[Optional[bytes], Optional[str]]:
+        return self._read(
+            encoding, lambda: self._cache.get_encoded(encoding, **kwargs), **kwargs
+        )
+
+    def set_encoded(self, encoding: str, body: bytes, etag: str, **kwargs):
+        with self._lock:
+            copies = self._local.get(self._generate_key(**kwargs))
+            if copies is not None:
+                copies.pop(encoding, None)
+        return self._cache.set_encoded(encoding, body, etag, **kwargs)
+
+    def delete(self, **kwargs):
+        self._drop(**kwargs)
+        return self._cache.delete(**kwargs)
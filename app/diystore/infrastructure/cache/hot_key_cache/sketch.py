@@ -0,0 +1,95 @@
+from hashlib import blake2b
+from threading import Lock
+
+
+class CountMinSketch:
+    """Approximate counts of keys in ``depth`` rows of ``width`` counters, one
+    by row being incremented by key. A count is never underestimated, and
+    overestimated by the collisions of the key in its least collided row
+    only, updates being conservative. It's not thread safe: HotKeyTracker
+    updates it under its lock."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self._width = width
+        self._depth = depth
+        self._rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key: str) -> list[int]:
+        digest = blake2b(key.encode(), digest_size=4 * self._depth).digest()
+        return [
+            int.from_bytes(digest[4 * i : 4 * i + 4], "little") % self._width
+            for i in range(self._depth)
+        ]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Counts the key, and returns its new estimate."""
+        indexes = self._indexes(key)
+        estimate = min(row[i] for row, i in zip(self._rows, indexes)) + count
+        for row, i in zip(self._rows, indexes):
+            if row[i] < estimate:
+                row[i] = estimate
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+    def decay(self):
+        """Halves the counts, so that they weigh the recent accesses most."""
+        for row in self._rows:
+            row[:] = [c >> 1 for c in row]
+
+
+class HotKeyTracker:
+    """Finds the hot keys: the ones accessed about ``threshold`` times by
+    ``window`` accesses, the counts of a CountMinSketch being halved every
+    ``window`` accesses. A hot key stays hot until its halved count falls
+    under half the threshold, so that keys near it don't flap. At most
+    ``max_hot`` keys are hot, the least accessed being dropped first."""
+
+    def __init__(
+        self,
+        threshold: int = 100,
+        window: int = 10000,
+        max_hot: int = 32,
+        width: int = 2048,
+        depth: int = 4,
+    ):
+        self._threshold = threshold
+        self._window = window
+        self._max_hot = max_hot
+        self._sketch = CountMinSketch(width, depth)
+        self._hot: dict[str, int] = {}
+        self._accesses = 0
+        self._lock = Lock()
+
+    def record(self, key: str) -> bool:
+        """Counts an access to the key, and returns whether it's hot."""
+        with self._lock:
+            count = self._sketch.add(key)
+            if key in self._hot or count >= self._threshold:
+                self._hot[key] = count
+                if len(self._hot) > self._max_hot:
+                    del self._hot[min(self._hot, key=self._hot.get)]
+            self._accesses += 1
+            if self._accesses >= self._window:
+                self._roll()
+            return key in self._hot
+
+    def _roll(self):
+        self._accesses = 0
+        self._sketch.decay()
+        counts = {k: self._sketch.estimate(k) for k in self._hot}
+        self._hot = {k: c for k, c in counts.items() if 2 * c >= self._threshold}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hot)
+
+    def is_hot(self, key: str) -> bool:
+        with self._lock:
+            return key in self._hot
+
+    def hot_keys(self) -> list[tuple[str, int]]:
+        """The hot keys and their estimated counts, the hottest first."""
+        with self._lock:
+            return sorted(self._hot.items(), key=lambda item: -item[1])
@@ -8,7 +8,19 @@ class Cache(ABC):
         ...
 
     @abstractmethod
-    def set(self, representation: str, **kwargs):
+    def set(self, representation: str, etag: str = None, **kwargs):
+        ...
+
+    @abstractmethod
+    def get_etag(self, **kwargs):
+        ...
+
+    @abstractmethod
+    def get_encoded(self, encoding: str, **kwargs):
+        ...
+
+    @abstractmethod
+    def set_encoded(self, encoding: str, body: bytes, etag: str, **kwargs):
         ...
 
     @abstractmethod
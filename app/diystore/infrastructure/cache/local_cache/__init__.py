@@ -0,0 +1,4 @@
+from .kv_cache import KeyValueRepresentationCache
+from .memory_cache import MemoryRepresentationCache
+from .shared_memory_cache import SharedMemoryRepresentationCache
+from .sqlite_cache import SQLiteRepresentationCache
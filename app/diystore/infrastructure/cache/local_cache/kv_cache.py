@@ -0,0 +1,78 @@
+from abc import abstractmethod
+from typing import Optional
+from typing import Sequence
+
+from ..interfaces import Cache
+from ..ttl_policy import TTLPolicy
+
+
+class KeyValueRepresentationCache(Cache):
+    """Representation cache over a store of bytes by key, with the keys and
+    the expiration of RedisRepresentationCache, which its subclasses
+    implement."""
+
+    def __init__(self, ttl: int = 360, ttl_policy: TTLPolicy = None):
+        self._ttl_policy = ttl_policy or TTLPolicy(ttl)
+
+    @abstractmethod
+    def _get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        ...
+
+    @abstractmethod
+    def _set_many(self, items: dict[str, bytes], ttl: int):
+        """Stores the items, expiring ``ttl`` seconds later."""
+
+    @abstractmethod
+    def _delete_many(self, keys: Sequence[str]):
+        ...
+
+    def _generate_key(self, **kwargs: dict):
+        return ":".join(str(v) for v in kwargs.values())
+
+    def get(self, **kwargs) -> Optional[str]:
+        key = self._generate_key(**kwargs)
+        value = self._get_many([key])[0]
+        if value is None:
+            return None
+        self._ttl_policy.record_hit(key)
+        return value.decode()
+
+    def set(self, representation: str, etag: str = None, **kwargs):
+        key = self._generate_key(**kwargs)
+        items = {key: representation.encode()}
+        if etag is not None:
+            items[f"{key}:etag"] = etag.encode()
+        self._set_many(items, self._ttl_policy.ttl(key, kwargs.get("fname"), etag))
+        return True
+
+    def get_etag(self, **kwargs) -> Optional[str]:
+        key = self._generate_key(**kwargs)
+        etag = self._get_many([f"{key}:etag"])[0]
+        if etag is None:
+            return None
+        self._ttl_policy.record_hit(key)
+        return etag.decode()
+
+    def get_encoded(
+        self, encoding: str, **kwargs
+    ) -> tuple[Optional[bytes], Optional[str]]:
+        key = self._generate_key(**kwargs)
+        body, body_etag, etag = self._get_many(
+            [f"{key}:{encoding}", f"{key}:{encoding}:etag", f"{key}:etag"]
+        )
+        if body is None or etag is None or body_etag != etag:
+            return None, None
+        self._ttl_policy.record_hit(key)
+        return body, etag.decode()
+
+    def set_encoded(self, encoding: str, body: bytes, etag: str, **kwargs):
+        key = self._generate_key(**kwargs)
+        self._set_many(
+            {f"{key}:{encoding}": body, f"{key}:{encoding}:etag": etag.encode()},
+            self._ttl_policy.current_ttl(key, kwargs.get("fname")),
+        )
+        return True
+
+    def delete(self, **kwargs):
+        key = self._generate_key(**kwargs)
+        self._delete_many([key, f"{key}:etag"])
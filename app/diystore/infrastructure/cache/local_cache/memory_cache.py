@@ -0,0 +1,63 @@
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+from collections import OrderedDict
+
+from .kv_cache import KeyValueRepresentationCache
+from ..ttl_policy import TTLPolicy
+
+
+class MemoryRepresentationCache(KeyValueRepresentationCache):
+    """Representations kept in the memory of the process, the least recently
+    used ones being evicted beyond ``max_entries``. Each worker has its own,
+    so that it suits a single worker, or tests."""
+
+    def __init__(
+        self,
+        ttl: int = 360,
+        max_entries: int = 4096,
+        clock: Callable[[], float] = monotonic,
+        ttl_policy: TTLPolicy = None,
+    ):
+        super().__init__(ttl, ttl_policy)
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        now = self._clock()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                values.append(entry and entry[1])
+        return values
+
+    def _set_many(self, items: dict[str, bytes], ttl: int):
+        expires_at = self._clock() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _delete_many(self, keys: Sequence[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,258 @@
+import os
+import mmap
+import fcntl
+import struct
+from time import time
+from hashlib import blake2b
+from threading import Lock
+from typing import Optional
+from typing import Sequence
+
+from .kv_cache import KeyValueRepresentationCache
+from ..ttl_policy import TTLPolicy
+
+
+_MAGIC = b"DIYSHM01"
+# magic, number of slots, size of a slot
+_FILE_HEADER = struct.Struct("<8sII")
+# sequence, hash of the key, expiration, length of the key, length of the
+# value, flags
+_SLOT_HEADER = struct.Struct("<QQdHIBx")
+_EMPTY = (0, 0, 0, 0, 0)
+# the value is kept in an overflow file, the slot holding only the key
+_OVERFLOW = 1
+_SEQUENCE = struct.Struct("<Q")
+# slots a key may be stored in, from the one its hash points to
+_PROBES = 4
+_READ_RETRIES = 3
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedMemoryRepresentationCache(KeyValueRepresentationCache):
+    """Representations kept in a hash table of fixed size slots, in a file
+    every worker of the host maps in memory (in /dev/shm, it never reaches a
+    disk). A key is stored in one of the few slots following the one its hash
+    points to, evicting the one closest to expire. A value larger than a slot
+    is kept in a file of its own, in the overflow directory next to the table
+    (so at most one file by slot), the slot holding its key and expiration.
+
+    Writers take a lock on the file, readers take none: each slot has a
+    sequence number the writers make odd while writing, and the readers retry
+    when it changed while they were copying the slot."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: int = 360,
+        slots: int = 1024,
+        slot_size: int = 65536,
+        ttl_policy: TTLPolicy = None,
+    ):
+        super().__init__(ttl, ttl_policy)
+        # a file by layout, as workers still mapping a file would crash once
+        # it's resized
+        self._path = f"{path}.{slots}x{slot_size}"
+        self._overflow_path = f"{self._path}.overflow"
+        self._slots = slots
+        self._slot_size = slot_size
+        self._size = _FILE_HEADER.size + slots * slot_size
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+        # locks on files are held by processes, not by their threads
+        self._lock = Lock()
+
+    def _map(self) -> mmap.mmap:
+        mm = self._mm
+        return mm if mm is not None else self._open()
+
+    def _open(self) -> mmap.mmap:
+        with self._lock:
+            if self._mm is not None:
+                return self._mm
+            os.makedirs(self._overflow_path, 0o700, exist_ok=True)
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, _FILE_HEADER.size, 0)
+                expected = _FILE_HEADER.pack(_MAGIC, self._slots, self._slot_size)
+                if header != expected:
+                    os.ftruncate(fd, self._size)
+                    os.pwrite(fd, expected, 0)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+            self._fd, self._mm = fd, mmap.mmap(fd, self._size)
+            return self._mm
+
+    def dispose(self, close: bool = True):
+        """Unmaps the file. A forked process keeps sharing the mapping of its
+        parent with ``close=False``."""
+        if not close:
+            return
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                os.close(self._fd)
+            self._fd, self._mm = None, None
+
+    def _offsets(self, key_hash: int):
+        first = key_hash % self._slots
+        for i in range(_PROBES):
+            yield _FILE_HEADER.size + (first + i) % self._slots * self._slot_size
+
+    def _overflow_file(self, key_hash: int) -> str:
+        return os.path.join(self._overflow_path, f"{key_hash:016x}")
+
+    def _read_overflow(self, key: bytes, key_hash: int, value_len: int):
+        try:
+            with open(self._overflow_file(key_hash), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # replaced or removed since the slot was read
+        if len(data) != len(key) + value_len or not data.startswith(key):
+            return None
+        return data[len(key) :]
+
+    def _read(self, mm: mmap.mmap, offset: int, key: bytes, key_hash: int):
+        for _ in range(_READ_RETRIES):
+            sequence, slot_hash, expires_at, key_len, value_len, flags = (
+                _SLOT_HEADER.unpack_from(mm, offset)
+            )
+            overflow = flags & _OVERFLOW
+            inline_len = key_len if overflow else key_len + value_len
+            if slot_hash != key_hash or expires_at <= time():
+                value = None
+            elif _SLOT_HEADER.size + inline_len > self._slot_size:
+                # torn by a writer
+                continue
+            else:
+                start = offset + _SLOT_HEADER.size
+                value = None
+                if mm[start : start + key_len] == key:
+                    value = mm[start + key_len : start + inline_len]
+            if not sequence & 1 and _SEQUENCE.unpack_from(mm, offset)[0] == sequence:
+                if value is not None and overflow:
+                    return self._read_overflow(key, key_hash, value_len)
+                return value
+        return None
+
+    def _get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        mm = self._map()
+        values = []
+        for key in keys:
+            key = key.encode()
+            key_hash = _hash(key)
+            value = None
+            for offset in self._offsets(key_hash):
+                value = self._read(mm, offset, key, key_hash)
+                if value is not None:
+                    break
+            values.append(value)
+        return values
+
+    def _write(self, mm: mmap.mmap, offset: int, header: tuple, data: bytes = b""):
+        sequence = _SEQUENCE.unpack_from(mm, offset)[0]
+        _SEQUENCE.pack_into(mm, offset, sequence + 1)
+        _SLOT_HEADER.pack_into(mm, offset, sequence + 1, *header)
+        start = offset + _SLOT_HEADER.size
+        mm[start : start + len(data)] = data
+        _SEQUENCE.pack_into(mm, offset, sequence + 2)
+
+    def _locked(self):
+        return _FileLock(self._lock, self._fd)
+
+    def _find_slot(self, mm: mmap.mmap, key: bytes, key_hash: int) -> tuple:
+        """Offset of the slot of ``key`` if stored, or else of the free one, or
+        else of the one closest to expire, and whether ``key`` is stored."""
+        now = time()
+        candidates = []
+        for offset in self._offsets(key_hash):
+            _, slot_hash, expires_at, key_len, *_ = _SLOT_HEADER.unpack_from(
+                mm, offset
+            )
+            start = offset + _SLOT_HEADER.size
+            if slot_hash == key_hash and mm[start : start + key_len] == key:
+                return offset, True
+            candidates.append((expires_at if expires_at > now else 0, offset))
+        return min(candidates)[1], False
+
+    def _release(self, mm: mmap.mmap, offset: int):
+        """Removes the overflow file of the value in the slot, if any."""
+        _, slot_hash, _, _, _, flags = _SLOT_HEADER.unpack_from(mm, offset)
+        if flags & _OVERFLOW:
+            try:
+                os.unlink(self._overflow_file(slot_hash))
+            except FileNotFoundError:
+                pass
+
+    def _write_overflow(self, key: bytes, key_hash: int, value: bytes) -> bool:
+        """Whether the value could be written, the device being full
+        otherwise."""
+        # written aside then renamed, so that readers see either file whole;
+        # the writers hold the lock, so one name is enough
+        path = self._overflow_file(key_hash)
+        try:
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(key + value)
+            os.replace(f"{path}.tmp", path)
+        except OSError:
+            return False
+        return True
+
+    def _set_many(self, items: dict[str, bytes], ttl: int):
+        mm = self._map()
+        expires_at = time() + ttl
+        with self._locked():
+            for key, value in items.items():
+                key = key.encode()
+                key_hash = _hash(key)
+                offset, _ = self._find_slot(mm, key, key_hash)
+                self._release(mm, offset)
+                header = (key_hash, expires_at, len(key), len(value))
+                if _SLOT_HEADER.size + len(key) + len(value) <= self._slot_size:
+                    self._write(mm, offset, (*header, 0), key + value)
+                elif _SLOT_HEADER.size + len(key) <= self._slot_size and (
+                    self._write_overflow(key, key_hash, value)
+                ):
+                    self._write(mm, offset, (*header, _OVERFLOW), key)
+                else:
+                    # not kept, and the previous value must not outlive this
+                    # one
+                    self._write(mm, offset, _EMPTY)
+
+    def _delete_many(self, keys: Sequence[str]):
+        mm = self._map()
+        with self._locked():
+            for key in keys:
+                key = key.encode()
+                offset, stored = self._find_slot(mm, key, _hash(key))
+                if stored:
+                    self._release(mm, offset)
+                    self._write(mm, offset, _EMPTY)
+
+    def clear(self):
+        mm = self._map()
+        with self._locked():
+            for i in range(self._slots):
+                offset = _FILE_HEADER.size + i * self._slot_size
+                self._release(mm, offset)
+                self._write(mm, offset, _EMPTY)
+
+
+class _FileLock:
+    """Excludes the threads of the process, then the other processes."""
+
+    def __init__(self, lock: Lock, fd: int):
+        self._lock = lock
+        self._fd = fd
+
+    def __enter__(self):
+        self._lock.acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+from time import time
+from threading import local
+from typing import Optional
+from typing import Sequence
+
+from .kv_cache import KeyValueRepresentationCache
+from ..ttl_policy import TTLPolicy
+
+
+class SQLiteRepresentationCache(KeyValueRepresentationCache):
+    """Representations kept in a SQLite file, shared by the workers of a
+    host and kept across restarts. The expired ones are deleted by the writes,
+    which bounds the file to the representations written within a TTL.
+
+    Each thread of each process opens its own connection, in WAL mode so that
+    the readers do not wait for the writer."""
+
+    def __init__(self, path: str, ttl: int = 360, ttl_policy: TTLPolicy = None):
+        super().__init__(ttl, ttl_policy)
+        self._path = path
+        self._local = local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # a forked process must not use the connections of its parent
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if pid != os.getpid():
+            conn = sqlite3.connect(self._path, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB, expires_at REAL) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)"
+            )
+            self._local.conn = (conn, os.getpid())
+        return conn
+
+    def dispose(self, close: bool = True):
+        conn, pid = getattr(self._local, "conn", (None, None))
+        if conn is not None and pid == os.getpid() and close:
+            conn.close()
+        self._local.conn = (None, None)
+
+    def _get_many(self, keys: Sequence[str]) -> list[Optional[bytes]]:
+        rows = self._conn.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(keys))}) "
+            "AND expires_at > ?",
+            (*keys, time()),
+        )
+        values = dict(rows.fetchall())
+        return [values.get(k) for k in keys]
+
+    def _set_many(self, items: dict[str, bytes], ttl: int):
+        now = time()
+        conn = self._conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                [(k, v, now + ttl) for k, v in items.items()],
+            )
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+    def _delete_many(self, keys: Sequence[str]):
+        self._conn.execute(
+            f"DELETE FROM cache WHERE key IN ({','.join('?' * len(keys))})", keys
+        )
+
+    def clear(self):
+        self._conn.execute("DELETE FROM cache")
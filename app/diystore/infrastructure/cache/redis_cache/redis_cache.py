@@ -1,9 +1,12 @@
 from typing import Optional
+from typing import Sequence
 from hashlib import sha1
 
 from redis import Redis
 
+from .tracking import ClientSideCache
 from ..interfaces import Cache
+from ..ttl_policy import TTLPolicy
 
 
 class RedisRepresentationCache(Cache):
@@ -15,29 +18,127 @@ class RedisRepresentationCache(Cache):
         password: str = None,
         ssl: bool = True,
         ttl: int = 360,
+        client_tracking: bool = False,
+        client_tracking_max_entries: int = 4096,
+        ttl_policy: TTLPolicy = None,
+        key_prefix: str = "repr:",
     ):
-        self._conn = Redis(
-            host=host,
-            port=port,
-            db=db,
-            password=password,
-            decode_responses=True,
-            ssl=ssl,
-            ssl_cert_reqs=None,
-        )
-        self._ttl = ttl
+        options = dict(host=host, port=port, db=db, password=password, ssl=ssl)
+        self._conn = Redis(**options, decode_responses=True, ssl_cert_reqs=None)
+        # compressed representations are not text
+        self._binary_conn = Redis(**options, ssl_cert_reqs=None)
+        self._ttl_policy = ttl_policy or TTLPolicy(ttl)
+        # the representations are kept apart from the other keys of the
+        # database, whose changes Redis then does not notify
+        self._key_prefix = key_prefix
+        self._local: Optional[ClientSideCache] = None
+        if client_tracking:
+            pool = self._binary_conn.connection_pool
+            self._local = ClientSideCache(
+                lambda: pool.connection_class(**pool.connection_kwargs),
+                max_entries=client_tracking_max_entries,
+                prefixes=(key_prefix,) if key_prefix else (),
+            )
+
+    def dispose(self, close: bool = True):
+        """Drops the pooled connections. A forked process drops the ones it
+        inherited with ``close=False``, leaving them to its parent."""
+        for conn in (self._conn, self._binary_conn):
+            if close:
+                conn.connection_pool.disconnect()
+            else:
+                conn.connection_pool.reset()
+        if self._local is not None:
+            self._local.stop()
 
     def _generate_key(self, **kwargs: dict):
-        return ":".join(v for v in kwargs.values())
+        return self._key_prefix + ":".join(str(v) for v in kwargs.values())
+
+    def _mget(self, *keys: str) -> list[Optional[bytes]]:
+        if self._local is None:
+            return self._binary_conn.mget(keys)
+        return self._local.get_many(keys, self._binary_conn.mget)
 
     def get(self, **kwargs) -> Optional[str]:
         key = self._generate_key(**kwargs)
-        return self._conn.get(key)
+        if self._local is None:
+            value = self._conn.get(key)
+        else:
+            value = self._mget(key)[0]
+            value = value if value is None else value.decode()
+        if value is not None:
+            self._ttl_policy.record_hit(key)
+        return value
+
+    def set(self, representation: str, etag: str = None, **kwargs):
+        key = self._generate_key(**kwargs)
+        ttl = self._ttl_policy.ttl(key, kwargs.get("fname"), etag)
+        if etag is None:
+            return self._conn.set(key, representation, ex=ttl)
+        # the ETag is kept apart, so that it can be read without the body
+        with self._conn.pipeline() as pipe:
+            pipe.set(key, representation, ex=ttl)
+            pipe.set(f"{key}:etag", etag, ex=ttl)
+            return all(pipe.execute())
+
+    def get_many(self, keys: Sequence[dict]) -> list[Optional[str]]:
+        """Returns the representations of ``keys``, the keyword arguments
+        of each, in a single round trip."""
+        generated = [self._generate_key(**kwargs) for kwargs in keys]
+        values = self._mget(*generated)
+        for key, value in zip(generated, values):
+            if value is not None:
+                self._ttl_policy.record_hit(key)
+        return [v if v is None else v.decode() for v in values]
+
+    def set_many(self, items: Sequence[tuple[str, Optional[str], dict]]):
+        """Stores the representations, ETags and keyword arguments of
+        ``items`` in a single pipeline."""
+        with self._conn.pipeline() as pipe:
+            for representation, etag, kwargs in items:
+                key = self._generate_key(**kwargs)
+                ttl = self._ttl_policy.ttl(key, kwargs.get("fname"), etag)
+                pipe.set(key, representation, ex=ttl)
+                if etag is not None:
+                    pipe.set(f"{key}:etag", etag, ex=ttl)
+            return all(pipe.execute())
+
+    def get_etag(self, **kwargs) -> Optional[str]:
+        key = self._generate_key(**kwargs)
+        if self._local is None:
+            etag = self._conn.get(f"{key}:etag")
+        else:
+            etag = self._mget(f"{key}:etag")[0]
+            etag = etag if etag is None else etag.decode()
+        if etag is not None:
+            self._ttl_policy.record_hit(key)
+        return etag
+
+    def get_encoded(
+        self, encoding: str, **kwargs
+    ) -> tuple[Optional[bytes], Optional[str]]:
+        """Returns a compressed representation and the ETag of the
+        representation, or Nones when the representation changed since it
+        was compressed."""
+        key = self._generate_key(**kwargs)
+        body, body_etag, etag = self._mget(
+            f"{key}:{encoding}", f"{key}:{encoding}:etag", f"{key}:etag"
+        )
+        if body is None or etag is None or body_etag != etag:
+            return None, None
+        self._ttl_policy.record_hit(key)
+        return body, etag.decode()
 
-    def set(self, representation: str, **kwargs):
+    def set_encoded(self, encoding: str, body: bytes, etag: str, **kwargs):
         key = self._generate_key(**kwargs)
-        return self._conn.set(key, representation, ex=self._ttl)
+        ttl = self._ttl_policy.current_ttl(key, kwargs.get("fname"))
+        with self._binary_conn.pipeline() as pipe:
+            pipe.set(f"{key}:{encoding}", body, ex=ttl)
+            pipe.set(f"{key}:{encoding}:etag", etag, ex=ttl)
+            return all(pipe.execute())
 
     def delete(self, **kwargs):
         key = self._generate_key(**kwargs)
-        self._conn.delete(key)
+        # the compressed representations are left to expire, as they are
+        # ignored once the ETag of the representation is gone
+        self._conn.delete(key, f"{key}:etag")
@@ -0,0 +1,180 @@
+import os
+from threading import Event
+from threading import Lock
+from threading import Thread
+from typing import Callable
+from typing import Optional
+from typing import Sequence
+from collections import OrderedDict
+
+from redis.connection import Connection
+from redis.exceptions import RedisError
+
+
+INVALIDATION_CHANNEL = b"__redis__:invalidate"
+
+_missing = object()
+
+
+class ClientSideCache:
+    """Local copies of Redis values, dropped as soon as Redis notifies that
+    their keys changed (server-assisted client side caching, in broadcasting
+    mode, so that the pooled connections need no tracking of their own).
+    Only the keys starting with one of ``prefixes`` are notified, the ones
+    of every key otherwise.
+
+    The notifications are read by a thread, on a connection of its own that
+    they are redirected to. While it is not subscribed, e.g. reconnecting,
+    nothing is kept and every read goes to Redis."""
+
+    def __init__(
+        self,
+        connection_factory: Callable[[], Connection],
+        max_entries: int = 4096,
+        prefixes: Sequence[str] = (),
+        poll_interval: float = 1.0,
+        retry_interval: float = 1.0,
+    ):
+        self._connection_factory = connection_factory
+        self._max_entries = max_entries
+        self._prefixes = prefixes
+        self._poll_interval = poll_interval
+        self._retry_interval = retry_interval
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        # the token of the read each key is being fetched by, replaced with
+        # None when the key is invalidated meanwhile
+        self._pending: dict[str, Optional[object]] = {}
+        self._lock = Lock()
+        self._start_lock = Lock()
+        self._subscribed = Event()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+        self._pid: Optional[int] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def subscribed(self) -> bool:
+        return self._subscribed.is_set()
+
+    def start(self, timeout: float = 0) -> bool:
+        """Starts listening to the notifications, unless this process already
+        does, and returns whether it is subscribed within ``timeout``."""
+        if self._pid != os.getpid():
+            with self._start_lock:
+                # a forked process inherits neither the thread nor its
+                # subscription, only the copies, which may be stale already
+                if self._pid != os.getpid():
+                    self._reset()
+                    self._thread = Thread(
+                        target=self._listen, name="redis-invalidations", daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+        return self._subscribed.wait(timeout)
+
+    def stop(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                self._stopped.set()
+                self._thread.join()
+            self._reset()
+
+    def _reset(self):
+        self._pid = None
+        self._thread = None
+        self._stopped = Event()
+        self._subscribed.clear()
+        self.invalidate(None)
+
+    def get_many(
+        self,
+        keys: Sequence[str],
+        fetch: Callable[[Sequence[str]], list[Optional[bytes]]],
+    ) -> list[Optional[bytes]]:
+        """Returns the values of ``keys``, from the local copies when all of
+        them are kept, or else from ``fetch``."""
+        self.start()
+        if not self._subscribed.is_set():
+            return fetch(keys)
+        token = object()
+        with self._lock:
+            values = [self._entries.get(k, _missing) for k in keys]
+            if _missing not in values:
+                for k in keys:
+                    self._entries.move_to_end(k)
+                return values
+            for k in keys:
+                self._pending[k] = token
+        values = None
+        try:
+            values = fetch(keys)
+        finally:
+            with self._lock:
+                for k, v in zip(keys, values or [None] * len(keys)):
+                    pending = self._pending.get(k, _missing)
+                    if pending is token or pending is None:
+                        del self._pending[k]
+                    # the missing keys are not kept, their creation being
+                    # notified as well
+                    if pending is token and v is not None and self._subscribed.is_set():
+                        self._entries[k] = v
+                        self._entries.move_to_end(k)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return values
+
+    def invalidate(self, keys: Optional[Sequence[bytes]]):
+        """Drops the copies of ``keys``, or of every key when None, as Redis
+        notifies after a flush."""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                for k in self._pending:
+                    self._pending[k] = None
+                return
+            for k in keys:
+                k = k.decode() if isinstance(k, bytes) else k
+                self._entries.pop(k, None)
+                if k in self._pending:
+                    self._pending[k] = None
+
+    def _subscribe(self) -> Connection:
+        conn = self._connection_factory()
+        conn.connect()
+        conn.send_command("CLIENT", "ID")
+        client_id = conn.read_response()
+        prefixes = [arg for p in self._prefixes for arg in ("PREFIX", p)]
+        conn.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes
+        )
+        conn.read_response()
+        conn.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+        conn.read_response()
+        return conn
+
+    def _listen(self):
+        stopped = self._stopped
+        while not stopped.is_set():
+            conn = None
+            try:
+                conn = self._subscribe()
+                self._subscribed.set()
+                while not stopped.is_set():
+                    if conn.can_read(timeout=self._poll_interval):
+                        self._handle(conn.read_response())
+            except (RedisError, OSError):
+                pass
+            finally:
+                # the changes notified while disconnected are lost
+                self._subscribed.clear()
+                self.invalidate(None)
+                if conn is not None:
+                    conn.disconnect()
+            stopped.wait(self._retry_interval)
+
+    def _handle(self, message: list):
+        kind, channel, keys = message
+        if kind == b"message" and channel == INVALIDATION_CHANNEL:
+            self.invalidate(keys)
@@ -0,0 +1,2 @@
+from .hashring import HashRing
+from .sharded_cache import ShardedRepresentationCache
@@ -0,0 +1,51 @@
+from bisect import bisect
+from hashlib import blake2b
+from typing import Iterable
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of keys over named nodes. Each node is placed at
+    ``vnodes`` points of the ring, so that the keys spread evenly, and adding
+    or removing a node only remaps the keys falling next to its points."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 160):
+        self._vnodes = vnodes
+        self._owners: dict[int, str] = {}
+        self._points: list[int] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, node: str):
+        return node in self.nodes
+
+    @property
+    def nodes(self) -> set[str]:
+        return set(self._owners.values())
+
+    def add_node(self, node: str):
+        if node in self:
+            raise ValueError(f"node {node} already in the ring")
+        for i in range(self._vnodes):
+            self._owners.setdefault(_hash(f"{node}#{i}"), node)
+        self._points = sorted(self._owners)
+
+    def remove_node(self, node: str):
+        if node not in self:
+            raise KeyError(node)
+        self._owners = {p: n for p, n in self._owners.items() if n != node}
+        self._points = sorted(self._owners)
+
+    def get_node(self, key: str) -> str:
+        """The node owning the first point of the ring at or after the hash
+        of ``key``."""
+        if not self._points:
+            raise LookupError("no node in the ring")
+        i = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
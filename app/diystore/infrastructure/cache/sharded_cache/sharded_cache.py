@@ -0,0 +1,122 @@
+from typing import Optional
+from typing import Sequence
+
+from .hashring import HashRing
+from ..interfaces import Cache
+from ..redis_cache import RedisRepresentationCache
+
+
+class ShardedRepresentationCache(Cache):
+    """Spreads the representations over several caches, e.g. one by Redis
+    node, by consistent hashing of their keys. All the keys of a
+    representation (its ETag and compressed variants) live on the shard of
+    the representation, so that each operation is a single round trip, or
+    pipeline, to a single shard. The ones on several representations are a
+    round trip, or pipeline, by shard."""
+
+    def __init__(self, shards: dict[str, Cache] = None, vnodes: int = 160):
+        self._shards: dict[str, Cache] = {}
+        self._ring = HashRing(vnodes=vnodes)
+        for name, shard in (shards or {}).items():
+            self.add_shard(name, shard)
+
+    @classmethod
+    def from_redis_nodes(
+        cls, nodes: list[dict], vnodes: int = 160, **options
+    ) -> "ShardedRepresentationCache":
+        """Creates a shard for each Redis node, given by its host, port, db,
+        password and ssl, with the ``options`` of RedisRepresentationCache."""
+        shards = {
+            f"{node['host']}:{node['port']}/{node.get('db', 0)}": RedisRepresentationCache(
+                **node, **options
+            )
+            for node in nodes
+        }
+        return cls(shards, vnodes=vnodes)
+
+    @property
+    def shards(self) -> dict[str, Cache]:
+        return dict(self._shards)
+
+    def add_shard(self, name: str, shard: Cache):
+        """Adds a shard, which takes over about 1/n of the keys of the others.
+        These are missed once, and expire from their former shard."""
+        self._ring.add_node(name)
+        self._shards[name] = shard
+
+    def remove_shard(self, name: str) -> Cache:
+        """Removes a shard, its keys being spread over the others."""
+        self._ring.remove_node(name)
+        return self._shards.pop(name)
+
+    def dispose(self, close: bool = True):
+        for shard in self._shards.values():
+            dispose = getattr(shard, "dispose", None)
+            if dispose is not None:
+                dispose(close=close)
+
+    def _generate_key(self, **kwargs: dict):
+        return ":".join(str(v) for v in kwargs.values())
+
+    def _shard(self, **kwargs) -> Cache:
+        return self._shards[self._ring.get_node(self._generate_key(**kwargs))]
+
+    def _group_by_shard(self, keys: Sequence[dict]) -> dict[str, list[int]]:
+        """The indexes of ``keys``, by the name of their shard."""
+        groups: dict[str, list[int]] = {}
+        for i, kwargs in enumerate(keys):
+            name = self._ring.get_node(self._generate_key(**kwargs))
+            groups.setdefault(name, []).append(i)
+        return groups
+
+    def get(self, **kwargs) -> Optional[str]:
+        return self._shard(**kwargs).get(**kwargs)
+
+    def get_many(self, keys: Sequence[dict]) -> list[Optional[str]]:
+        """Returns the representations of ``keys``, the keyword arguments of
+        each, reading those of each shard at once when it can."""
+        values: list[Optional[str]] = [None] * len(keys)
+        for name, indexes in self._group_by_shard(keys).items():
+            shard = self._shards[name]
+            shard_keys = [keys[i] for i in indexes]
+            get_many = getattr(shard, "get_many", None)
+            if get_many is not None:
+                shard_values = get_many(shard_keys)
+            else:
+                shard_values = [shard.get(**kwargs) for kwargs in shard_keys]
+            for i, value in zip(indexes, shard_values):
+                values[i] = value
+        return values
+
+    def set_many(self, items: Sequence[tuple[str, Optional[str], dict]]):
+        """Stores the representations, ETags and keyword arguments of
+        ``items``, writing those of each shard at once when it can."""
+        stored = True
+        groups = self._group_by_shard([kwargs for _, _, kwargs in items])
+        for name, indexes in groups.items():
+            shard = self._shards[name]
+            shard_items = [items[i] for i in indexes]
+            set_many = getattr(shard, "set_many", None)
+            if set_many is not None:
+                stored = set_many(shard_items) and stored
+            else:
+                for representation, etag, kwargs in shard_items:
+                    stored = shard.set(representation, etag, **kwargs) and stored
+        return stored
+
+    def set(self, representation: str, etag: str = None, **kwargs):
+        return self._shard(**kwargs).set(representation, etag, **kwargs)
+
+    def get_etag(self, **kwargs) -> Optional[str]:
+        return self._shard(**kwargs).get_etag(**kwargs)
+
+    def get_encoded(
+        self, encoding: str, **kwargs
+    ) -> tuple[Optional[bytes], Optional[str]]:
+        return self._shard(**kwargs).get_encoded(encoding, **kwargs)
+
+    def set_encoded(self, encoding: str, body: bytes, etag: str, **kwargs):
+        return self._shard(**kwargs).set_encoded(encoding, body, etag, **kwargs)
+
+    def delete(self, **kwargs):
+        return self._shard(**kwargs).delete(**kwargs)
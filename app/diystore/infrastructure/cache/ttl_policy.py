@@ -0,0 +1,84 @@
+from threading import Lock
+from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class _KeyStats:
+    etag: Optional[str]
+    ttl: int
+    hits: int = 0
+
+
+class TTLPolicy:
+    """TTLs of the cached representations: the one of their controller method,
+    or ``default``. When ``adaptive``, the TTL of each key is then doubled
+    every time it's recomputed unchanged, if it was hit at least ``min_hits``
+    times meanwhile, and halved every time it changed, within ``min_ttl`` and
+    ``max_ttl``: stable content is kept long, churning content is not.
+
+    The statistics are the ones of the worker, on its ``max_keys`` most
+    recently recomputed keys."""
+
+    def __init__(
+        self,
+        default: int,
+        methods: dict[str, int] = None,
+        adaptive: bool = False,
+        min_ttl: int = 10,
+        max_ttl: int = 3600,
+        min_hits: int = 1,
+        max_keys: int = 10000,
+    ):
+        self._default = default
+        self._methods = methods or {}
+        self._adaptive = adaptive
+        self._min_ttl = min_ttl
+        self._max_ttl = max_ttl
+        self._min_hits = min_hits
+        self._max_keys = max_keys
+        self._stats: OrderedDict[str, _KeyStats] = OrderedDict()
+        self._lock = Lock()
+
+    def base_ttl(self, fname: Optional[str]) -> int:
+        return self._methods.get(fname, self._default)
+
+    def record_hit(self, key: str):
+        if not self._adaptive:
+            return
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.hits += 1
+
+    def current_ttl(self, key: str, fname: Optional[str]) -> int:
+        """TTL of the variants of a representation, e.g. compressed."""
+        stats = self._stats.get(key) if self._adaptive else None
+        return self.base_ttl(fname) if stats is None else stats.ttl
+
+    def ttl(self, key: str, fname: Optional[str], etag: Optional[str]) -> int:
+        """TTL of a representation (re)computed, of ETag ``etag``."""
+        if not self._adaptive:
+            return self.base_ttl(fname)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _KeyStats(etag, self.base_ttl(fname))
+                while len(self._stats) > self._max_keys:
+                    self._stats.popitem(last=False)
+                return stats.ttl
+            self._stats.move_to_end(key)
+            if etag is None or stats.etag is None:
+                pass
+            elif etag != stats.etag:
+                stats.ttl = max(stats.ttl // 2, self._min_ttl)
+            elif stats.hits >= self._min_hits:
+                stats.ttl = min(stats.ttl * 2, self._max_ttl)
+            stats.etag, stats.hits = etag, 0
+            return stats.ttl
+
+    def ttls(self) -> dict[str, int]:
+        """TTLs of the keys the worker keeps statistics of."""
+        with self._lock:
+            return {k: s.ttl for k, s in self._stats.items()}
@@ -1,2 +1,8 @@
 from .product import ProductController
-from .exceptions import InvalidProductID
\ No newline at end of file
+from .exceptions import InvalidProductID
+from .conditional import start_conditional_request
+from .conditional import stop_conditional_request
+from .compression import ENCODINGS
+from .compression import start_content_coding
+from .compression import stop_content_coding
+from .compression import get_content_coding
@@ -0,0 +1,85 @@
+import gzip
+from contextvars import ContextVar
+from contextvars import Token
+from dataclasses import dataclass
+from typing import Callable
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+_compressors: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda data: gzip.compress(data, compresslevel=6, mtime=0),
+}
+if brotli is not None:
+    _compressors["br"] = lambda data: brotli.compress(
+        data, mode=brotli.MODE_TEXT, quality=5
+    )
+
+# by order of preference, brotli being the smaller and the faster to decode
+ENCODINGS: tuple[str, ...] = tuple(e for e in ("br", "gzip") if e in _compressors)
+
+
+@dataclass
+class ContentCoding:
+    """Content coding negotiated for a request. ``etag`` is set when the
+    representation returned by the controller is compressed."""
+
+    encoding: str
+    min_size: int
+    etag: Optional[str] = None
+
+    @property
+    def applied(self) -> bool:
+        return self.etag is not None
+
+    def apply(self, etag: str):
+        self.etag = encoded_etag(etag, self.encoding)
+
+
+_content_coding: ContextVar[Optional[ContentCoding]] = ContextVar(
+    "content_coding", default=None
+)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return _compressors[encoding](data)
+
+
+# the cached bodies of an encoding start with a flag telling the compressed
+# ones from the representations too small to be compressed
+_COMPRESSED = b"\x01"
+_IDENTITY = b"\x00"
+
+
+def pack_body(body: bytes, compressed: bool) -> bytes:
+    """Flags a body to cache for an encoding as compressed or not."""
+    return (_COMPRESSED if compressed else _IDENTITY) + body
+
+
+def unpack_body(packed: bytes) -> tuple[bytes, bool]:
+    """Returns a body cached for an encoding and whether it's compressed."""
+    return packed[1:], packed[:1] == _COMPRESSED
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the compressed variant of a representation, which must differ
+    from the one of the representation."""
+    return f"{etag}-{encoding}"
+
+
+def start_content_coding(encoding: str, min_size: int = 0) -> Token:
+    """Makes the cached methods of the controllers return the representations
+    of at least ``min_size`` bytes compressed with ``encoding``."""
+    return _content_coding.set(ContentCoding(encoding, min_size))
+
+
+def stop_content_coding(token: Token):
+    _content_coding.reset(token)
+
+
+def get_content_coding() -> Optional[ContentCoding]:
+    return _content_coding.get()
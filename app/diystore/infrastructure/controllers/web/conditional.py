@@ -0,0 +1,30 @@
+from hashlib import sha1
+from contextvars import ContextVar
+from contextvars import Token
+from typing import Iterable
+
+
+_if_none_match: ContextVar[frozenset[str]] = ContextVar(
+    "if_none_match", default=frozenset()
+)
+
+
+def generate_etag(representation: str) -> str:
+    """Content hash of a representation, the same as the one computed by
+    Werkzeug for a response with the representation as its body."""
+    return sha1(representation.encode()).hexdigest()
+
+
+def start_conditional_request(if_none_match: Iterable[str]) -> Token:
+    """Makes the cached methods of the controllers raise NotModified, instead
+    of returning the representation, when its ETag is one of
+    ``if_none_match``."""
+    return _if_none_match.set(frozenset(if_none_match))
+
+
+def stop_conditional_request(token: Token):
+    _if_none_match.reset(token)
+
+
+def get_if_none_match() -> frozenset[str]:
+    return _if_none_match.get()
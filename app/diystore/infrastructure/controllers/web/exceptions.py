@@ -127,3 +127,14 @@ class ReviewNotFound(NotFound):
     def __init__(self, msg=None, _id=None):
         self.msg = msg or self.default_msg.format(_id=_id if _id else "")
         super().__init__(self.msg)
+
+
+# 304 Not Modified
+class NotModified(Exception):
+    """The representation matches an ETag of the request's If-None-Match."""
+
+    code = 304
+
+    def __init__(self, etag: str):
+        self.etag = etag
+        super().__init__(etag)
@@ -1,8 +1,9 @@
 from factory import Factory
 from factory import LazyAttribute
+from factory import LazyFunction
 
 from . import ProductController
-from ...main import create_ioc_container
+from ...main import get_ioc_container
 from ...cache.interfaces.cache_interface import Cache
 from ....application.usecases.product import ProductRepository
 
@@ -12,8 +13,12 @@ class ProductControllerFactory(Factory):
         model = ProductController
 
     class Params:
-        ioc = create_ioc_container()
+        # built with the controller, so that importing the factory does not
+        # read the settings
+        ioc = LazyFunction(get_ioc_container)
 
     repo = LazyAttribute(lambda pc: pc.ioc.provide(ProductRepository))
     cache = LazyAttribute(lambda pc: pc.ioc.provide(Cache))
     presenter = LazyAttribute(lambda pc: pc.ioc.provide_function("presenter"))
+    # API_METRICS, which the repository follows as well
+    metrics = LazyAttribute(lambda pc: getattr(pc.repo, "metrics", True))
@@ -1,4 +1,6 @@
 from typing import Callable
+from typing import Optional
+from typing import Union
 from functools import wraps
 
 from pydantic import ValidationError
@@ -14,7 +16,18 @@ from .exceptions import ReviewNotFound
 from .exceptions import TopCategoryNotFound
 from .exceptions import MidCategoryNotFound
 from .exceptions import TerminalCategoryNotFound
+from .exceptions import NotModified
+from .conditional import generate_etag
+from .conditional import get_if_none_match
+from .compression import ContentCoding
+from .compression import compress
+from .compression import encoded_etag
+from .compression import get_content_coding
+from .compression import pack_body
+from .compression import unpack_body
 from ...cache.interfaces import Cache
+from ...instrumentation import timer
+from ...instrumentation import CACHE_LOOKUPS
 from ....application.dto import DTO
 from ....application.usecases.product import ProductRepository
 from ....application.usecases.product import get_product_use_case
@@ -45,27 +58,130 @@ from ....application.usecases.product import get_reviews
 
 
 class ProductController:
-    def __init__(self, repo: ProductRepository, cache: Cache, presenter: Callable):
+    def __init__(
+        self,
+        repo: ProductRepository,
+        cache: Cache,
+        presenter: Callable,
+        metrics: bool = True,
+    ):
         self._repo = repo
         self._cache_repo = cache
         self._presenter = presenter
+        # disabled, the cache lookups are not counted
+        self._metrics = metrics
+
+    def dispose(self, close: bool = True):
+        """Drops the connections of the repository and the cache, the ones
+        that hold any."""
+        for dependency in (self._repo, self._cache_repo):
+            dispose = getattr(dependency, "dispose", None)
+            if dispose is not None:
+                dispose(close=close)
 
     @staticmethod
     def _cache(f):
         @wraps(f)
         def wrapper(self: "ProductController", **kwargs):
             args = dict(cname=type(self).__name__, fname=f.__name__, **kwargs)
-            cached_repr = self._cache_repo.get(**args)
+            coding = get_content_coding()
+            try:
+                with timer("cache"):
+                    # the ETag alone answers conditional requests, sparing
+                    # the body when it did not change
+                    etag = self._find_unmodified_etag(args, coding)
+                    if etag is None:
+                        cached_repr = self._get_cached(args, coding)
+            except Exception:
+                self._count_lookup(f.__name__, "error")
+                raise
+            if etag is not None:
+                self._count_lookup(f.__name__, "hit")
+                raise NotModified(etag)
             if cached_repr is None:
+                self._count_lookup(f.__name__, "miss")
                 new_repr = f(self, **kwargs)
-                self._cache_repo.set(new_repr, **args)
-                return new_repr
+                etag = generate_etag(new_repr)
+                with timer("cache"):
+                    self._cache_repo.set(new_repr, etag=etag, **args)
+                return self._encode(new_repr, etag, args, coding)
+            self._count_lookup(f.__name__, "hit")
             return cached_repr
 
         return wrapper
 
+    def _count_lookup(self, method: str, result: str):
+        if self._metrics:
+            CACHE_LOOKUPS.labels(method, result).inc()
+
+    def _find_unmodified_etag(
+        self, args: dict, coding: Optional[ContentCoding]
+    ) -> Optional[str]:
+        if_none_match = get_if_none_match()
+        if not if_none_match:
+            return None
+        etag = self._cache_repo.get_etag(**args)
+        if etag is None:
+            return None
+        if etag in if_none_match:
+            return etag
+        if coding is not None and encoded_etag(etag, coding.encoding) in if_none_match:
+            return encoded_etag(etag, coding.encoding)
+        return None
+
+    def _get_cached(
+        self, args: dict, coding: Optional[ContentCoding]
+    ) -> Union[str, bytes, None]:
+        if coding is None:
+            return self._cache_repo.get(**args)
+        packed, etag = self._cache_repo.get_encoded(coding.encoding, **args)
+        if packed is not None:
+            body, compressed = unpack_body(packed)
+            if not compressed:
+                return body.decode()
+            coding.apply(etag)
+            return body
+        # not encoded yet, the ETag being hashed anew once per encoding
+        cached_repr = self._cache_repo.get(**args)
+        if cached_repr is None:
+            return None
+        return self._encode(cached_repr, generate_etag(cached_repr), args, coding)
+
+    def _encode(
+        self,
+        representation: str,
+        etag: str,
+        args: dict,
+        coding: Optional[ContentCoding],
+    ) -> Union[str, bytes]:
+        """Compresses the representation with the negotiated coding, if it's
+        large enough, and caches the result. A smaller one is cached as is for
+        the coding, so that it's found in a single lookup."""
+        if coding is None:
+            return representation
+        data = representation.encode()
+        if len(data) < coding.min_size:
+            with timer("cache"):
+                self._cache_repo.set_encoded(
+                    coding.encoding, pack_body(data, False), etag, **args
+                )
+            return representation
+        with timer("compression"):
+            body = compress(data, coding.encoding)
+        with timer("cache"):
+            self._cache_repo.set_encoded(
+                coding.encoding, pack_body(body, True), etag, **args
+            )
+        coding.apply(etag)
+        return body
+
+    def _execute(self, use_case: Callable, *args) -> Optional[DTO]:
+        with timer("usecase"):
+            return use_case(*args, self._repo)
+
     def _generate_representation(self, output_dto: DTO) -> str:
-        return self._presenter(output_dto)
+        with timer("presenter"):
+            return self._presenter(output_dto)
 
     @_cache
     def get_one(self, *, product_id: str) -> str:
@@ -73,7 +189,7 @@ class ProductController:
             input_dto = GetProductInputDTO(product_id=product_id)
         except ValidationError:
             raise InvalidProductID(_id=product_id)
-        output_dto = get_product_use_case(input_dto, self._repo)
+        output_dto = self._execute(get_product_use_case, input_dto)
         if output_dto is None:
             raise ProductNotFound(_id=product_id)
         return self._generate_representation(output_dto)
@@ -156,7 +272,7 @@ class ProductController:
             order_type,
             with_discounts_only,
         )
-        output_dto = get_products_use_case(input_dto, self._repo)
+        output_dto = self._execute(get_products_use_case, input_dto)
         return self._generate_representation(output_dto)
 
     @_cache
@@ -165,14 +281,14 @@ class ProductController:
             input_dto = GetTopLevelCategoryInputDTO(category_id=category_id)
         except ValidationError:
             raise InvalidCategoryID(_id=category_id)
-        output_dto = get_top_level_category(input_dto, self._repo)
+        output_dto = self._execute(get_top_level_category, input_dto)
         if output_dto is None:
             raise TopCategoryNotFound(_id=category_id)
         return self._generate_representation(output_dto)
 
     @_cache
     def get_top_categories(self) -> str:
-        output_dto = get_top_level_categories(self._repo)
+        output_dto = self._execute(get_top_level_categories)
         return self._generate_representation(output_dto)
 
     @_cache
@@ -181,7 +297,7 @@ class ProductController:
             input_dto = GetMidLevelCategoryInputDTO(category_id=category_id)
         except ValidationError:
             raise InvalidCategoryID(_id=category_id)
-        output_dto = get_mid_level_category(input_dto, self._repo)
+        output_dto = self._execute(get_mid_level_category, input_dto)
         if output_dto is None:
             raise MidCategoryNotFound(_id=category_id)
         return self._generate_representation(output_dto)
@@ -192,7 +308,7 @@ class ProductController:
             input_dto = GetMidLevelCategoriesInputDTO(parent_id=parent_id)
         except ValidationError:
             raise InvalidCategoryID(_id=parent_id)
-        output_dto = get_mid_level_categories(input_dto, self._repo)
+        output_dto = self._execute(get_mid_level_categories, input_dto)
         if output_dto is None:
             raise TopCategoryNotFound(_id=parent_id)
         return self._generate_representation(output_dto)
@@ -203,7 +319,7 @@ class ProductController:
             input_dto = GetTerminalLevelCategoryInputDTO(category_id=category_id)
         except ValidationError:
             raise InvalidCategoryID(_id=category_id)
-        output_dto = get_terminal_level_category(input_dto, self._repo)
+        output_dto = self._execute(get_terminal_level_category, input_dto)
         if output_dto is None:
             raise TerminalCategoryNotFound(_id=category_id)
         return self._generate_representation(output_dto)
@@ -214,7 +330,7 @@ class ProductController:
             input_dto = GetTerminalLevelCategoriesInputDTO(parent_id=parent_id)
         except ValidationError:
             raise InvalidCategoryID(_id=parent_id)
-        output_dto = get_terminal_level_categories(input_dto, self._repo)
+        output_dto = self._execute(get_terminal_level_categories, input_dto)
         if output_dto is None:
             raise MidCategoryNotFound(_id=parent_id)
         return self._generate_representation(output_dto)
@@ -225,14 +341,14 @@ class ProductController:
             input_dto = GetProductVendorInputDTO(vendor_id=vendor_id)
         except ValidationError:
             raise InvalidVendorID(_id=vendor_id)
-        output_dto = get_vendor(input_dto, self._repo)
+        output_dto = self._execute(get_vendor, input_dto)
         if output_dto is None:
             raise VendorNotFound(_id=vendor_id)
         return self._generate_representation(output_dto)
 
     @_cache
     def get_vendors(self) -> str:
-        output_dto = get_vendors(self._repo)
+        output_dto = self._execute(get_vendors)
         return self._generate_representation(output_dto)
 
     @_cache
@@ -241,18 +357,25 @@ class ProductController:
             input_dto = GetProductReviewInputDTO(review_id=review_id)
         except ValidationError:
             raise InvalidReviewID(_id=review_id)
-        output_dto = get_review(input_dto, self._repo)
+        output_dto = self._execute(get_review, input_dto)
         if output_dto is None:
             raise ReviewNotFound(_id=review_id)
         return self._generate_representation(output_dto)
 
     @_cache
-    def get_reviews(self, *, product_id: str) -> str:
+    def get_reviews(
+        self, *, product_id: str, limit: int = 20, cursor: str = None
+    ) -> str:
         try:
-            input_dto = GetProductReviewsInputDTO(product_id=product_id)
-        except ValidationError:
-            raise InvalidProductID(_id=product_id)
-        output_dto = get_reviews(input_dto, self._repo)
+            input_dto = GetProductReviewsInputDTO(
+                product_id=product_id, limit=limit, cursor=cursor
+            )
+        except ValidationError as e:
+            parameter = e.errors()[0].get("loc")[0]
+            if parameter == "product_id":
+                raise InvalidProductID(_id=product_id)
+            raise InvalidQueryArgument(parameter=parameter)
+        output_dto = self._execute(get_reviews, input_dto)
         if output_dto is None:
             raise ProductNotFound(_id=product_id)
         return self._generate_representation(output_dto)
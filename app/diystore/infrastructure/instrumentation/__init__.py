@@ -0,0 +1,16 @@
+from .timings import Timings
+from .timings import timer
+from .timings import timed
+from .timings import start_timings
+from .timings import stop_timings
+from .timings import get_timings
+from .metrics import HTTP_REQUESTS
+from .metrics import HTTP_REQUEST_DURATION
+from .metrics import HTTP_RESPONSE_SIZE
+from .metrics import CACHE_LOOKUPS
+from .metrics import DB_POOL_CHECKOUT_DURATION
+from .metrics import instrument_engine
+from .metrics import generate_metrics
+from .operations import DBOperation
+from .operations import db_operation
+from .operations import get_db_operation
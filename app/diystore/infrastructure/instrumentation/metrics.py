@@ -0,0 +1,88 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+
+from .operations import get_db_operation
+
+
+# When PROMETHEUS_MULTIPROC_DIR is set, e.g. by gunicorn.conf.py, the values
+# are kept in memory-mapped files in that directory, so that the metrics of
+# every worker are aggregated by the one answering the scrape.
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+HTTP_REQUESTS = Counter(
+    "diystore_http_requests_total",
+    "Requests handled, by route and status.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "diystore_http_request_duration_seconds",
+    "Time taken to handle requests, by route.",
+    ("method", "route"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "diystore_http_response_size_bytes",
+    "Size of the response payloads, by route.",
+    ("method", "route"),
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+CACHE_LOOKUPS = Counter(
+    "diystore_cache_lookups_total",
+    "Representation cache lookups, by controller method and result "
+    "(hit, miss or error).",
+    ("method", "result"),
+)
+DB_QUERIES = Counter(
+    "diystore_db_queries_total",
+    "Statements sent to the database, by repository method.",
+    ("method",),
+)
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    "diystore_db_pool_checkout_duration_seconds",
+    "Time waited for a connection from the pool.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "diystore_db_pool_connections",
+    "Connections opened by the pools.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "diystore_db_pool_checked_out_connections",
+    "Connections of the pools currently in use.",
+    multiprocess_mode="livesum",
+)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    operation = get_db_operation()
+    DB_QUERIES.labels(operation.name if operation is not None else "other").inc()
+
+
+def instrument_engine(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _count_query)
+    event.listen(engine.pool, "connect", lambda *_: DB_POOL_CONNECTIONS.inc())
+    event.listen(engine.pool, "close", lambda *_: DB_POOL_CONNECTIONS.dec())
+    event.listen(engine.pool, "checkout", lambda *_: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine.pool, "checkin", lambda *_: DB_POOL_CHECKED_OUT.dec())
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """Returns the metrics in the Prometheus text format and its content
+    type."""
+    if os.getenv(MULTIPROCESS_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
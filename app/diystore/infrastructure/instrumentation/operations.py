@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class DBOperation:
+    """A call of a repository method, to which the statements executed
+    during the call are attributed."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+_db_operation: ContextVar[Optional[DBOperation]] = ContextVar(
+    "db_operation", default=None
+)
+
+
+@contextmanager
+def db_operation(name: str):
+    token = _db_operation.set(DBOperation(name))
+    try:
+        yield
+    finally:
+        _db_operation.reset(token)
+
+
+def get_db_operation() -> Optional[DBOperation]:
+    return _db_operation.get()
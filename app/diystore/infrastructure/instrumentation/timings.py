@@ -0,0 +1,122 @@
+from time import perf_counter
+from functools import wraps
+from contextlib import nullcontext
+from contextvars import ContextVar
+from contextvars import Token
+from dataclasses import dataclass
+from typing import Callable
+from typing import Optional
+
+
+@dataclass
+class Timing:
+    duration: float = 0
+    count: int = 0
+
+
+class _Measurement:
+    def __init__(self, timings: "Timings", name: str):
+        self._timings = timings
+        self._name = name
+
+    def __enter__(self):
+        self._timings._stack.append(0)
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = perf_counter() - self._start
+        children_duration = self._timings._stack.pop()
+        if self._timings._stack:
+            self._timings._stack[-1] += duration
+        self._timings._add(self._name, duration - children_duration)
+
+
+class Timings:
+    """Time spent on each layer while handling a request.
+
+    Measurements can be nested, and each layer only accounts for the time not
+    spent on the layers nested in it, e.g. the time of a use case does not
+    include the time spent on the repository it calls.
+    """
+
+    def __init__(self):
+        self._timings: dict[str, Timing] = {}
+        self._stack: list[float] = []
+        self._start = perf_counter()
+
+    def _add(self, name: str, duration: float):
+        timing = self._timings.setdefault(name, Timing())
+        timing.duration += duration
+        timing.count += 1
+
+    def measure(self, name: str) -> _Measurement:
+        return _Measurement(self, name)
+
+    @property
+    def total(self) -> float:
+        return perf_counter() - self._start
+
+    def items(self):
+        return self._timings.items()
+
+    def generate_server_timing_header(self) -> str:
+        metrics = [
+            f'{name};dur={t.duration * 1000:.2f};desc="{t.count} calls"'
+            for name, t in self._timings.items()
+        ]
+        metrics.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> dict:
+        return dict(
+            total_ms=round(self.total * 1000, 2),
+            timings={
+                name: dict(ms=round(t.duration * 1000, 2), count=t.count)
+                for name, t in self._timings.items()
+            },
+        )
+
+
+_timings: ContextVar[Optional[Timings]] = ContextVar("timings", default=None)
+
+# reusable, so that no object is created when timings are off
+_null_timer = nullcontext()
+
+
+def start_timings() -> Token:
+    return _timings.set(Timings())
+
+
+def stop_timings(token: Token) -> Optional[Timings]:
+    timings = _timings.get()
+    _timings.reset(token)
+    return timings
+
+
+def get_timings() -> Optional[Timings]:
+    return _timings.get()
+
+
+def timer(name: str):
+    """Measures the enclosed block if timings were started in the current
+    context, doing nothing otherwise."""
+    timings = _timings.get()
+    if timings is None:
+        return _null_timer
+    return timings.measure(name)
+
+
+def timed(name: str):
+    def decorator(f: Callable):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            timings = _timings.get()
+            if timings is None:
+                return f(*args, **kwargs)
+            with timings.measure(name):
+                return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,2 +1,5 @@
 from .ioc import IoCContainer
+from .ioc import Lifetime
 from .ioc_factory import create_ioc_container
+from .ioc_factory import get_ioc_container
+from .ioc_factory import shutdown_ioc_container
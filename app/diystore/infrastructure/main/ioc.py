@@ -1,21 +1,126 @@
 from abc import ABC
+from enum import IntEnum
 from typing import Callable
+from threading import Lock
+from contextlib import contextmanager
+from contextvars import ContextVar
+from contextvars import Token
+
+
+class Lifetime(IntEnum):
+    # built once, and shared by the whole process
+    SINGLETON = 1
+    # built once per scope, e.g. per request, and disposed with it
+    SCOPED = 2
+    # built on every call to provide
+    TRANSIENT = 3
+
+
+class _Binding:
+    def __init__(self, implementation: Callable, lifetime: Lifetime, kwargs: dict):
+        self.implementation = implementation
+        self.lifetime = lifetime
+        self.kwargs = kwargs
+        self.instance = None
+        self.lock = Lock()
+
+    def create(self) -> object:
+        return self.implementation(**self.kwargs)
+
+
+def _dispose(instance: object, close: bool = True):
+    dispose = getattr(instance, "dispose", None)
+    if dispose is not None:
+        dispose(close=close)
 
 
 class IoCContainer:
+    """Binds interfaces to the implementations the infrastructure provides.
+    The implementations are built on the first call to ``provide``, not on
+    registration, so that a container can be created without connecting to
+    anything."""
+
     def __init__(self):
-        self._class_bindings = {}
+        self._class_bindings: dict[ABC, _Binding] = {}
         self._function_bindings = {}
+        self._shutdown_hooks: list[Callable] = []
+        self._scope: ContextVar[dict] = ContextVar(f"ioc_scope_{id(self)}")
 
-    def register(self, interface: ABC, implementation: object, **kwargs: dict):
-        self._class_bindings[interface] = (implementation, kwargs)
+    def register(
+        self,
+        interface: ABC,
+        implementation: Callable,
+        lifetime: Lifetime = Lifetime.TRANSIENT,
+        **kwargs: dict,
+    ):
+        self._class_bindings[interface] = _Binding(implementation, lifetime, kwargs)
 
     def provide(self, interface: ABC) -> object:
-        implementation, kwargs = self._class_bindings[interface]
-        return implementation(**kwargs)
+        binding = self._class_bindings[interface]
+        if binding.lifetime == Lifetime.SINGLETON:
+            return self._provide_singleton(binding)
+        if binding.lifetime == Lifetime.SCOPED:
+            return self._provide_scoped(interface, binding)
+        return binding.create()
+
+    def _provide_singleton(self, binding: _Binding) -> object:
+        if binding.instance is None:
+            # concurrent first requests would otherwise build as many engines
+            # and pools as there are threads
+            with binding.lock:
+                if binding.instance is None:
+                    binding.instance = binding.create()
+        return binding.instance
+
+    def _provide_scoped(self, interface: ABC, binding: _Binding) -> object:
+        instances = self._scope.get(None)
+        if instances is None:
+            raise LookupError(f"{interface.__name__} provided outside of any scope")
+        if interface not in instances:
+            instances[interface] = binding.create()
+        return instances[interface]
 
     def register_function(self, _type: str, _function: Callable):
         self._function_bindings[_type] = _function
 
     def provide_function(self, _type: str) -> Callable:
         return self._function_bindings[_type]
+
+    def start_scope(self) -> Token:
+        return self._scope.set({})
+
+    def stop_scope(self, token: Token):
+        """Disposes the instances built in the scope, and leaves it."""
+        instances = self._scope.get()
+        self._scope.reset(token)
+        for instance in reversed(instances.values()):
+            _dispose(instance)
+
+    @contextmanager
+    def scope(self):
+        token = self.start_scope()
+        try:
+            yield self
+        finally:
+            self.stop_scope(token)
+
+    def on_shutdown(self, hook: Callable):
+        self._shutdown_hooks.append(hook)
+
+    def dispose(self, close: bool = True):
+        """Drops the connections of the singletons built so far, which keep
+        being provided. A forked process drops the ones it inherited with
+        ``close=False``."""
+        for binding in self._class_bindings.values():
+            if binding.instance is not None:
+                _dispose(binding.instance, close=close)
+
+    def shutdown(self):
+        """Disposes the singletons built so far, and runs the shutdown hooks,
+        the last registered first. The singletons are built anew if provided
+        again."""
+        self.dispose()
+        for binding in self._class_bindings.values():
+            binding.instance = None
+        while self._shutdown_hooks:
+            self._shutdown_hooks.pop()()
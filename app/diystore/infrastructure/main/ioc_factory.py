@@ -1,11 +1,24 @@
+import os
 import re
+from tempfile import gettempdir
+from threading import Lock
+from typing import Callable
 
+from pydantic import RedisDsn
 from sqlalchemy.dialects import __all__ as supported_sqla_dialects
 
 from .settings import InfraSettings
 from .ioc import IoCContainer
+from .ioc import Lifetime
 from ..cache.interfaces import Cache
 from ..cache.redis_cache import RedisRepresentationCache
+from ..cache.sharded_cache import ShardedRepresentationCache
+from ..cache.local_cache import MemoryRepresentationCache
+from ..cache.local_cache import SharedMemoryRepresentationCache
+from ..cache.local_cache import SQLiteRepresentationCache
+from ..cache.ttl_policy import TTLPolicy
+from ..cache.hot_key_cache import HotKeyCache
+from ..cache.hot_key_cache import HotKeyTracker
 from ..controllers.presenters import generate_json_presentation
 from ..repositories.sqlrepository import SQLProductRepository
 from ...application.usecases.product import ProductRepository
@@ -29,30 +42,131 @@ def _setup_repos(ioc: IoCContainer, settings: InfraSettings):
         ioc.register(
             ProductRepository,
             SQLProductRepository,
+            lifetime=Lifetime.SINGLETON,
             scheme=db_url.scheme,
             host=db_url.host,
             port=db_url.port,
             user=db_url.user,
             password=db_url.password,
             dbname=db_url.path.strip("/"),
-            echo=settings.repo.echo
+            echo=settings.repo.echo,
+            pool_size=settings.repo.pool_size,
+            max_overflow=settings.repo.max_overflow,
+            listings=settings.repo.listings,
+            listings_refresh_interval=settings.repo.listings_refresh_interval,
+            listings_rebuild_interval=settings.repo.listings_rebuild_interval,
+            metrics=settings.repo.metrics,
         )
         return
     raise ValueError(f"unknown url scheme {db_url.scheme}")
 
 
+def _redis_node(redis_url: RedisDsn) -> dict:
+    return dict(
+        host=redis_url.host,
+        port=redis_url.port,
+        password=redis_url.password,
+        db=redis_url.path.strip("/"),
+        ssl=redis_url.scheme == "rediss",
+    )
+
+
+def _local_cache_path(settings: InfraSettings, filename: str) -> str:
+    if settings.cache.local_path is not None:
+        return settings.cache.local_path
+    shm = "/dev/shm"
+    return os.path.join(shm if os.path.isdir(shm) else gettempdir(), filename)
+
+
+def _ttl_policy(settings: InfraSettings) -> TTLPolicy:
+    return TTLPolicy(
+        settings.cache.redis_ttl,
+        methods=settings.cache.ttl_by_method,
+        adaptive=settings.cache.adaptive_ttl,
+        min_ttl=settings.cache.ttl_min,
+        max_ttl=settings.cache.ttl_max,
+    )
+
+
+def _register_cache(
+    ioc: IoCContainer, settings: InfraSettings, implementation: Callable, **kwargs
+):
+    if not settings.cache.hot_keys:
+        ioc.register(Cache, implementation, lifetime=Lifetime.SINGLETON, **kwargs)
+        return
+
+    def create_hot_key_cache() -> HotKeyCache:
+        tracker = HotKeyTracker(
+            threshold=settings.cache.hot_key_threshold,
+            window=settings.cache.hot_key_window,
+            max_hot=settings.cache.hot_key_max,
+        )
+        return HotKeyCache(
+            implementation(**kwargs), tracker, local_ttl=settings.cache.hot_key_ttl
+        )
+
+    ioc.register(Cache, create_hot_key_cache, lifetime=Lifetime.SINGLETON)
+
+
+def _setup_local_caches(ioc: IoCContainer, settings: InfraSettings):
+    backend = settings.cache.backend
+    if backend == "memory":
+        _register_cache(
+            ioc,
+            settings,
+            MemoryRepresentationCache,
+            ttl_policy=_ttl_policy(settings),
+            max_entries=settings.cache.local_max_entries,
+        )
+    elif backend == "shared_memory":
+        _register_cache(
+            ioc,
+            settings,
+            SharedMemoryRepresentationCache,
+            path=_local_cache_path(settings, "diystore-cache"),
+            ttl_policy=_ttl_policy(settings),
+            slots=settings.cache.shared_memory_slots,
+            slot_size=settings.cache.shared_memory_slot_size,
+        )
+    elif backend == "sqlite":
+        _register_cache(
+            ioc,
+            settings,
+            SQLiteRepresentationCache,
+            path=_local_cache_path(settings, "diystore-cache.sqlite"),
+            ttl_policy=_ttl_policy(settings),
+        )
+    else:
+        raise ValueError(f"unknown cache backend {backend}")
+
+
 def _setup_caches(ioc: IoCContainer, settings: InfraSettings):
+    if settings.cache.backend != "redis":
+        return _setup_local_caches(ioc, settings)
+    options = dict(
+        ttl_policy=_ttl_policy(settings),
+        client_tracking=settings.cache.redis_client_tracking,
+        client_tracking_max_entries=settings.cache.redis_client_tracking_max_entries,
+    )
+    shard_urls = settings.cache.redis_shard_urls
+    if shard_urls:
+        _register_cache(
+            ioc,
+            settings,
+            ShardedRepresentationCache.from_redis_nodes,
+            nodes=[_redis_node(url) for url in shard_urls],
+            vnodes=settings.cache.redis_shard_vnodes,
+            **options,
+        )
+        return
     redis_url = settings.cache.redis_url
     if redis_url is not None:
-        ioc.register(
-            Cache,
+        _register_cache(
+            ioc,
+            settings,
             RedisRepresentationCache,
-            host=redis_url.host,
-            port=redis_url.port,
-            password=redis_url.password,
-            db=redis_url.path.strip("/"),
-            ttl=settings.cache.redis_ttl,
-            ssl=redis_url.scheme == "rediss",
+            **_redis_node(redis_url),
+            **options,
         )
         return
     raise ValueError(f"no cache url configured")
@@ -66,9 +180,36 @@ def _setup_presenters(ioc: IoCContainer, settings: InfraSettings):
     raise ValueError(f"unknown representation type {rt}")
 
 
-def create_ioc_container(settings: InfraSettings = InfraSettings()):
+def create_ioc_container(settings: InfraSettings = None):
+    if settings is None:
+        settings = InfraSettings()
     ioc = IoCContainer()
     _setup_repos(ioc, settings)
     _setup_caches(ioc, settings)
     _setup_presenters(ioc, settings)
     return ioc
+
+
+# shared by the api and its commands, so that the process holds a single
+# engine and Redis client, whoever asks for them
+_ioc_container: IoCContainer = None
+_ioc_container_lock = Lock()
+
+
+def get_ioc_container() -> IoCContainer:
+    global _ioc_container
+    if _ioc_container is None:
+        with _ioc_container_lock:
+            if _ioc_container is None:
+                _ioc_container = create_ioc_container()
+    return _ioc_container
+
+
+def shutdown_ioc_container():
+    """Disposes the engines and pools of the process container, the next
+    call to get_ioc_container reading the settings anew."""
+    global _ioc_container
+    with _ioc_container_lock:
+        ioc, _ioc_container = _ioc_container, None
+    if ioc is not None:
+        ioc.shutdown()
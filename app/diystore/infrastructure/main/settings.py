@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseSettings
 from pydantic import Field
 from pydantic import AnyUrl
@@ -12,22 +14,94 @@ class Settings(BaseSettings):
 class RepositorySettings(Settings):
     url: AnyUrl = Field(env="database_url")
     echo: bool = Field(env="database_log_queries", default=False)
+    # the connections of a worker, which should cover its threads
+    pool_size: int = Field(env="database_pool_size", default=None)
+    max_overflow: int = Field(env="database_max_overflow", default=None)
+    # the ordered listings selected from an index of each category in memory,
+    # refreshed with the products updated every refresh interval
+    listings: bool = Field(env="database_listing_index", default=False)
+    listings_refresh_interval: float = Field(
+        env="database_listing_refresh_interval", default=1.0
+    )
+    # every category listed is also loaded anew every rebuild interval, for
+    # the changes the refreshes missed
+    listings_rebuild_interval: float = Field(
+        env="database_listing_rebuild_interval", default=60.0
+    )
+    # the statement and pool metrics, disabled with the ones of the api
+    metrics: bool = Field(env="api_metrics", default=True)
 
 
 class CacheSettings(Settings):
+    # redis, or a cache local to the host with no server to run
+    backend: Literal["redis", "memory", "shared_memory", "sqlite"] = "redis"
     redis_url: RedisDsn = None
     redis_db: int = 0
+    # the TTL of every backend
     redis_ttl: int = 60
+    # a JSON object of the TTLs of some controller methods, e.g.
+    # {"get_top_categories": 600}
+    ttl_by_method: dict[str, int] = {}
+    # the TTL of each key doubled while it's hit and unchanged, halved when it
+    # changes, within ttl_min and ttl_max
+    adaptive_ttl: bool = False
+    ttl_min: int = 10
+    ttl_max: int = 3600
+    # local copies of the hottest keys, invalidated by Redis when they change
+    redis_client_tracking: bool = False
+    redis_client_tracking_max_entries: int = 4096
+    # a JSON list of the urls of the nodes the keys are sharded over, in
+    # place of redis_url
+    redis_shard_urls: list[RedisDsn] = []
+    redis_shard_vnodes: int = 160
+    # the entries of the memory backend, by worker
+    local_max_entries: int = 4096
+    # the file of the shared_memory and sqlite backends, in /dev/shm or the
+    # temporary directory by default
+    local_path: str = None
+    shared_memory_slots: int = 1024
+    # the values larger than a slot (with their key and a 32 bytes header),
+    # like the listings of many products, are kept in overflow files next to
+    # the table, which cost a file read per hit
+    shared_memory_slot_size: int = 65536
+    # local copies, for hot_key_ttl seconds, of the keys read about
+    # hot_key_threshold times by hot_key_window reads of the worker
+    hot_keys: bool = False
+    hot_key_threshold: int = 100
+    hot_key_window: int = 10000
+    hot_key_max: int = 32
+    hot_key_ttl: float = 1
 
     class Config:
         fields = {
+            "backend": {"env": ("cache_backend",)},
             "redis_url": {"env": ("redis_tls_url", "redis_url")},
             "redis_db": {"env": ("redis_db",)},
             "redis_ttl": {"env": ("redis_ttl",)},
+            "ttl_by_method": {"env": ("cache_ttl_by_method",)},
+            "adaptive_ttl": {"env": ("cache_adaptive_ttl",)},
+            "ttl_min": {"env": ("cache_ttl_min",)},
+            "ttl_max": {"env": ("cache_ttl_max",)},
+            "redis_client_tracking": {"env": ("redis_client_tracking",)},
+            "redis_client_tracking_max_entries": {
+                "env": ("redis_client_tracking_max_entries",)
+            },
+            "redis_shard_urls": {"env": ("redis_shard_urls",)},
+            "redis_shard_vnodes": {"env": ("redis_shard_vnodes",)},
+            "local_max_entries": {"env": ("cache_max_entries",)},
+            "local_path": {"env": ("cache_path",)},
+            "shared_memory_slots": {"env": ("cache_slots",)},
+            "shared_memory_slot_size": {"env": ("cache_slot_size",)},
+            "hot_keys": {"env": ("cache_hot_keys",)},
+            "hot_key_threshold": {"env": ("cache_hot_key_threshold",)},
+            "hot_key_window": {"env": ("cache_hot_key_window",)},
+            "hot_key_max": {"env": ("cache_hot_key_max",)},
+            "hot_key_ttl": {"env": ("cache_hot_key_ttl",)},
         }
 
 
 class InfraSettings(Settings):
-    repo: RepositorySettings = RepositorySettings()
-    cache: CacheSettings = CacheSettings()
+    # read when the settings are, not on import
+    repo: RepositorySettings = Field(default_factory=RepositorySettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
     representation_type: str = "json"
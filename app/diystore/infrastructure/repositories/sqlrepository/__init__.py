@@ -8,3 +8,5 @@ from .models.vendor import ProductVendorOrmModel
 from .models.product import ProductOrmModel
 from .models import Base
 from .repository import SQLProductRepository
+from .profiler import QueryProfiler
+from .profiler import QueryBudgetExceeded
@@ -0,0 +1,250 @@
+import csv
+import json
+from uuid import UUID
+from datetime import datetime
+from datetime import timedelta
+from time import perf_counter
+from dataclasses import dataclass
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+
+from .models import tz
+from .models.vat import VatOrmModel
+from .models.discount import DiscountOrmModel
+from .models.vendor import ProductVendorOrmModel
+from .models.product import ProductOrmModel
+from .models.categories import TopLevelCategoryOrmModel
+from .models.categories import MidLevelCategoryOrmModel
+from .models.categories import TerminalCategoryOrmModel
+from .repository import SQLProductRepository
+
+
+@dataclass
+class ExportReport:
+    rows_exported: int = 0
+    watermark: Optional[datetime] = None
+    duration: float = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_exported / self.duration if self.duration else 0
+
+    def __str__(self):
+        watermark = self.watermark.isoformat() if self.watermark else None
+        return (
+            f"{self.rows_exported} rows exported in {self.duration:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s; watermark {watermark})"
+        )
+
+
+def _generate_export_query(
+    since: Optional[datetime] = None, overlap: timedelta = timedelta(0)
+):
+    product = ProductOrmModel
+    query = (
+        select(
+            product.id,
+            product.ean,
+            product.name,
+            product.description,
+            product.base_price,
+            product.final_price,
+            product.final_price_without_discount,
+            VatOrmModel.rate.label("vat_rate"),
+            DiscountOrmModel.rate.label("discount_rate"),
+            product.quantity,
+            product.height,
+            product.width,
+            product.length,
+            product.color,
+            product.material,
+            product.country_of_origin,
+            product.warranty,
+            product.rating,
+            product.review_count,
+            product.thumbnail_photo_url,
+            product.medium_size_photo_url,
+            product.large_size_photo_url,
+            product.creation_date,
+            product.updated_at,
+            ProductVendorOrmModel.id.label("vendor_id"),
+            ProductVendorOrmModel.name.label("vendor_name"),
+            TopLevelCategoryOrmModel.id.label("top_level_category_id"),
+            TopLevelCategoryOrmModel.name.label("top_level_category_name"),
+            MidLevelCategoryOrmModel.id.label("mid_level_category_id"),
+            MidLevelCategoryOrmModel.name.label("mid_level_category_name"),
+            TerminalCategoryOrmModel.id.label("terminal_category_id"),
+            TerminalCategoryOrmModel.name.label("terminal_category_name"),
+        )
+        .join(VatOrmModel, product.vat_id == VatOrmModel.id)
+        .outerjoin(DiscountOrmModel, product.discount_id == DiscountOrmModel.id)
+        .join(ProductVendorOrmModel, product.vendor_id == ProductVendorOrmModel.id)
+        .join(
+            TerminalCategoryOrmModel,
+            product.category_id == TerminalCategoryOrmModel.id,
+        )
+        .join(
+            MidLevelCategoryOrmModel,
+            TerminalCategoryOrmModel.parent_id == MidLevelCategoryOrmModel.id,
+        )
+        .join(
+            TopLevelCategoryOrmModel,
+            MidLevelCategoryOrmModel.parent_id == TopLevelCategoryOrmModel.id,
+        )
+    )
+    if since is not None:
+        query = query.where(product.updated_at > tz.convert(since) - overlap)
+    return query
+
+
+def _to_str(value) -> Optional[str]:
+    return str(value) if value is not None else None
+
+
+def _to_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    return tz.convert(value) if value is not None else None
+
+
+def _to_isoformat(value: Optional[datetime]) -> Optional[str]:
+    return _to_datetime(value).isoformat() if value is not None else None
+
+
+def product_row_to_record(row: Row) -> dict:
+    return dict(
+        id=UUID(bytes=row.id).hex,
+        ean=row.ean,
+        name=row.name,
+        description=row.description,
+        price=dict(
+            base=_to_str(row.base_price),
+            final=_to_str(row.final_price),
+            final_without_discount=_to_str(row.final_price_without_discount),
+            vat_rate=_to_str(row.vat_rate),
+            discount_rate=_to_str(row.discount_rate),
+        ),
+        quantity=row.quantity,
+        dimensions=dict(
+            height=_to_str(row.height),
+            width=_to_str(row.width),
+            length=_to_str(row.length),
+        ),
+        color=row.color,
+        material=row.material,
+        country_of_origin=row.country_of_origin,
+        warranty=row.warranty,
+        rating=dict(average=_to_str(row.rating), review_count=row.review_count),
+        photo_url=dict(
+            thumbnail=row.thumbnail_photo_url,
+            medium=row.medium_size_photo_url,
+            large=row.large_size_photo_url,
+        ),
+        vendor=dict(id=UUID(bytes=row.vendor_id).hex, name=row.vendor_name),
+        category_path=[
+            dict(
+                id=UUID(bytes=row.top_level_category_id).hex,
+                name=row.top_level_category_name,
+            ),
+            dict(
+                id=UUID(bytes=row.mid_level_category_id).hex,
+                name=row.mid_level_category_name,
+            ),
+            dict(
+                id=UUID(bytes=row.terminal_category_id).hex,
+                name=row.terminal_category_name,
+            ),
+        ],
+        creation_date=_to_isoformat(row.creation_date),
+        updated_at=_to_isoformat(row.updated_at),
+    )
+
+
+def _flatten(record: dict, prefix: str = "") -> Iterator[tuple[str, object]]:
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}_")
+        elif isinstance(value, list):
+            yield f"{prefix}{key}_ids", "/".join(v["id"] for v in value)
+            yield f"{prefix}{key}", " > ".join(v["name"] for v in value)
+        else:
+            yield f"{prefix}{key}", value
+
+
+class NDJSONCatalogWriter:
+    def __init__(self, file: TextIO):
+        self._file = file
+
+    def write(self, records: list[dict]):
+        self._file.writelines(json.dumps(r) + "\n" for r in records)
+
+
+class CSVCatalogWriter:
+    """Writes one flat column per product attribute, the category path being
+    joined into a single column."""
+
+    def __init__(self, file: TextIO):
+        self._file = file
+        self._writer = None
+
+    def write(self, records: list[dict]):
+        rows = [dict(_flatten(r)) for r in records]
+        if not rows:
+            return
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0]))
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+
+
+_writers = {"ndjson": NDJSONCatalogWriter, "csv": CSVCatalogWriter}
+
+
+def get_writer(file: TextIO, fmt: str):
+    try:
+        return _writers[fmt](file)
+    except KeyError:
+        raise ValueError(f"unknown export format {fmt}")
+
+
+def export_catalog(
+    repo: SQLProductRepository,
+    file: TextIO,
+    fmt: str,
+    since: Optional[datetime] = None,
+    batch_size: int = 1000,
+    overlap: timedelta = timedelta(seconds=5),
+) -> ExportReport:
+    """Streams the products changed after ``since`` (all of them if it is not
+    given) into the file through a server side cursor, holding at most one
+    batch of rows in memory.
+
+    The report's watermark is the latest change timestamp exported, to be
+    used as ``since`` in the next incremental export. The products changed
+    up to ``overlap`` before it are exported again, for the transactions
+    committed after the export that had set their ``updated_at`` before its
+    watermark: the consumers are expected to upsert the records by id,
+    keeping the one with the latest ``updated_at``. Renaming a vendor or a
+    category sets the ``updated_at`` of its products, so that they're
+    exported again with the new name.
+    """
+    writer = get_writer(file, fmt)
+    start = perf_counter()
+    report = ExportReport(watermark=since)
+    with repo.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        ).execute(_generate_export_query(since, overlap))
+        for rows in result.partitions(batch_size):
+            writer.write([product_row_to_record(row) for row in rows])
+            report.rows_exported += len(rows)
+            updated_at = max(
+                (_to_datetime(r.updated_at) for r in rows if r.updated_at),
+                default=None,
+            )
+            if updated_at and (not report.watermark or updated_at > report.watermark):
+                report.watermark = updated_at
+    report.duration = perf_counter() - start
+    return report
@@ -0,0 +1,413 @@
+import csv
+import json
+from os import cpu_count
+from uuid import UUID
+from uuid import uuid5
+from time import perf_counter
+from itertools import islice
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+
+from pendulum import now
+from pydantic import ValidationError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import tz
+from .models.vat import VatOrmModel
+from .models.discount import DiscountOrmModel
+from .models.vendor import ProductVendorOrmModel
+from .models.product import ProductOrmModel
+from .models.categories import MidLevelCategoryOrmModel
+from .models.categories import TerminalCategoryOrmModel
+from .repository import SQLProductRepository
+from ....domain.entities.product import Product
+from ....domain.entities.product import ProductPrice
+from ....domain.entities.product import ProductDimensions
+from ....domain.entities.product import ProductPhotoUrl
+from ....domain.entities.product import VAT
+from ....domain.entities.product import Discount
+from ....domain.entities.product import ProductVendor
+from ....domain.entities.product import TerminalLevelProductCategory
+
+
+# namespace of the ids generated for rows without one, so that importing the
+# same vendor catalog twice updates its products instead of duplicating them
+PRODUCT_ID_NAMESPACE = UUID("6f1c3d0e-52b4-4c4e-9a51-6f3e0f1d2a7b")
+
+# columns that keep their persisted value when an existing product is imported
+PRESERVED_COLUMNS = ("id", "creation_date", "rating", "review_count", "rating_sum")
+
+_dialect_inserts = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+
+@dataclass(frozen=True)
+class RowError:
+    line: int
+    error: str
+
+    def json(self) -> str:
+        return json.dumps(dict(line=self.line, error=self.error))
+
+
+@dataclass
+class ImportProgress:
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_failed: int = 0
+    elapsed: float = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed else 0
+
+
+@dataclass
+class ImportReport:
+    rows_read: int = 0
+    rows_imported: int = 0
+    errors: list[RowError] = field(default_factory=list)
+    validation_time: float = 0
+    write_time: float = 0
+    duration: float = 0
+
+    @property
+    def rows_failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.duration if self.duration else 0
+
+    def __str__(self):
+        return (
+            f"{self.rows_read} rows read, {self.rows_imported} imported, "
+            f"{self.rows_failed} failed in {self.duration:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s; validation "
+            f"{self.validation_time:.2f}s, writes {self.write_time:.2f}s)"
+        )
+
+
+def read_csv_rows(file: TextIO) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items()}
+
+
+def read_jsonl_rows(file: TextIO) -> Iterator[tuple[int, dict]]:
+    for line_no, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, e
+
+
+_readers = {"csv": read_csv_rows, "jsonl": read_jsonl_rows}
+
+
+def read_rows(file: TextIO, fmt: str) -> Iterator[tuple[int, dict]]:
+    try:
+        return _readers[fmt](file)
+    except KeyError:
+        raise ValueError(f"unknown catalog format {fmt}")
+
+
+@dataclass(frozen=True)
+class _References:
+    vats: dict[UUID, VAT]
+    discounts: dict[UUID, Discount]
+    categories: dict[UUID, TerminalLevelProductCategory]
+    vendors: dict[UUID, ProductVendor]
+
+
+def _load_references(repo: SQLProductRepository) -> _References:
+    with repo.session() as s:
+        categories = s.query(TerminalCategoryOrmModel).options(
+            joinedload(TerminalCategoryOrmModel.parent).joinedload(
+                MidLevelCategoryOrmModel.parent
+            )
+        )
+        return _References(
+            vats={UUID(bytes=v.id): v.to_domain_entity() for v in s.query(VatOrmModel)},
+            discounts={
+                UUID(bytes=d.id): d.to_domain_entity()
+                for d in s.query(DiscountOrmModel)
+            },
+            categories={UUID(bytes=c.id): c.to_domain_entity() for c in categories},
+            vendors={
+                UUID(bytes=v.id): v.to_domain_entity()
+                for v in s.query(ProductVendorOrmModel)
+            },
+        )
+
+
+def _get_reference(references: dict, row: dict, key: str, required: bool = True):
+    if row.get(key) is None:
+        if required:
+            raise ValueError(f"{key} is required")
+        return None
+    try:
+        return references[UUID(str(row[key]))]
+    except (KeyError, ValueError):
+        raise ValueError(f"unknown {key} {row[key]}")
+
+
+def _get_product_id(row: dict, vendor: ProductVendor) -> UUID:
+    if row.get("id") is not None:
+        return UUID(str(row["id"]))
+    return uuid5(PRODUCT_ID_NAMESPACE, f"{vendor.id.hex}:{row.get('ean')}")
+
+
+def _to_int(row: dict, key: str) -> Optional[int]:
+    if row.get(key) is None:
+        return None
+    try:
+        return int(row[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer")
+
+
+def _build_dimensions(row: dict) -> Optional[ProductDimensions]:
+    keys = ("height", "width", "length")
+    if all(row.get(k) is None for k in keys):
+        return None
+    return ProductDimensions(**{k: row.get(k) for k in keys})
+
+
+def _build_photo_url(row: dict) -> Optional[ProductPhotoUrl]:
+    if row.get("thumbnail_photo_url") is None:
+        return None
+    return ProductPhotoUrl(
+        thumbnail=row.get("thumbnail_photo_url"),
+        medium=row.get("medium_size_photo_url"),
+        large=row.get("large_size_photo_url"),
+    )
+
+
+def build_product(row: dict, references: _References) -> Product:
+    vendor = _get_reference(references.vendors, row, "vendor_id")
+    return Product(
+        id=_get_product_id(row, vendor),
+        ean=row.get("ean"),
+        name=row.get("name"),
+        description=row.get("description"),
+        price=ProductPrice(
+            value=row.get("base_price"),
+            vat=_get_reference(references.vats, row, "vat_id"),
+            discount=_get_reference(
+                references.discounts, row, "discount_id", required=False
+            ),
+        ),
+        quantity=_to_int(row, "quantity"),
+        creation_date=row.get("creation_date") or now(tz),
+        dimensions=_build_dimensions(row),
+        color=row.get("color"),
+        material=row.get("material"),
+        country_of_origin=row.get("country_of_origin"),
+        warranty=_to_int(row, "warranty"),
+        category=_get_reference(references.categories, row, "category_id"),
+        photo_url=_build_photo_url(row),
+        vendor=vendor,
+    )
+
+
+def product_to_row(product: Product) -> dict:
+    photo_url = product.photo_url
+    return dict(
+        id=product.get_id_in_bytes_format(),
+        ean=product.ean,
+        name=product.name,
+        description=product.description,
+        base_price=product.get_base_price(),
+        final_price=product.get_final_price(),
+        final_price_without_discount=product.get_final_price_without_discount(),
+        vat_id=product.get_vat_id_in_bytes_format(),
+        discount_id=product.get_discount_id_in_bytes_format(),
+        quantity=product.quantity,
+        creation_date=product.creation_date,
+        height=product.get_height(),
+        width=product.get_width(),
+        length=product.get_length(),
+        color=product.color,
+        material=product.material,
+        country_of_origin=product.country_of_origin,
+        warranty=product.warranty,
+        category_id=product.get_category_id_in_bytes_format(),
+        rating=product.rating,
+        review_count=product.review_count,
+        rating_sum=product.rating_sum,
+        thumbnail_photo_url=str(photo_url.thumbnail) if photo_url else None,
+        medium_size_photo_url=str(photo_url.medium) if photo_url else None,
+        large_size_photo_url=str(photo_url.large) if photo_url else None,
+        vendor_id=product.get_vendor_id_in_bytes_format(),
+    )
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+        for err in e.errors()
+    )
+
+
+# reference data of the current worker process, set by _init_worker
+_worker_references: Optional[_References] = None
+
+
+def _init_worker(references: _References):
+    global _worker_references
+    _worker_references = references
+
+
+def _validate_row(row) -> dict:
+    if isinstance(row, json.JSONDecodeError):
+        raise ValueError(f"invalid json: {row.msg}")
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    return product_to_row(build_product(row, _worker_references))
+
+
+def _validate_chunk(
+    chunk: list[tuple[int, dict]]
+) -> tuple[list[tuple[int, dict]], list[RowError], float]:
+    start = perf_counter()
+    valid_rows, errors = [], []
+    for line, row in chunk:
+        try:
+            valid_rows.append((line, _validate_row(row)))
+        except ValidationError as e:
+            errors.append(RowError(line, _format_validation_error(e)))
+        except (ValueError, TypeError) as e:
+            errors.append(RowError(line, str(e)))
+    return valid_rows, errors, perf_counter() - start
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(rows)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class CatalogImporter:
+    """Streams catalog rows, validates them against the domain entities in
+    worker processes and upserts them in batches.
+
+    With ``workers=0`` rows are validated in the calling process.
+    """
+
+    def __init__(
+        self,
+        repo: SQLProductRepository,
+        batch_size: int = 1000,
+        workers: int = None,
+        on_progress: Callable[[ImportProgress], None] = None,
+    ):
+        dialect = repo.dialect
+        if dialect not in _dialect_inserts:
+            raise ValueError(f"bulk import is not supported for {dialect}")
+        self._repo = repo
+        self._insert = _dialect_inserts[dialect]
+        self._batch_size = batch_size
+        self._workers = cpu_count() if workers is None else workers
+        self._on_progress = on_progress
+
+    def _generate_upsert_statement(self):
+        table = ProductOrmModel.__table__
+        statement = self._insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={
+                c.name: statement.excluded[c.name]
+                for c in table.columns
+                if c.name not in PRESERVED_COLUMNS
+            },
+        )
+
+    def _write(self, valid_rows: list[tuple[int, dict]], report: ImportReport):
+        if not valid_rows:
+            return
+        start = perf_counter()
+        statement = self._generate_upsert_statement()
+        updated_at = now(tz)
+        valid_rows = [
+            (line, dict(row, updated_at=updated_at)) for line, row in valid_rows
+        ]
+        try:
+            with self._repo.connect() as conn, conn.begin():
+                conn.execute(statement, [row for _, row in valid_rows])
+            report.rows_imported += len(valid_rows)
+        except DBAPIError:
+            # isolates the offending rows so that the rest of the batch is kept
+            for line, row in valid_rows:
+                try:
+                    with self._repo.connect() as conn, conn.begin():
+                        conn.execute(statement, row)
+                    report.rows_imported += 1
+                except DBAPIError as e:
+                    report.errors.append(RowError(line, str(e.orig)))
+        report.write_time += perf_counter() - start
+
+    def _collect(self, chunk: list, result: tuple, report: ImportReport):
+        valid_rows, errors, validation_time = result
+        report.rows_read += len(chunk)
+        report.errors.extend(errors)
+        report.validation_time += validation_time
+        self._write(valid_rows, report)
+        if self._on_progress is not None:
+            self._on_progress(
+                ImportProgress(
+                    rows_read=report.rows_read,
+                    rows_imported=report.rows_imported,
+                    rows_failed=report.rows_failed,
+                    elapsed=perf_counter() - self._start,
+                )
+            )
+
+    def _run_in_process(self, chunks: Iterator[list], references: _References, report):
+        _init_worker(references)
+        for chunk in chunks:
+            self._collect(chunk, _validate_chunk(chunk), report)
+
+    def _run_in_pool(self, chunks: Iterator[list], references: _References, report):
+        with ProcessPoolExecutor(
+            self._workers, initializer=_init_worker, initargs=(references,)
+        ) as pool:
+            # bounds the number of chunks held in memory at once
+            pending = deque()
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_validate_chunk, chunk)))
+                if len(pending) >= self._workers * 2:
+                    chunk, future = pending.popleft()
+                    self._collect(chunk, future.result(), report)
+            while pending:
+                chunk, future = pending.popleft()
+                self._collect(chunk, future.result(), report)
+
+    def run(self, rows: Iterable[tuple[int, dict]]) -> ImportReport:
+        self._start = perf_counter()
+        report = ImportReport()
+        references = _load_references(self._repo)
+        chunks = _chunks(rows, self._batch_size)
+        if self._workers > 0:
+            self._run_in_pool(chunks, references, report)
+        else:
+            self._run_in_process(chunks, references, report)
+        report.duration = perf_counter() - self._start
+        return report
+
+
+def import_catalog(
+    repo: SQLProductRepository, file: TextIO, fmt: str, **kwargs
+) -> ImportReport:
+    return CatalogImporter(repo, **kwargs).run(read_rows(file, fmt))
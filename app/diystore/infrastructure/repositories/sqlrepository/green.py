@@ -0,0 +1,28 @@
+def _gevent_wait_callback(conn, timeout=None):
+    from gevent.socket import wait_read
+    from gevent.socket import wait_write
+    from psycopg2 import OperationalError
+    from psycopg2 import extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"bad result from poll: {state!r}")
+
+
+def make_psycopg2_cooperative() -> bool:
+    """Makes psycopg2 yield to the other greenlets while waiting for the
+    database, as gevent can't patch the sockets of a C extension. Returns
+    False when psycopg2 is not installed."""
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    extensions.set_wait_callback(_gevent_wait_callback)
+    return True
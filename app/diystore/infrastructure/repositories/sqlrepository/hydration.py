@@ -0,0 +1,54 @@
+from functools import wraps
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+
+class HydrationContext:
+    """Domain objects built while converting the results of one repository
+    call, by ORM model and id, so that the objects shared by many rows, like
+    the VATs, discounts, vendors and categories of a listing, are built
+    once."""
+
+    def __init__(self):
+        self._objects: dict[tuple[type, bytes], Any] = {}
+
+    def get_or_build(self, model: type, _id: bytes, build: Callable[[], Any]):
+        key = (model, _id)
+        try:
+            return self._objects[key]
+        except KeyError:
+            obj = self._objects[key] = build()
+            return obj
+
+
+_hydration_context: ContextVar[Optional[HydrationContext]] = ContextVar(
+    "hydration_context", default=None
+)
+
+
+@contextmanager
+def hydration_context():
+    token = _hydration_context.set(HydrationContext())
+    try:
+        yield
+    finally:
+        _hydration_context.reset(token)
+
+
+def interned(to_domain_entity: Callable):
+    """Reuses the domain entity already built for the same row in the current
+    hydration context, if there is one."""
+
+    @wraps(to_domain_entity)
+    def wrapper(self):
+        context = _hydration_context.get()
+        if context is None:
+            return to_domain_entity(self)
+        return context.get_or_build(
+            type(self), self.id, lambda: to_domain_entity(self)
+        )
+
+    return wrapper
@@ -0,0 +1,307 @@
+from math import ceil
+from math import floor
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from datetime import datetime
+from datetime import timedelta
+from decimal import Decimal
+from threading import Lock
+from time import monotonic
+from typing import Callable
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models.product import ProductOrmModel
+
+
+# the prices are kept in cents and the ratings in tenths, their scales
+_SCALES = {"final_price": 100, "rating": 10}
+
+
+class _SortedListing:
+    """The products of a category sorted by one column, ties being broken by
+    id, next to the other column and the discount flag they're filtered on.
+    The columns are kept as arrays of integers, parallel to the ids."""
+
+    def __init__(self):
+        self.keys = array("q")
+        self.ids: list[bytes] = []
+        self.others = array("q")
+        self.discounted = bytearray()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _position(self, key: int, _id: bytes) -> int:
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return bisect_left(self.ids, _id, lo, hi)
+
+    def insert(self, key: int, other: int, discounted: bool, _id: bytes):
+        i = self._position(key, _id)
+        self.keys.insert(i, key)
+        self.ids.insert(i, _id)
+        self.others.insert(i, other)
+        self.discounted.insert(i, discounted)
+
+    def remove(self, key: int, _id: bytes):
+        i = self._position(key, _id)
+        del self.keys[i]
+        del self.ids[i]
+        del self.others[i]
+        del self.discounted[i]
+
+    def select(
+        self,
+        key_min: int,
+        key_max: int,
+        other_min: int,
+        other_max: int,
+        with_discounts_only: bool,
+        descending: bool,
+    ) -> list[bytes]:
+        positions = range(
+            bisect_left(self.keys, key_min), bisect_right(self.keys, key_max)
+        )
+        if descending:
+            positions = reversed(positions)
+        others, discounted = self.others, self.discounted
+        return [
+            self.ids[i]
+            for i in positions
+            if other_min <= others[i] <= other_max
+            and (discounted[i] or not with_discounts_only)
+        ]
+
+
+class ListingIndex:
+    """The products of the terminal categories listed so far, sorted by price
+    and by rating, so that the ordered listings are selected by bisecting
+    and scanning these instead of filtering and sorting in SQL; only the
+    products selected are then loaded, by id.
+
+    A category is loaded on its first listing. The index is then kept up to
+    date incrementally: at most every ``refresh_interval`` seconds, the
+    products updated since the last refresh (``updated_at`` being set by
+    every write, ORM or bulk) are read and moved. The ones updated up to
+    ``overlap`` before it are read again, for the transactions committed
+    after the refresh that had set their ``updated_at`` before it. As the
+    clocks of the writers may lag, and long transactions (like the recompute
+    commands) commit well after their ``updated_at``, each category is also
+    loaded anew every ``rebuild_interval`` seconds, which bounds how long a
+    change the refreshes missed goes unseen.
+
+    The queries run outside the lock, which only guards the arrays: the
+    listings are never kept waiting behind a round trip, and no greenlet
+    yields while holding it, even when the lock was created before gevent
+    patched the threading module. Each query takes a ticket before it runs,
+    and a row is applied only if the product was not applied from a query
+    that started later, so that the results of concurrent queries can be
+    applied in any order."""
+
+    def __init__(
+        self,
+        refresh_interval: float = 1.0,
+        overlap: timedelta = timedelta(seconds=5),
+        rebuild_interval: float = 60.0,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self._refresh_interval = refresh_interval
+        self._overlap = overlap
+        self._rebuild_interval = rebuild_interval
+        self._clock = clock
+        self._categories: dict[bytes, dict[str, _SortedListing]] = {}
+        # by id, the category, price, rating and discount flag indexed
+        self._products: dict[bytes, tuple[bytes, int, int, bool]] = {}
+        # by id, the ticket of the query the product was last applied from
+        self._tickets: dict[bytes, int] = {}
+        self._last_ticket = 0
+        # by category, when it was last loaded
+        self._loaded_at: dict[bytes, float] = {}
+        self._synced_at: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = Lock()
+
+    _columns = (
+        ProductOrmModel.id,
+        ProductOrmModel.category_id,
+        ProductOrmModel.final_price,
+        ProductOrmModel.rating,
+        ProductOrmModel.discount_id,
+        ProductOrmModel.updated_at,
+    )
+
+    def __len__(self):
+        return len(self._products)
+
+    def clear(self):
+        with self._lock:
+            self._categories.clear()
+            self._products.clear()
+            self._tickets.clear()
+            self._loaded_at.clear()
+            self._synced_at = self._refreshed_at = None
+
+    def _add(self, _id: bytes, category_id: bytes, price, rating, discount_id):
+        listings = self._categories.get(category_id)
+        # like the SQL filters, the products with no price or rating are not
+        # listed
+        if listings is None or price is None or rating is None:
+            return
+        price = int(price * _SCALES["final_price"])
+        rating = int(rating * _SCALES["rating"])
+        discounted = discount_id is not None
+        listings["final_price"].insert(price, rating, discounted, _id)
+        listings["rating"].insert(rating, price, discounted, _id)
+        self._products[_id] = (category_id, price, rating, discounted)
+
+    def _discard(self, _id: bytes):
+        indexed = self._products.pop(_id, None)
+        if indexed is None:
+            return
+        category_id, price, rating, _ = indexed
+        listings = self._categories[category_id]
+        listings["final_price"].remove(price, _id)
+        listings["rating"].remove(rating, _id)
+
+    def _take_ticket(self) -> int:
+        self._last_ticket += 1
+        return self._last_ticket
+
+    def _apply(
+        self,
+        ticket: int,
+        _id: bytes,
+        category_id: bytes,
+        price,
+        rating,
+        discount_id,
+        updated_at,
+    ):
+        if self._tickets.get(_id, 0) > ticket:
+            # read by a later query
+            return
+        if _id in self._tickets or category_id in self._categories:
+            self._tickets[_id] = ticket
+        self._discard(_id)
+        self._add(_id, category_id, price, rating, discount_id)
+        if updated_at is not None and (
+            self._synced_at is None or updated_at > self._synced_at
+        ):
+            self._synced_at = updated_at
+
+    def _claim_load(self, category_id: bytes) -> Optional[int]:
+        """The ticket of the load of the category, which the caller then
+        runs, if it's not loaded or due for a rebuild."""
+        with self._lock:
+            now = self._clock()
+            loaded_at = self._loaded_at.get(category_id)
+            if (
+                category_id in self._categories
+                and loaded_at is not None
+                and now - loaded_at < self._rebuild_interval
+            ):
+                return None
+            self._loaded_at[category_id] = now
+            return self._take_ticket()
+
+    def _load(self, category_id: bytes, session: Session, ticket: int):
+        since = session.scalar(select(func.max(ProductOrmModel.updated_at)))
+        rows = session.execute(
+            select(*self._columns).where(ProductOrmModel.category_id == category_id)
+        ).all()
+        with self._lock:
+            listings = self._categories.get(category_id)
+            if listings is None:
+                self._categories[category_id] = dict(
+                    final_price=_SortedListing(), rating=_SortedListing()
+                )
+            else:
+                # rebuilt: the products no longer in the category are
+                # dropped, unless applied from a later query
+                ids = {row.id for row in rows}
+                for _id in list(listings["final_price"].ids):
+                    if _id not in ids and self._tickets.get(_id, 0) < ticket:
+                        self._discard(_id)
+            if self._refreshed_at is None:
+                self._refreshed_at = self._clock()
+            for row in rows:
+                self._apply(ticket, *row)
+            # the changes a refresh read before the category was loaded are
+            # read again by the next one
+            if since is not None and (
+                self._synced_at is None or since < self._synced_at
+            ):
+                self._synced_at = since
+
+    def _claim_refresh(self) -> tuple[Optional[int], Optional[datetime]]:
+        """The ticket of the refresh, which the caller then runs, if one is
+        due, and the updated_at it reads the products from."""
+        with self._lock:
+            now = self._clock()
+            if not self._categories or (
+                self._refreshed_at is not None
+                and now - self._refreshed_at < self._refresh_interval
+            ):
+                return None, None
+            self._refreshed_at = now
+            return self._take_ticket(), self._synced_at
+
+    def _refresh(self, session: Session, ticket: int, since: Optional[datetime]):
+        query = select(*self._columns)
+        if since is not None:
+            query = query.where(ProductOrmModel.updated_at > since - self._overlap)
+        else:
+            # none of the products loaded has an updated_at, as in databases
+            # predating it: only the ones written since are read
+            query = query.where(ProductOrmModel.updated_at.is_not(None))
+        rows = session.execute(query).all()
+        with self._lock:
+            for row in rows:
+                self._apply(ticket, *row)
+
+    def select(
+        self,
+        session: Session,
+        category_id: bytes,
+        order_by: str,
+        price_min: Decimal,
+        price_max: Decimal,
+        rating_min: Decimal,
+        rating_max: Decimal,
+        with_discounts_only: bool = False,
+        descending: bool = False,
+    ) -> list[bytes]:
+        """The ids of the products of the category within the ranges, in the
+        order of ``order_by``, final_price or rating."""
+        price_range = (
+            ceil(price_min * _SCALES["final_price"]),
+            floor(price_max * _SCALES["final_price"]),
+        )
+        rating_range = (
+            ceil(rating_min * _SCALES["rating"]),
+            floor(rating_max * _SCALES["rating"]),
+        )
+        ticket = self._claim_load(category_id)
+        if ticket is not None:
+            self._load(category_id, session, ticket)
+        ticket, since = self._claim_refresh()
+        if ticket is not None:
+            self._refresh(session, ticket, since)
+        with self._lock:
+            listings = self._categories.get(category_id)
+            if listings is None:
+                # cleared meanwhile
+                return []
+            listing = listings[order_by]
+            if order_by == "final_price":
+                return listing.select(
+                    *price_range, *rating_range, with_discounts_only, descending
+                )
+            return listing.select(
+                *rating_range, *price_range, with_discounts_only, descending
+            )
@@ -9,6 +9,7 @@ from sqlalchemy.orm import validates
 
 from . import Base
 from ..helpers import validate_id
+from ..hydration import interned
 from ..exceptions import OrmEntityNotFullyLoaded
 from .....domain.entities.product import TopLevelProductCategory
 from .....domain.entities.product import MidLevelProductCategory
@@ -48,6 +49,7 @@ class TopLevelCategoryOrmModel(CategoryOrmModel, Base):
     def _children_type(self):
         return MidLevelCategoryOrmModel
 
+    @interned
     def to_domain_entity(self) -> TopLevelProductCategory:
         return TopLevelProductCategory(
             id=UUID(bytes=self.id), name=self.name, description=self.description
@@ -76,7 +78,9 @@ class MidLevelCategoryOrmModel(CategoryOrmModel, Base):
     description = Column(String(300))
     parent_id = Column(LargeBinary(16), ForeignKey("toplevel_category.id"), nullable=False)
 
-    parent = relationship("TopLevelCategoryOrmModel", back_populates="children")
+    parent = relationship(
+        "TopLevelCategoryOrmModel", back_populates="children", lazy="joined"
+    )
     children = relationship("TerminalCategoryOrmModel", back_populates="parent")
 
     @property
@@ -87,6 +91,7 @@ class MidLevelCategoryOrmModel(CategoryOrmModel, Base):
     def _children_type(self):
         return TerminalCategoryOrmModel
 
+    @interned
     def to_domain_entity(self) -> MidLevelProductCategory:
         if self.parent is None:
             raise OrmEntityNotFullyLoaded
@@ -125,13 +130,16 @@ class TerminalCategoryOrmModel(CategoryOrmModel, Base):
     description = Column(String(300))
     parent_id = Column(LargeBinary(16), ForeignKey("midlevel_category.id"))
 
-    parent = relationship("MidLevelCategoryOrmModel", back_populates="children")
+    parent = relationship(
+        "MidLevelCategoryOrmModel", back_populates="children", lazy="joined"
+    )
     products = relationship("ProductOrmModel", back_populates="category")
 
     @property
     def _parent_type(self):
         return MidLevelCategoryOrmModel
 
+    @interned
     def to_domain_entity(self) -> TerminalLevelProductCategory:
         if self.parent is None:
             raise OrmEntityNotFullyLoaded
@@ -8,6 +8,7 @@ from sqlalchemy.orm import validates
 from . import Base
 from . import tz
 from ..helpers import validate_id
+from ..hydration import interned
 from .....domain.entities.product.discount import Discount
 
 
@@ -24,6 +25,7 @@ class DiscountOrmModel(Base):
     def _validate_id(self, key, _id):
         return validate_id(_id, key)
 
+    @interned
     def to_domain_entity(self) -> Discount:
         return Discount(
             id=self.id,
@@ -1,4 +1,15 @@
 from uuid import UUID
+from decimal import Decimal
+from typing import Optional
+from typing import Sequence
+
+from sqlalchemy import event
+from sqlalchemy import inspect
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy import bindparam
+from sqlalchemy import func
+from sqlalchemy import or_
 from sqlalchemy import Column
 from sqlalchemy import Numeric
 from sqlalchemy import LargeBinary
@@ -8,16 +19,20 @@ from sqlalchemy import ForeignKey
 from sqlalchemy import DateTime
 from sqlalchemy.orm import validates
 from sqlalchemy.orm import relationship
+from pendulum import now
 
 from . import Base
 from . import tz
 from .vat import VatOrmModel
 from .discount import DiscountOrmModel
+from .categories import TopLevelCategoryOrmModel
+from .categories import MidLevelCategoryOrmModel
 from .categories import TerminalCategoryOrmModel
 from .vendor import ProductVendorOrmModel
 from .review import ProductReviewOrmModel
 from ..exceptions import OrmEntityNotFullyLoaded
 from ..helpers import validate_id
+from ....instrumentation import timed
 from .....domain.entities.product import Product
 from .....domain.entities.product import EAN13
 from .....domain.entities.product import VAT
@@ -27,6 +42,8 @@ from .....domain.entities.product import ProductDimensions
 from .....domain.entities.product import ProductPhotoUrl
 from .....domain.entities.product import ProductVendor
 from .....domain.entities.product import ProductReview
+from .....domain.entities.product import calculate_final_price
+from .....domain.entities.product import calculate_average_rating
 
 
 class ProductOrmModel(Base):
@@ -36,10 +53,13 @@ class ProductOrmModel(Base):
     name = Column(String(50), nullable=False)
     description = Column(String(3000))
     base_price = Column(Numeric(precision=8, scale=2), nullable=False)
+    final_price = Column(Numeric(precision=9, scale=2), index=True)
+    final_price_without_discount = Column(Numeric(precision=9, scale=2))
     vat_id = Column(LargeBinary(16), ForeignKey("vat.id"), nullable=False)
     discount_id = Column(LargeBinary(16), ForeignKey("product_discount.id"))
     quantity = Column(Integer, nullable=False)
     creation_date = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), index=True)
     height = Column(Numeric(precision=6, scale=1))
     width = Column(Numeric(precision=6, scale=1))
     length = Column(Numeric(precision=6, scale=1))
@@ -51,6 +71,8 @@ class ProductOrmModel(Base):
         LargeBinary(16), ForeignKey("terminal_category.id"), nullable=False
     )
     rating = Column(Numeric(precision=2, scale=1))
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Numeric(precision=12, scale=1), nullable=False, default=0)
     thumbnail_photo_url = Column(String(2000))
     medium_size_photo_url = Column(String(2000))
     large_size_photo_url = Column(String(2000))
@@ -84,14 +106,22 @@ class ProductOrmModel(Base):
             f"name={self.name}, price={self.base_price})"
         )
 
-    def to_domain_entity(self, with_reviews=False) -> Product:
+    @timed("hydration")
+    def to_domain_entity(
+        self, reviews: Sequence[ProductReview] = (), review_count: int = None
+    ) -> Product:
+        """Builds the product, with the given ``reviews`` only, e.g. a page of
+        them, and with ``review_count`` in place of the stored one."""
         try:
             return Product.construct(
                 id=UUID(bytes=self.id),
                 ean=EAN13(self.ean),
                 name=self.name,
                 description=self.description,
-                price=ProductPrice(
+                # built without validation, like the product, so that the VAT
+                # and discount shared by the products of a listing are not
+                # copied for each of them
+                price=ProductPrice.construct(
                     value=self.base_price,
                     vat=self.vat.to_domain_entity(),
                     discount=(
@@ -108,15 +138,14 @@ class ProductOrmModel(Base):
                 country_of_origin=self.country_of_origin,
                 warranty=self.warranty,
                 category=self.category.to_domain_entity(),
-                rating=ProductRating(self.rating),
-                reviews=(
-                    {
-                        UUID(bytes=rev.id).int: rev.to_domain_entity()
-                        for rev in self.reviews
-                    }
-                    if with_reviews and self.reviews
-                    else {}
+                rating=(
+                    ProductRating(self.rating) if self.rating is not None else None
+                ),
+                review_count=(
+                    review_count if review_count is not None else self.review_count or 0
                 ),
+                rating_sum=self.rating_sum or Decimal(0),
+                reviews={review.id.int: review for review in reviews},
                 photo_url=ProductPhotoUrl(
                     thumbnail=self.thumbnail_photo_url,
                     medium=self.medium_size_photo_url,
@@ -149,6 +178,8 @@ class ProductOrmModel(Base):
                 warranty=entity.warranty,
                 category_id=entity.get_category_id_in_bytes_format(),
                 rating=entity.rating,
+                review_count=entity.review_count,
+                rating_sum=entity.rating_sum,
                 thumbnail_photo_url=entity.get_thumbnail_photo_url(),
                 medium_size_photo_url=entity.get_medium_size_photo_url(),
                 large_size_photo_url=entity.get_large_size_photo_url(),
@@ -164,3 +195,229 @@ class ProductOrmModel(Base):
             )
         except AttributeError:
             raise TypeError("entity must be of type Product")
+
+
+def _to_decimal(value) -> Optional[Decimal]:
+    if value is None or isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def calculate_final_prices(
+    base_price, vat_rate, discount_rate=None
+) -> tuple[Optional[Decimal], Optional[Decimal]]:
+    if base_price is None or vat_rate is None:
+        return None, None
+    base_price, vat_rate = _to_decimal(base_price), _to_decimal(vat_rate)
+    return (
+        calculate_final_price(base_price, vat_rate, _to_decimal(discount_rate)),
+        calculate_final_price(base_price, vat_rate),
+    )
+
+
+def _get_related_rate(connection, target, key: str, model, _id):
+    if _id is None:
+        return None
+    # only already loaded objects are used, so that no lazy load is
+    # triggered from within the flush
+    loaded = target.__dict__.get(key)
+    if loaded is not None and loaded.id == _id:
+        return loaded.rate
+    return connection.scalar(select(model.rate).where(model.id == _id))
+
+
+@event.listens_for(ProductOrmModel, "before_insert")
+@event.listens_for(ProductOrmModel, "before_update")
+def _maintain_final_prices(mapper, connection, target: ProductOrmModel):
+    vat_rate = _get_related_rate(
+        connection, target, "vat", VatOrmModel, target.vat_id
+    )
+    discount_rate = _get_related_rate(
+        connection, target, "discount", DiscountOrmModel, target.discount_id
+    )
+    target.final_price, target.final_price_without_discount = calculate_final_prices(
+        target.base_price, vat_rate, discount_rate
+    )
+
+
+@event.listens_for(ProductOrmModel, "before_insert")
+@event.listens_for(ProductOrmModel, "before_update")
+def _touch_updated_at(mapper, connection, target: ProductOrmModel):
+    target.updated_at = now(tz)
+
+
+def recompute_final_prices(connection, *criteria, batch_size: int = 1000) -> int:
+    """Recalculates the persisted final prices of the products matching the
+    given criteria (all of them if none is passed) and returns how many were
+    updated, only the ones whose prices changed being written."""
+    query = (
+        select(
+            ProductOrmModel.id,
+            ProductOrmModel.base_price,
+            VatOrmModel.rate,
+            DiscountOrmModel.rate,
+            ProductOrmModel.final_price,
+            ProductOrmModel.final_price_without_discount,
+        )
+        .join(VatOrmModel, ProductOrmModel.vat_id == VatOrmModel.id)
+        .outerjoin(DiscountOrmModel, ProductOrmModel.discount_id == DiscountOrmModel.id)
+        .where(*criteria)
+    )
+    statement = (
+        update(ProductOrmModel.__table__)
+        .where(ProductOrmModel.__table__.c.id == bindparam("_id"))
+        .values(
+            final_price=bindparam("_final_price"),
+            final_price_without_discount=bindparam("_final_price_without_discount"),
+            updated_at=now(tz),
+        )
+    )
+    updated = 0
+    result = connection.execution_options(stream_results=True).execute(query)
+    for rows in result.partitions(batch_size):
+        params = []
+        for _id, base_price, vat_rate, discount_rate, *stored in rows:
+            final, without_discount = calculate_final_prices(
+                base_price, vat_rate, discount_rate
+            )
+            if stored == [final, without_discount]:
+                continue
+            params.append(
+                dict(
+                    _id=_id,
+                    _final_price=final,
+                    _final_price_without_discount=without_discount,
+                )
+            )
+        if params:
+            connection.execute(statement, params)
+        updated += len(params)
+    return updated
+
+
+def recompute_rating_aggregates(connection, batch_size: int = 1000) -> int:
+    """Rebuilds the review count, rating sum and rating of the products from
+    the persisted reviews and returns how many were updated, only the ones
+    whose aggregates changed being written."""
+    table = ProductOrmModel.__table__
+    # the products which lost all their reviews
+    reset = connection.execute(
+        update(table)
+        .where(
+            table.c.id.not_in(select(ProductReviewOrmModel.product_id)),
+            or_(
+                table.c.review_count != 0,
+                table.c.rating_sum != 0,
+                table.c.rating.is_not(None),
+            ),
+        )
+        .values(review_count=0, rating_sum=0, rating=None, updated_at=now(tz))
+    )
+    query = (
+        select(
+            table.c.id,
+            table.c.review_count,
+            table.c.rating_sum,
+            table.c.rating,
+            func.count(ProductReviewOrmModel.id),
+            func.sum(ProductReviewOrmModel.rating),
+        )
+        .join(ProductReviewOrmModel, ProductReviewOrmModel.product_id == table.c.id)
+        .group_by(table.c.id, table.c.review_count, table.c.rating_sum, table.c.rating)
+    )
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values(
+            review_count=bindparam("_review_count"),
+            rating_sum=bindparam("_rating_sum"),
+            rating=bindparam("_rating"),
+            updated_at=now(tz),
+        )
+    )
+    updated = reset.rowcount
+    result = connection.execution_options(stream_results=True).execute(query)
+    for rows in result.partitions(batch_size):
+        params = []
+        for _id, stored_count, stored_sum, stored_rating, count, rating_sum in rows:
+            rating_sum = _to_decimal(rating_sum)
+            rating = calculate_average_rating(count, rating_sum)
+            if (stored_count, stored_sum, stored_rating) == (count, rating_sum, rating):
+                continue
+            params.append(
+                dict(
+                    _id=_id,
+                    _review_count=count,
+                    _rating_sum=rating_sum,
+                    _rating=rating,
+                )
+            )
+        if params:
+            connection.execute(statement, params)
+        updated += len(params)
+    return updated
+
+
+def _has_changed(target, *keys: str) -> bool:
+    attrs = inspect(target).attrs
+    return any(getattr(attrs, key).history.has_changes() for key in keys)
+
+
+@event.listens_for(VatOrmModel, "after_update")
+def _propagate_vat_rate_change(mapper, connection, target: VatOrmModel):
+    if _has_changed(target, "rate"):
+        recompute_final_prices(connection, ProductOrmModel.vat_id == target.id)
+
+
+@event.listens_for(DiscountOrmModel, "after_update")
+def _propagate_discount_rate_change(mapper, connection, target: DiscountOrmModel):
+    if _has_changed(target, "rate"):
+        recompute_final_prices(connection, ProductOrmModel.discount_id == target.id)
+
+
+def _touch_products(connection, *criteria):
+    """Sets the updated_at of the products matching the criteria, whose
+    exported vendor or category path has changed."""
+    table = ProductOrmModel.__table__
+    connection.execute(update(table).where(*criteria).values(updated_at=now(tz)))
+
+
+@event.listens_for(ProductVendorOrmModel, "after_update")
+def _propagate_vendor_change(mapper, connection, target: ProductVendorOrmModel):
+    if _has_changed(target, "name"):
+        _touch_products(connection, ProductOrmModel.vendor_id == target.id)
+
+
+@event.listens_for(TerminalCategoryOrmModel, "after_update")
+def _propagate_terminal_category_change(
+    mapper, connection, target: TerminalCategoryOrmModel
+):
+    if _has_changed(target, "name", "parent_id"):
+        _touch_products(connection, ProductOrmModel.category_id == target.id)
+
+
+@event.listens_for(MidLevelCategoryOrmModel, "after_update")
+def _propagate_mid_level_category_change(
+    mapper, connection, target: MidLevelCategoryOrmModel
+):
+    if _has_changed(target, "name", "parent_id"):
+        terminal_ids = select(TerminalCategoryOrmModel.id).where(
+            TerminalCategoryOrmModel.parent_id == target.id
+        )
+        _touch_products(connection, ProductOrmModel.category_id.in_(terminal_ids))
+
+
+@event.listens_for(TopLevelCategoryOrmModel, "after_update")
+def _propagate_top_level_category_change(
+    mapper, connection, target: TopLevelCategoryOrmModel
+):
+    if _has_changed(target, "name"):
+        terminal_ids = (
+            select(TerminalCategoryOrmModel.id)
+            .join(
+                MidLevelCategoryOrmModel,
+                TerminalCategoryOrmModel.parent_id == MidLevelCategoryOrmModel.id,
+            )
+            .where(MidLevelCategoryOrmModel.parent_id == target.id)
+        )
+        _touch_products(connection, ProductOrmModel.category_id.in_(terminal_ids))
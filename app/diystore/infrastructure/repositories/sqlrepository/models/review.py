@@ -4,17 +4,27 @@ from sqlalchemy import Numeric
 from sqlalchemy import LargeBinary
 from sqlalchemy import ForeignKey
 from sqlalchemy import DateTime
+from sqlalchemy import Index
 from sqlalchemy.orm import validates
 from sqlalchemy.orm import relationship
 
 from . import Base
 from . import tz
 from ..helpers import validate_id
+from ....instrumentation import timed
 from .....domain.entities.product import ProductReview
 
 
 class ProductReviewOrmModel(Base):
     __tablename__ = "product_review"
+    __table_args__ = (
+        Index(
+            "ix_product_review_product_id_creation_date_id",
+            "product_id",
+            "creation_date",
+            "id",
+        ),
+    )
     id = Column(LargeBinary(16), primary_key=True)
     product_id = Column(LargeBinary(16), ForeignKey("product.id"), nullable=False)
     client_id = Column(LargeBinary(16), nullable=False)
@@ -28,6 +38,7 @@ class ProductReviewOrmModel(Base):
     def _validate_id(self, key, _id):
         return validate_id(_id, key)
 
+    @timed("hydration")
     def to_domain_entity(self) -> ProductReview:
         return ProductReview(
             id=self.id,
@@ -159,3 +159,5 @@ class LoadedProductOrmModelStub(ProductOrmModelStub):
     reviews = LazyAttribute(
         lambda o: ProductReviewOrmModelStub.build_batch(3, product_id=o.id)
     )
+    review_count = LazyAttribute(lambda o: len(o.reviews))
+    rating_sum = LazyAttribute(lambda o: sum(r.rating for r in o.reviews))
@@ -10,6 +10,7 @@ from sqlalchemy.orm import validates
 
 from . import Base
 from ..helpers import validate_id
+from ..hydration import interned
 from .....domain.entities.product import VAT
 from .....domain.helpers import round_decimal
 
@@ -27,6 +28,7 @@ class VatOrmModel(Base):
             raise TypeError
         return validate_id(_id, key)
 
+    @interned
     def to_domain_entity(self) -> VAT:
         return VAT(
             id=UUID(bytes=self.id),
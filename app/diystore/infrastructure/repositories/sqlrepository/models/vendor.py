@@ -6,6 +6,7 @@ from sqlalchemy.orm import relationship
 
 from . import Base
 from ..helpers import validate_id
+from ..hydration import interned
 from .....domain.entities.product import ProductVendor
 
 
@@ -22,6 +23,7 @@ class ProductVendorOrmModel(Base):
     def _validate_id(self, key, _id):
         return validate_id(_id, key)
 
+    @interned
     def to_domain_entity(self) -> ProductVendor:
         return ProductVendor(
             id=self.id,
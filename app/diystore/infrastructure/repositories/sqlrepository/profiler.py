@@ -0,0 +1,227 @@
+import re
+from time import perf_counter
+from collections import Counter
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ...instrumentation import DBOperation
+from ...instrumentation import get_db_operation
+
+
+_explain_prefixes = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+}
+
+
+@dataclass
+class StatementProfile:
+    statement: str
+    duration: float
+    # None when the driver does not report it, e.g. SQLite for queries
+    rows: Optional[int]
+    plan: Optional[list[tuple]] = None
+
+
+@dataclass
+class CallProfile:
+    """Statements executed by one call of a repository method."""
+
+    method: str
+    statements: list[StatementProfile] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return sum(s.duration for s in self.statements)
+
+    @property
+    def rows(self) -> int:
+        return sum(s.rows for s in self.statements if s.rows is not None)
+
+    def find_repeated_statements(self, threshold: int = 2) -> dict[str, int]:
+        """Returns the queries executed at least ``threshold`` times in the
+        call, which is the mark of N+1 loads."""
+        counts = Counter(
+            s.statement for s in self.statements if _is_select(s.statement)
+        )
+        return {s: n for s, n in counts.items() if n >= threshold}
+
+
+@dataclass
+class MethodSummary:
+    calls: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    duration: float = 0
+    rows: int = 0
+
+
+class QueryBudgetExceeded(AssertionError):
+    ...
+
+
+def _is_select(statement: str) -> bool:
+    return statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+
+def _shorten(statement: str, length: int = 120) -> str:
+    statement = re.sub(r"\s+", " ", statement).strip()
+    return statement if len(statement) <= length else statement[: length - 3] + "..."
+
+
+class QueryProfiler:
+    """Records the statements executed on an engine, grouped by the call of
+    the repository method that executed them.
+
+    Statements taking at least ``slow_query_threshold`` seconds have their
+    query plan recorded, and calls executing the same query at least
+    ``n_plus_one_threshold`` times are flagged as N+1 loads.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        slow_query_threshold: float = 0.1,
+        n_plus_one_threshold: int = 2,
+    ):
+        self._engine = engine
+        self.slow_query_threshold = slow_query_threshold
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.calls: list[CallProfile] = []
+        self._current: dict[DBOperation, CallProfile] = {}
+
+    def start(self):
+        event.listen(self._engine, "before_cursor_execute", self._before_execute)
+        event.listen(self._engine, "after_cursor_execute", self._after_execute)
+
+    def stop(self):
+        event.remove(self._engine, "before_cursor_execute", self._before_execute)
+        event.remove(self._engine, "after_cursor_execute", self._after_execute)
+        self._current.clear()
+
+    def __enter__(self) -> "QueryProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        self.calls.clear()
+        self._current.clear()
+
+    def _get_call(self) -> CallProfile:
+        operation = get_db_operation()
+        if operation is None:
+            call = CallProfile("other")
+            self.calls.append(call)
+            return call
+        # calls are told apart by their operation, as the statements of
+        # concurrent calls can interleave
+        call = self._current.get(operation)
+        if call is None:
+            call = self._current[operation] = CallProfile(operation.name)
+            self.calls.append(call)
+        return call
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        context._profiler_start = perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        duration = perf_counter() - context._profiler_start
+        profile = StatementProfile(
+            statement=statement,
+            duration=duration,
+            rows=cursor.rowcount if cursor.rowcount >= 0 else None,
+        )
+        if duration >= self.slow_query_threshold and not many:
+            profile.plan = self._explain(conn, statement, parameters)
+        self._get_call().statements.append(profile)
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[list[tuple]]:
+        prefix = _explain_prefixes.get(conn.dialect.name)
+        if prefix is None or not _is_select(statement):
+            return None
+        # a new DBAPI cursor, which does not fire engine events and leaves
+        # the results of the profiled statement untouched
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [tuple(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def summarize(self) -> dict[str, MethodSummary]:
+        summaries: dict[str, MethodSummary] = defaultdict(MethodSummary)
+        for call in self.calls:
+            summary = summaries[call.method]
+            summary.calls += 1
+            summary.statements += len(call.statements)
+            summary.max_statements = max(summary.max_statements, len(call.statements))
+            summary.duration += call.duration
+            summary.rows += call.rows
+        return dict(summaries)
+
+    def find_n_plus_one(self) -> dict[str, dict[str, int]]:
+        """Returns the repeated queries of the N+1 loads, by method."""
+        found: dict[str, dict[str, int]] = defaultdict(dict)
+        for call in self.calls:
+            repeated = call.find_repeated_statements(self.n_plus_one_threshold)
+            for statement, n in repeated.items():
+                found[call.method][statement] = max(
+                    n, found[call.method].get(statement, 0)
+                )
+        return dict(found)
+
+    def find_slow_statements(self) -> list[tuple[str, StatementProfile]]:
+        return [
+            (call.method, s)
+            for call in self.calls
+            for s in call.statements
+            if s.duration >= self.slow_query_threshold
+        ]
+
+    def assert_budgets(self, allow_n_plus_one: bool = False, **budgets: int):
+        """Asserts that no call of the given methods executed more statements
+        than its budget, and that no call executed N+1 loads."""
+        summaries = self.summarize()
+        errors = [
+            f"{method} executed {summaries[method].max_statements} statements "
+            f"in a call, over its budget of {budget}"
+            for method, budget in budgets.items()
+            if method in summaries and summaries[method].max_statements > budget
+        ]
+        if not allow_n_plus_one:
+            errors.extend(
+                f"{method} executed {n} times: {_shorten(statement)}"
+                for method, statements in self.find_n_plus_one().items()
+                for statement, n in statements.items()
+            )
+        if errors:
+            raise QueryBudgetExceeded("\n".join(errors))
+
+    def report(self) -> str:
+        lines = [
+            f"{'method':<36}{'calls':>7}{'stmts':>7}{'max':>5}{'ms':>10}{'rows':>8}"
+        ]
+        for method, s in sorted(self.summarize().items()):
+            lines.append(
+                f"{method:<36}{s.calls:>7}{s.statements:>7}{s.max_statements:>5}"
+                f"{s.duration * 1000:>10.2f}{s.rows:>8}"
+            )
+        for method, statements in sorted(self.find_n_plus_one().items()):
+            for statement, n in statements.items():
+                lines.append(f"N+1 in {method} ({n} times): {_shorten(statement)}")
+        for method, s in self.find_slow_statements():
+            lines.append(
+                f"slow query in {method} ({s.duration * 1000:.2f} ms): "
+                f"{_shorten(s.statement)}"
+            )
+            lines.extend(f"    {' '.join(map(str, row))}" for row in s.plan or ())
+        return "\n".join(lines)
@@ -1,19 +1,35 @@
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime
 from typing import Optional
 from functools import wraps
 
 from sqlalchemy import Column
+from sqlalchemy import select
+from sqlalchemy import func
+from sqlalchemy import and_
+from sqlalchemy import or_
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import create_engine
+from sqlalchemy.engine import Connection
 from sqlalchemy.exc import ArgumentError
 from pydantic import AnyUrl
 
 from .models import Base
+from .profiler import QueryProfiler
+from .listings import ListingIndex
+from .hydration import hydration_context
+from ...instrumentation import timer
+from ...instrumentation import db_operation
+from ...instrumentation import instrument_engine
+from ...instrumentation import DB_POOL_CHECKOUT_DURATION
 from .models.product import ProductOrmModel
 from .models.product import ProductVendorOrmModel
+from .models.product import recompute_final_prices
+from .models.product import recompute_rating_aggregates
 from .models.categories import TopLevelCategoryOrmModel
 from .models.categories import MidLevelCategoryOrmModel
 from .models.categories import TerminalCategoryOrmModel
@@ -42,6 +58,12 @@ class SQLProductRepository(ProductRepository):
         password: str = None,
         dbname: str = None,
         echo: bool = False,
+        pool_size: int = None,
+        max_overflow: int = None,
+        listings: bool = False,
+        listings_refresh_interval: float = 1.0,
+        listings_rebuild_interval: float = 60.0,
+        metrics: bool = True,
         base=Base,
     ):
         db_url = AnyUrl.build(
@@ -52,12 +74,78 @@ class SQLProductRepository(ProductRepository):
             password=password,
             path=f"/{dbname}" if dbname is not None else None,
         )
+        # sessions are created per call and connections checked out from the
+        # pool, so one repository is safe to share between threads, and
+        # greenlets once the driver is made cooperative (see green.py)
+        pool_options = dict(pool_size=pool_size, max_overflow=max_overflow)
+        if scheme.startswith("sqlite"):
+            # connections are not pooled by size with SQLite
+            pool_options.clear()
         try:
-            self._engine = create_engine(db_url, future=True, echo=echo)
+            self._engine = create_engine(
+                db_url,
+                future=True,
+                echo=echo,
+                **{k: v for k, v in pool_options.items() if v is not None},
+            )
         except ArgumentError:
             raise ValueError(f"invalid url passed as argument: {db_url}")
-        base.metadata.create_all(self._engine)
+        # the engine connects on first use; the schema is managed apart, by
+        # create_schema, so that starting a process costs no round trip
+
+        # with the metrics disabled, the statements and connections are not
+        # observed at all
+        self._metrics = metrics
+        if metrics:
+            instrument_engine(self._engine)
+        self._metadata = base.metadata
         self._session_factory = sessionmaker(self._engine)
+        # the ordered listings selected in memory, by category
+        self._listings = (
+            ListingIndex(
+                listings_refresh_interval, rebuild_interval=listings_rebuild_interval
+            )
+            if listings
+            else None
+        )
+
+    def create_schema(self):
+        """Creates the tables missing from the database."""
+        self._metadata.create_all(self._engine)
+
+    def drop_schema(self):
+        self._metadata.drop_all(self._engine)
+        if self._listings is not None:
+            self._listings.clear()
+
+    def dispose(self, close: bool = True):
+        """Drops the pooled connections. A forked process drops the ones it
+        inherited with ``close=False``, leaving them to its parent."""
+        self._engine.dispose(close=close)
+
+    def profile(self, **options) -> QueryProfiler:
+        """Returns a profiler of the statements executed by the methods of
+        the repository, which records while used as a context manager."""
+        return QueryProfiler(self._engine, **options)
+
+    def connect(self) -> Connection:
+        """Returns a connection from the pool, for the statements executed
+        outside of the methods of the repository."""
+        return self._engine.connect()
+
+    def session(self) -> Session:
+        """Returns a new session, to be closed by the caller."""
+        return self._session_factory()
+
+    @property
+    def dialect(self) -> str:
+        """The name of the dialect of the database."""
+        return self._engine.dialect.name
+
+    @property
+    def metrics(self) -> bool:
+        """Whether the statements and connections are observed."""
+        return self._metrics
 
     @property
     def _session(self) -> Session:
@@ -74,18 +162,36 @@ class SQLProductRepository(ProductRepository):
     def _crud_operation(f):
         @wraps(f)
         def wrapper(self: "SQLProductRepository", *args, **kwargs):
-            with self._session as s:
-                return f(self, *args, **kwargs, _session=s)
+            with timer("db"), db_operation(f.__name__), hydration_context():
+                with self._session as s:
+                    if self._metrics:
+                        # checked out eagerly, to time the wait for it
+                        with DB_POOL_CHECKOUT_DURATION.time():
+                            s.connection()
+                    return f(self, *args, **kwargs, _session=s)
 
         return wrapper
 
     @_crud_operation
     def get_product(
-        self, product_id: UUID, with_reviews: bool = False, _session: Session = None
+        self,
+        product_id: UUID,
+        with_reviews: bool = False,
+        reviews_limit: int = 20,
+        _session: Session = None,
     ) -> Optional[Product]:
         encoded_id = self._encode_uuid(product_id)
         product: ProductOrmModel = _session.get(ProductOrmModel, encoded_id)
-        return product.to_domain_entity(with_reviews) if product else None
+        if product is None:
+            return None
+        if not with_reviews:
+            return product.to_domain_entity()
+        # the first page of the reviews only, the following ones being read
+        # with get_reviews, and the count of all of them
+        return product.to_domain_entity(
+            reviews=self._select_reviews(encoded_id, _session, limit=reviews_limit),
+            review_count=self._count_reviews(encoded_id, _session),
+        )
 
     def _normalize_ranges(
         self, price_min, price_max, rating_min, rating_max
@@ -118,17 +224,50 @@ class SQLProductRepository(ProductRepository):
         )
         query = _session.query(ProductOrmModel).filter(
             ProductOrmModel.category_id == encoded_id,
-            ProductOrmModel.base_price >= p_min,
-            ProductOrmModel.base_price <= p_max,
+            ProductOrmModel.final_price >= p_min,
+            ProductOrmModel.final_price <= p_max,
             ProductOrmModel.rating >= r_min,
             ProductOrmModel.rating <= r_max,
         )
+        # the category chain is loaded by a second query instead of being
+        # repeated in every row of the listing
+        query = query.options(selectinload(ProductOrmModel.category))
         if with_discounts_only:
             query = query.filter(ProductOrmModel.discount_id != None)
         if orderby_attr is not None:
             query = query.order_by(orderby_attr.desc() if descending else orderby_attr)
         return query
 
+    def _get_listed_products(
+        self,
+        category_id: UUID,
+        price_min: Decimal,
+        price_max: Decimal,
+        rating_min: Decimal,
+        rating_max: Decimal,
+        with_discounts_only: bool,
+        orderby_attr: Column,
+        descending: bool,
+        _session: Session,
+    ) -> tuple[Product]:
+        ids = self._listings.select(
+            _session,
+            self._encode_uuid(category_id),
+            orderby_attr.key,
+            *self._normalize_ranges(price_min, price_max, rating_min, rating_max),
+            with_discounts_only=with_discounts_only,
+            descending=descending,
+        )
+        if not ids:
+            return ()
+        query = (
+            _session.query(ProductOrmModel)
+            .filter(ProductOrmModel.id.in_(ids))
+            .options(selectinload(ProductOrmModel.category))
+        )
+        products = {p.id: p for p in query}
+        return tuple(products[_id].to_domain_entity() for _id in ids if _id in products)
+
     def _get_products(
         self,
         category_id: UUID,
@@ -141,6 +280,18 @@ class SQLProductRepository(ProductRepository):
         descending: bool = False,
         _session: Session = None,
     ) -> tuple[Product]:
+        if self._listings is not None and orderby_attr is not None:
+            return self._get_listed_products(
+                category_id,
+                price_min,
+                price_max,
+                rating_min,
+                rating_max,
+                with_discounts_only,
+                orderby_attr,
+                descending,
+                _session,
+            )
         query = self._generate_get_products_query(
             category_id,
             _session,
@@ -213,7 +364,7 @@ class SQLProductRepository(ProductRepository):
         descending: bool = False,
         _session: Session = None,
     ) -> tuple[Product]:
-        orderby_attr = ProductOrmModel.base_price
+        orderby_attr = ProductOrmModel.final_price
         return self._get_products(
             category_id,
             price_min,
@@ -312,18 +463,96 @@ class SQLProductRepository(ProductRepository):
             return orm_review.to_domain_entity()
         return None
 
+    @staticmethod
+    def _product_exists(encoded_id: bytes, _session: Session) -> bool:
+        query = select(ProductOrmModel.id).where(ProductOrmModel.id == encoded_id)
+        return _session.scalar(query) is not None
+
     @_crud_operation
     def get_reviews(
-        self, product_id: UUID, _session: Session
+        self,
+        product_id: UUID,
+        limit: int = None,
+        after_date: datetime = None,
+        after_id: UUID = None,
+        _session: Session = None,
     ) -> Optional[tuple[ProductReview]]:
         encoded_id = self._encode_uuid(product_id)
-        product = (
-            _session.get(
-                ProductOrmModel,
-                encoded_id,
-                options=(joinedload(ProductOrmModel.reviews),),
+        if not self._product_exists(encoded_id, _session):
+            return None
+        return self._select_reviews(encoded_id, _session, limit, after_date, after_id)
+
+    def _select_reviews(
+        self,
+        encoded_id: bytes,
+        _session: Session,
+        limit: int = None,
+        after_date: datetime = None,
+        after_id: UUID = None,
+    ) -> tuple[ProductReview]:
+        review = ProductReviewOrmModel
+        query = (
+            select(review)
+            .where(review.product_id == encoded_id)
+            .order_by(review.creation_date.desc(), review.id.desc())
+        )
+        if after_date is not None and after_id is not None:
+            query = query.where(
+                or_(
+                    review.creation_date < after_date,
+                    and_(
+                        review.creation_date == after_date,
+                        review.id < self._encode_uuid(after_id),
+                    ),
+                )
             )
+        if limit is not None:
+            query = query.limit(limit)
+        return tuple(r.to_domain_entity() for r in _session.scalars(query))
+
+    @_crud_operation
+    def count_reviews(
+        self, product_id: UUID, _session: Session = None
+    ) -> Optional[int]:
+        encoded_id = self._encode_uuid(product_id)
+        if not self._product_exists(encoded_id, _session):
+            return None
+        return self._count_reviews(encoded_id, _session)
+
+    @staticmethod
+    def _count_reviews(encoded_id: bytes, _session: Session) -> int:
+        query = select(func.count(ProductReviewOrmModel.id)).where(
+            ProductReviewOrmModel.product_id == encoded_id
         )
-        if product is not None:
-            return tuple(r.to_domain_entity() for r in product.reviews)
-        return None
+        return _session.scalar(query)
+
+    @_crud_operation
+    def recompute_final_prices(
+        self,
+        vat_id: UUID = None,
+        discount_id: UUID = None,
+        batch_size: int = 1000,
+        _session: Session = None,
+    ) -> int:
+        criteria = []
+        if vat_id is not None:
+            criteria.append(ProductOrmModel.vat_id == self._encode_uuid(vat_id))
+        if discount_id is not None:
+            criteria.append(
+                ProductOrmModel.discount_id == self._encode_uuid(discount_id)
+            )
+        updated = recompute_final_prices(
+            _session.connection(), *criteria, batch_size=batch_size
+        )
+        _session.commit()
+        return updated
+
+    @_crud_operation
+    def recompute_rating_aggregates(
+        self, batch_size: int = 1000, _session: Session = None
+    ) -> int:
+        updated = recompute_rating_aggregates(
+            _session.connection(), batch_size=batch_size
+        )
+        _session.commit()
+        return updated
@@ -1,5 +1,10 @@
+import gc
 from distutils.util import strtobool
 from os import getenv
+from os import environ
+from os import makedirs
+from shutil import rmtree
+from tempfile import gettempdir
 from multiprocessing import cpu_count
 
 
@@ -8,7 +13,80 @@ _port = getenv("PORT", 5050)
 bind = f"{_host}:{_port}"
 
 workers = int(getenv("WEB_CONCURRENCY", cpu_count() * 2))
-threads = 1
+# sync, gthread or gevent (installed with the gevent extra). Requests mostly
+# wait on the database and the cache, which threads and greenlets overlap
+worker_class = getenv("WEB_WORKER_CLASS", "sync")
+threads = int(getenv("WEB_THREADS", 1))
+worker_connections = int(getenv("WEB_WORKER_CONNECTIONS", 1000))
 reload = bool(strtobool(getenv("WEB_RELOAD", "false")))
+# the app is loaded once in the master and shared copy on write by the
+# workers, unless reloading, which needs every worker to load it, or with
+# gevent: the app would be imported before the workers patch the standard
+# library, its locks then blocking every greenlet of the worker
+preload_app = (
+    bool(strtobool(getenv("WEB_PRELOAD", "true")))
+    and not reload
+    and worker_class != "gevent"
+)
 
 accesslog = "-"
+
+# the workers write their metrics to this directory, so that they are
+# aggregated across workers when /metrics is scraped
+_metrics_dir = getenv("PROMETHEUS_MULTIPROC_DIR", f"{gettempdir()}/diystore-metrics")
+environ["PROMETHEUS_MULTIPROC_DIR"] = _metrics_dir
+
+
+# every thread of a worker may hold a connection
+if threads > 1:
+    environ.setdefault("DATABASE_POOL_SIZE", str(threads))
+
+
+def on_starting(server):
+    rmtree(_metrics_dir, ignore_errors=True)
+    makedirs(_metrics_dir)
+    if server.cfg.preload_app:
+        from diystore.api.flaskrestapi import preload
+
+        # gunicorn imports the app before this hook, with the collections
+        # enabled; the controller, its engine and the mappers are then built
+        # without collections, which would scatter the objects shared with
+        # the workers. Everything loaded so far is frozen and left out of the
+        # collections of the master
+        gc.disable()
+        preload()
+        gc.freeze()
+        gc.enable()
+
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        # the objects of the master are left out of the collections of the
+        # workers, which would otherwise write to, and copy, their pages
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from diystore.api.flaskrestapi import reset_after_fork
+
+        reset_after_fork()
+
+
+def worker_exit(server, worker):
+    from diystore.api.flaskrestapi import shutdown
+
+    shutdown()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    if "gevent" in worker.cfg.worker_class_str:
+        from diystore.infrastructure.repositories.sqlrepository.green import make_psycopg2_cooperative
+
+        make_psycopg2_cooperative()
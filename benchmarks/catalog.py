@@ -0,0 +1,76 @@
+from uuid import UUID
+from itertools import cycle
+from functools import lru_cache
+from dataclasses import dataclass
+
+from diystore.domain.entities.product import calculate_average_rating
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import VatOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import DiscountOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductVendorOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import TerminalCategoryOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductReviewOrmModelStub
+
+
+@dataclass(frozen=True)
+class Catalog:
+    repo: SQLProductRepository
+    size: int
+    top_category_id: UUID
+    mid_category_id: UUID
+    category_id: UUID
+    vendor_id: UUID
+    product_id: UUID
+    review_id: UUID
+
+
+@lru_cache(maxsize=None)
+def seed_catalog(size: int, reviews: int = 20) -> Catalog:
+    """Creates an in-memory SQLite catalog with ``size`` products in a single
+    terminal category, sharing a few VATs, discounts and vendors. Products
+    keep the stubs random ratings and the first one gets ``reviews``
+    reviews."""
+    repo = SQLProductRepository(scheme="sqlite", host="/:memory:")
+    repo.create_schema()
+    category = TerminalCategoryOrmModelStub()
+    vats = VatOrmModelStub.build_batch(3)
+    discounts = [None, *DiscountOrmModelStub.build_batch(2)]
+    vendors = ProductVendorOrmModelStub.build_batch(10)
+    products = [
+        ProductOrmModelStub(
+            category_id=category.id,
+            category=category,
+            vat_id=vat.id,
+            vat=vat,
+            discount_id=discount.id if discount else None,
+            discount=discount,
+            vendor_id=vendor.id,
+            vendor=vendor,
+        )
+        for _, vat, discount, vendor in zip(
+            range(size), cycle(vats), cycle(discounts), cycle(vendors)
+        )
+    ]
+    product_reviews = ProductReviewOrmModelStub.build_batch(
+        reviews, product_id=products[0].id
+    )
+    products[0].review_count = len(product_reviews)
+    products[0].rating_sum = sum(r.rating for r in product_reviews)
+    products[0].rating = calculate_average_rating(
+        products[0].review_count, products[0].rating_sum
+    )
+    catalog = Catalog(
+        repo=repo,
+        size=size,
+        top_category_id=UUID(bytes=category.parent.parent.id),
+        mid_category_id=UUID(bytes=category.parent.id),
+        category_id=UUID(bytes=category.id),
+        vendor_id=UUID(bytes=vendors[0].id),
+        product_id=UUID(bytes=products[0].id),
+        review_id=UUID(bytes=product_reviews[0].id),
+    )
+    with repo._session as s:
+        s.add_all((*products, *product_reviews))
+        s.commit()
+    return catalog
@@ -0,0 +1,215 @@
+import os
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from .catalog import Catalog
+from .catalog import seed_catalog
+from tests.fakes import FakeRedisRepresentationCache
+from .harness import Benchmark
+from .harness import generate_results
+from .harness import save_results
+from .harness import load_results
+from .harness import compare_results
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.controllers.web.factories import ProductControllerFactory
+
+
+RESULTS_DIR = Path(__file__).parent / ".results"
+
+_benchmarks_key = pytest.StashKey[list]()
+_results_key = pytest.StashKey[dict]()
+_comparisons_key = pytest.StashKey[list]()
+
+
+def pytest_addoption(parser: pytest.Parser):
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-sizes",
+        default="100,1000,10000",
+        help="Comma separated catalog sizes (default: 100,1000,10000).",
+    )
+    group.addoption(
+        "--benchmark-max-time",
+        type=float,
+        default=1.0,
+        help="Maximum time spent on each benchmark, in seconds (default: 1).",
+    )
+    group.addoption(
+        "--benchmark-min-rounds",
+        type=int,
+        default=5,
+        help="Minimum rounds of each benchmark (default: 5).",
+    )
+    group.addoption(
+        "--benchmark-json", metavar="PATH", help="Save the results to PATH."
+    )
+    group.addoption(
+        "--benchmark-autosave",
+        action="store_true",
+        help=f"Save the results to {RESULTS_DIR.name}/<datetime>_<commit>.json.",
+    )
+    group.addoption(
+        "--benchmark-compare",
+        metavar="PATH",
+        help="Compare the results with the ones previously saved to PATH.",
+    )
+    group.addoption(
+        "--benchmark-compare-fail",
+        metavar="PERCENT",
+        type=float,
+        help="Fail if any median is PERCENT slower than the compared results.",
+    )
+
+
+def pytest_configure(config: pytest.Config):
+    config.stash[_benchmarks_key] = []
+
+
+def _get_sizes(config: pytest.Config) -> list[int]:
+    return [int(s) for s in config.getoption("benchmark_sizes").split(",")]
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc):
+    if "catalog_size" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "catalog_size", _get_sizes(metafunc.config), scope="session"
+        )
+
+
+@pytest.fixture(scope="session")
+def catalog(catalog_size: int) -> Catalog:
+    return seed_catalog(catalog_size)
+
+
+@pytest.fixture(scope="session")
+def smallest_catalog(pytestconfig: pytest.Config) -> Catalog:
+    return seed_catalog(min(_get_sizes(pytestconfig)))
+
+
+@pytest.fixture
+def cache() -> FakeRedisRepresentationCache:
+    return FakeRedisRepresentationCache()
+
+
+@pytest.fixture
+def make_controller(cache: FakeRedisRepresentationCache):
+    def make(catalog: Catalog) -> ProductController:
+        return ProductControllerFactory(repo=catalog.repo, cache=cache)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def app() -> Flask:
+    os.environ.setdefault("API_CACHE_CONTROL__MAX_AGE", "60")
+    from diystore.api.flaskrestapi import create_app
+
+    return create_app()
+
+
+@pytest.fixture
+def make_client(app: Flask, make_controller, monkeypatch: pytest.MonkeyPatch):
+    from diystore.api.flaskrestapi import blueprints
+
+    def make(catalog: Catalog) -> FlaskClient:
+        monkeypatch.setattr(blueprints, "product_controller", make_controller(catalog))
+        return app.test_client()
+
+    return make
+
+
+@pytest.fixture
+def benchmark(request: pytest.FixtureRequest) -> Benchmark:
+    config = request.config
+    group = request.node.module.__name__.rsplit(".", 1)[-1].removeprefix("test_")
+    callspec = getattr(request.node, "callspec", None)
+    bench = Benchmark(
+        name=f"{group}::{request.node.name}",
+        group=group,
+        params={k: str(v) for k, v in callspec.params.items()} if callspec else {},
+        min_rounds=config.getoption("benchmark_min_rounds"),
+        max_time=config.getoption("benchmark_max_time"),
+    )
+    yield bench
+    if bench.has_results:
+        config.stash[_benchmarks_key].append(bench)
+
+
+def _get_autosave_path(results: dict) -> Path:
+    commit_id = (results["commit"]["id"] or "unversioned")[:8]
+    timestamp = results["datetime"][:19].replace(":", "")
+    return RESULTS_DIR / f"{timestamp}_{commit_id}.json"
+
+
+def pytest_sessionfinish(session: pytest.Session):
+    config = session.config
+    benchmarks = config.stash.get(_benchmarks_key, [])
+    if not benchmarks:
+        return
+    results = config.stash[_results_key] = generate_results(benchmarks)
+    if path := config.getoption("benchmark_json"):
+        save_results(results, path)
+    if config.getoption("benchmark_autosave"):
+        RESULTS_DIR.mkdir(exist_ok=True)
+        save_results(results, _get_autosave_path(results))
+    if path := config.getoption("benchmark_compare"):
+        comparisons = compare_results(load_results(path), results)
+        config.stash[_comparisons_key] = comparisons
+        threshold = config.getoption("benchmark_compare_fail")
+        if threshold is not None and any(
+            c.change * 100 > threshold for c in comparisons
+        ):
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def _format_time(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * factor >= 1:
+            return f"{seconds * factor:.2f}{unit}"
+    return f"{seconds * 1e9:.0f}ns"
+
+
+def _format_size(size: int) -> str:
+    for unit, factor in (("MiB", 2**20), ("KiB", 2**10)):
+        if size >= factor:
+            return f"{size / factor:.1f}{unit}"
+    return f"{size}B"
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config):
+    results = config.stash.get(_results_key, None)
+    if results is None:
+        return
+    tr = terminalreporter
+    width = max(len(b["name"]) for b in results["benchmarks"])
+    timed = [b for b in results["benchmarks"] if b["stats"]]
+    if timed:
+        tr.write_sep("-", "benchmarks (median, mean, ops/s, rounds)")
+    for b in timed:
+        stats = b["stats"]
+        tr.write_line(
+            f"{b['name']:<{width}}  {_format_time(stats['median']):>10}  "
+            f"{_format_time(stats['mean']):>10}  {stats['ops']:>12.1f}  "
+            f"{stats['rounds']:>6}"
+            + "".join(f"  {k}={v}" for k, v in b.get("extra_info", {}).items())
+        )
+    measured = [b for b in results["benchmarks"] if b["memory"]]
+    if measured:
+        tr.write_sep("-", "memory (retained, peak)")
+    for b in measured:
+        memory = b["memory"]
+        tr.write_line(
+            f"{b['name']:<{width}}  {_format_size(memory['retained']):>10}  "
+            f"{_format_size(memory['peak']):>10}"
+        )
+    comparisons = config.stash.get(_comparisons_key, None)
+    if comparisons:
+        tr.write_sep("-", "median change from compared results")
+        for c in comparisons:
+            tr.write_line(
+                f"{c.name:<{width}}  {_format_time(c.previous):>10} -> "
+                f"{_format_time(c.current):>10}  {c.change:+.1%}"
+            )
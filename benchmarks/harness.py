@@ -0,0 +1,192 @@
+import gc
+import json
+import platform
+import subprocess
+import tracemalloc
+from math import ceil
+from time import perf_counter
+from statistics import mean
+from statistics import median
+from statistics import stdev
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import asdict
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from pendulum import now
+
+
+@dataclass(frozen=True)
+class BenchmarkStats:
+    rounds: int
+    iterations: int
+    min: float
+    max: float
+    mean: float
+    median: float
+    stddev: float
+
+    @property
+    def ops(self) -> float:
+        return 1 / self.mean if self.mean else 0
+
+    @classmethod
+    def from_timings(cls, timings: list[float], iterations: int) -> "BenchmarkStats":
+        return cls(
+            rounds=len(timings),
+            iterations=iterations,
+            min=min(timings),
+            max=max(timings),
+            mean=mean(timings),
+            median=median(timings),
+            stddev=stdev(timings) if len(timings) > 1 else 0,
+        )
+
+
+@dataclass(frozen=True)
+class MemoryStats:
+    # bytes allocated by the call and still held after it, e.g. its result
+    retained: int
+    peak: int
+
+
+def measure_memory(function: Callable, *args, **kwargs) -> tuple[Any, MemoryStats]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function(*args, **kwargs)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, MemoryStats(retained=retained, peak=peak)
+
+
+@dataclass
+class Benchmark:
+    """Times a function pytest-benchmark style: a calibration call decides how
+    many iterations make up a round so that each round lasts at least
+    ``min_time``, and rounds are repeated until ``max_time`` is spent (but at
+    least ``min_rounds`` times)."""
+
+    name: str
+    group: Optional[str] = None
+    params: dict = field(default_factory=dict)
+    min_rounds: int = 5
+    min_time: float = 0.000_1
+    max_time: float = 1.0
+    stats: Optional[BenchmarkStats] = None
+    memory: Optional[MemoryStats] = None
+    # reported along the stats, e.g. the sizes of compressed payloads
+    extra_info: dict = field(default_factory=dict)
+
+    def _calibrate(self, function: Callable, args: tuple, kwargs: dict):
+        start = perf_counter()
+        result = function(*args, **kwargs)
+        duration = max(perf_counter() - start, 1e-9)
+        iterations = max(1, ceil(self.min_time / duration))
+        rounds = max(self.min_rounds, int(self.max_time / (duration * iterations)))
+        return result, iterations, rounds
+
+    def __call__(self, function: Callable, *args, **kwargs):
+        if self.stats is not None:
+            raise RuntimeError(f"benchmark {self.name} was already run")
+        result, iterations, rounds = self._calibrate(function, args, kwargs)
+        timings = []
+        for _ in range(rounds):
+            start = perf_counter()
+            for _ in range(iterations):
+                function(*args, **kwargs)
+            timings.append((perf_counter() - start) / iterations)
+        self.stats = BenchmarkStats.from_timings(timings, iterations)
+        return result
+
+    def measure_memory(self, function: Callable, *args, **kwargs):
+        """Measures the memory allocated by a single call, with tracemalloc."""
+        result, self.memory = measure_memory(function, *args, **kwargs)
+        return result
+
+    @property
+    def has_results(self) -> bool:
+        return self.stats is not None or self.memory is not None
+
+    def as_dict(self) -> dict:
+        return dict(
+            name=self.name,
+            group=self.group,
+            params=self.params,
+            stats=dict(asdict(self.stats), ops=self.stats.ops) if self.stats else None,
+            memory=asdict(self.memory) if self.memory else None,
+            extra_info=self.extra_info,
+        )
+
+
+def _get_commit_info() -> dict:
+    def git(*args) -> str:
+        return subprocess.run(
+            ("git", *args), capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return dict(id=git("rev-parse", "HEAD"), dirty=bool(git("status", "-s")))
+    except (OSError, subprocess.CalledProcessError):
+        return dict(id=None, dirty=None)
+
+
+def _get_machine_info() -> dict:
+    return dict(
+        node=platform.node(),
+        processor=platform.processor(),
+        machine=platform.machine(),
+        system=platform.system(),
+        release=platform.release(),
+        python_implementation=platform.python_implementation(),
+        python_version=platform.python_version(),
+    )
+
+
+def generate_results(benchmarks: list[Benchmark]) -> dict:
+    return dict(
+        datetime=now("UTC").isoformat(),
+        commit=_get_commit_info(),
+        machine=_get_machine_info(),
+        benchmarks=[b.as_dict() for b in benchmarks if b.has_results],
+    )
+
+
+def save_results(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4)
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+@dataclass(frozen=True)
+class BenchmarkComparison:
+    name: str
+    previous: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Relative change of the median, positive when it got slower."""
+        return (self.current - self.previous) / self.previous
+
+
+def compare_results(previous: dict, current: dict) -> list[BenchmarkComparison]:
+    previous_medians = {
+        b["name"]: b["stats"]["median"]
+        for b in previous["benchmarks"]
+        if b.get("stats")
+    }
+    return [
+        BenchmarkComparison(
+            b["name"], previous_medians[b["name"]], b["stats"]["median"]
+        )
+        for b in current["benchmarks"]
+        if b["name"] in previous_medians and b.get("stats")
+    ]
@@ -0,0 +1,214 @@
+"""Load tests the api served by gunicorn with a realistic traffic mix.
+
+Run from the repository root with the application on the path:
+
+    PYTHONPATH=app python -m benchmarks.loadtest --seed-products 5000 -w 4
+
+The catalog is seeded into a SQLite file by default; pass ``--database-url``
+to test against an existing Postgres database (with ``--seed-products 0``
+to use its data as is).
+
+Worker classes are compared by repeating ``-k``, e.g. with the database and
+cache round trips of a network (``--io-latency``):
+
+    PYTHONPATH=app python -m benchmarks.loadtest -k sync -k gthread -k gevent \
+        -t 8 --io-latency 2
+"""
+import os
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from time import monotonic
+from typing import Optional
+
+
+# the api settings are loaded at import time and must be valid even though
+# the load test provides its own repository and cache to the server
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/diystore")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("API_CACHE_CONTROL__MAX_AGE", "60")
+
+from .catalog import build_repository
+from .catalog import seed_catalog
+from .catalog import collect_targets
+from .traffic import DEFAULT_MIX
+from .traffic import TrafficMix
+from .traffic import parse_mix
+from .runner import LoadReport
+from .runner import run_load
+from .server import CacheCounters
+from .server import LoadTestServer
+from .server import get_free_port
+from .server import start_server
+from .server import wait_for_port
+from .server import wait_for_response
+from .server import measure_workers_memory
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest",
+        description="Load tests the api with a realistic traffic mix.",
+    )
+    parser.add_argument(
+        "--database-url",
+        help="SQLAlchemy url of the database (default: a temporary SQLite file).",
+    )
+    parser.add_argument(
+        "--seed-products",
+        type=int,
+        default=2000,
+        help="Number of products added to the database before the test.",
+    )
+    parser.add_argument(
+        "--categories", type=int, default=20, help="Number of seeded categories."
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, help="Gunicorn workers (default: its config)."
+    )
+    parser.add_argument(
+        "-t", "--threads", type=int, help="Gunicorn threads (default: its config)."
+    )
+    parser.add_argument(
+        "-k",
+        "--worker-class",
+        action="append",
+        help="Gunicorn worker class (default: its config). Repeat it to "
+        "compare worker classes.",
+    )
+    parser.add_argument(
+        "--no-preload",
+        dest="preload",
+        action="store_false",
+        help="Load the app in every worker instead of once in the master.",
+    )
+    parser.add_argument(
+        "--io-latency",
+        type=float,
+        default=0,
+        help="Milliseconds waited on every statement and cache operation.",
+    )
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=16, help="Concurrent clients."
+    )
+    parser.add_argument(
+        "-d", "--duration", type=float, default=30, help="Duration in seconds."
+    )
+    parser.add_argument(
+        "-n", "--requests", type=int, help="Stop after this number of requests."
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Weights of the routes (default: "
+        + ",".join(f"{r}={w}" for r, w in DEFAULT_MIX.items())
+        + ").",
+    )
+    parser.add_argument(
+        "--zipf", type=float, default=1.1, help="Zipf exponent of the ids."
+    )
+    parser.add_argument("--random-seed", type=int, help="Seed of the traffic.")
+    parser.add_argument("--json", type=Path, help="Also save the report as JSON.")
+    return parser.parse_args()
+
+
+def _run(
+    args: argparse.Namespace,
+    database_url: str,
+    mix: TrafficMix,
+    worker_class: Optional[str],
+) -> LoadReport:
+    counters = CacheCounters()
+    port = get_free_port()
+    # gunicorn serves sync workers with threads when given some
+    threads = 1 if worker_class == "sync" else args.threads
+    options = dict(
+        workers=args.workers,
+        threads=threads,
+        worker_class=worker_class,
+        # like gunicorn.conf.py, gevent workers load the app themselves
+        preload_app=args.preload and worker_class != "gevent",
+    )
+    server = LoadTestServer(
+        database_url,
+        counters,
+        io_latency=args.io_latency / 1000,
+        bind=f"127.0.0.1:{port}",
+        accesslog=None,
+        reload=False,
+        **{k: v for k, v in options.items() if v is not None},
+    )
+    start = monotonic()
+    process = start_server(server)
+    try:
+        wait_for_port(port)
+        wait_for_response(port, "/vendors")
+        startup = monotonic() - start
+        print(f"Replaying traffic on port {port}...")
+        report = run_load(
+            port,
+            mix,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            max_requests=args.requests,
+            seed=args.random_seed,
+        )
+        report.workers_memory = measure_workers_memory(process.pid)
+    finally:
+        process.terminate()
+        process.join()
+    report.startup = startup
+    report.cache_hits = counters.hits.value
+    report.cache_misses = counters.misses.value
+    return report
+
+
+def _compare(reports: dict[str, LoadReport]) -> str:
+    lines = [f"{'worker class':<14}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}"]
+    for worker_class, report in reports.items():
+        overall = report.overall.summary()
+        lines.append(
+            f"{worker_class:<14}{report.throughput:>9.1f}"
+            f"{overall['p50'] * 1000:>9.1f}{overall['p99'] * 1000:>9.1f}"
+            f"{overall['errors']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    args = _parse_args()
+    reports: dict[str, LoadReport] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/loadtest.db"
+        repo = build_repository(database_url)
+        repo.create_schema()
+        if args.seed_products:
+            print(f"Seeding {args.seed_products} products...")
+            seed_catalog(
+                repo, args.seed_products, args.categories, seed=args.random_seed
+            )
+        mix = TrafficMix(collect_targets(repo), args.mix, args.zipf, args.random_seed)
+        repo._engine.dispose()
+
+        for worker_class in args.worker_class or [None]:
+            if worker_class is not None:
+                print(f"Worker class {worker_class}")
+            report = reports[worker_class or "default"] = _run(
+                args, database_url, mix, worker_class
+            )
+            print(report)
+    if len(reports) == 1:
+        if args.json:
+            args.json.write_text(report.json())
+        return
+    print()
+    print(_compare(reports))
+    if args.json:
+        results = {k: r.as_dict() for k, r in reports.items()}
+        args.json.write_text(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
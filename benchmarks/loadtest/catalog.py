@@ -0,0 +1,124 @@
+from random import Random
+from itertools import cycle
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+
+from diystore.domain.entities.product import calculate_average_rating
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository import ProductOrmModel
+from diystore.infrastructure.repositories.sqlrepository import ProductReviewOrmModel
+from diystore.infrastructure.repositories.sqlrepository import ProductVendorOrmModel
+from diystore.infrastructure.repositories.sqlrepository import TopLevelCategoryOrmModel
+from diystore.infrastructure.repositories.sqlrepository import MidLevelCategoryOrmModel
+from diystore.infrastructure.repositories.sqlrepository import TerminalCategoryOrmModel
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import VatOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import DiscountOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductVendorOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import TopLevelCategoryOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import MidLevelCategoryOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import TerminalCategoryOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductReviewOrmModelStub
+
+
+def build_repository(database_url: str) -> SQLProductRepository:
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        # the repository builds "sqlite://<host>", so the path goes in the host
+        return SQLProductRepository(scheme="sqlite", host=f"/{url.database}")
+    return SQLProductRepository(
+        scheme=url.drivername,
+        host=url.host,
+        port=url.port,
+        user=url.username,
+        password=url.password,
+        dbname=url.database,
+    )
+
+
+def seed_catalog(
+    repo: SQLProductRepository,
+    products: int,
+    categories: int = 20,
+    reviewed_ratio: float = 0.2,
+    reviews_per_product: int = 5,
+    seed: int = None,
+):
+    """Adds ``products`` products spread over ``categories`` terminal
+    categories (grouped under a few mid and top level categories). A
+    ``reviewed_ratio`` of them get ``reviews_per_product`` reviews."""
+    rng = Random(seed)
+    tops = TopLevelCategoryOrmModelStub.build_batch(max(1, categories // 10))
+    mids = [
+        MidLevelCategoryOrmModelStub(parent_id=top.id, parent=top)
+        for top, _ in zip(cycle(tops), range(max(1, categories // 4)))
+    ]
+    terminals = [
+        TerminalCategoryOrmModelStub(parent_id=mid.id, parent=mid)
+        for mid, _ in zip(cycle(mids), range(categories))
+    ]
+    vats = VatOrmModelStub.build_batch(3)
+    discounts = [None, None, *DiscountOrmModelStub.build_batch(2)]
+    vendors = ProductVendorOrmModelStub.build_batch(20)
+    new_products, new_reviews = [], []
+    for _ in range(products):
+        category, vat = rng.choice(terminals), rng.choice(vats)
+        discount, vendor = rng.choice(discounts), rng.choice(vendors)
+        product = ProductOrmModelStub(
+            category_id=category.id,
+            category=category,
+            vat_id=vat.id,
+            vat=vat,
+            discount_id=discount.id if discount else None,
+            discount=discount,
+            vendor_id=vendor.id,
+            vendor=vendor,
+        )
+        if rng.random() < reviewed_ratio:
+            reviews = ProductReviewOrmModelStub.build_batch(
+                reviews_per_product, product_id=product.id
+            )
+            product.review_count = len(reviews)
+            product.rating_sum = sum(r.rating for r in reviews)
+            product.rating = calculate_average_rating(
+                product.review_count, product.rating_sum
+            )
+            new_reviews.extend(reviews)
+        new_products.append(product)
+    with repo._session as s:
+        s.add_all((*new_products, *new_reviews))
+        s.commit()
+
+
+@dataclass(frozen=True)
+class Targets:
+    """Hex ids of the catalog entities the traffic is generated for."""
+
+    product_ids: tuple[str, ...]
+    reviewed_product_ids: tuple[str, ...]
+    review_ids: tuple[str, ...]
+    top_category_ids: tuple[str, ...]
+    mid_category_ids: tuple[str, ...]
+    terminal_category_ids: tuple[str, ...]
+    vendor_ids: tuple[str, ...]
+
+
+def collect_targets(repo: SQLProductRepository) -> Targets:
+    def ids(query) -> tuple[str, ...]:
+        return tuple(UUID(bytes=_id).hex for _id in s.scalars(query))
+
+    with repo._session as s:
+        return Targets(
+            product_ids=ids(select(ProductOrmModel.id)),
+            reviewed_product_ids=ids(
+                select(ProductOrmModel.id).where(ProductOrmModel.review_count > 0)
+            ),
+            review_ids=ids(select(ProductReviewOrmModel.id)),
+            top_category_ids=ids(select(TopLevelCategoryOrmModel.id)),
+            mid_category_ids=ids(select(MidLevelCategoryOrmModel.id)),
+            terminal_category_ids=ids(select(TerminalCategoryOrmModel.id)),
+            vendor_ids=ids(select(ProductVendorOrmModel.id)),
+        )
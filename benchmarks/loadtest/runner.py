@@ -0,0 +1,202 @@
+import json
+from random import Random
+from threading import Thread
+from threading import Event
+from time import perf_counter
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
+from http.client import HTTPConnection
+from http.client import HTTPException
+from typing import Optional
+
+from .traffic import TrafficMix
+
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    rank = max(1, round(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return dict(
+            requests=self.requests,
+            errors=self.errors,
+            **{f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+            max=latencies[-1] if latencies else 0,
+        )
+
+
+@dataclass
+class LoadReport:
+    duration: float
+    routes: dict[str, RouteStats]
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # seconds from the start of the server to its first response
+    startup: Optional[float] = None
+    # proportional set size and private memory of each worker, in bytes
+    workers_memory: list[dict] = field(default_factory=list)
+
+    def _mean_worker_memory(self, key: str) -> Optional[float]:
+        values = [m[key] for m in self.workers_memory]
+        return sum(values) / len(values) if values else None
+
+    @property
+    def overall(self) -> RouteStats:
+        stats = RouteStats()
+        for route in self.routes.values():
+            stats.latencies.extend(route.latencies)
+            stats.errors += route.errors
+        return stats
+
+    @property
+    def throughput(self) -> float:
+        return self.overall.requests / self.duration if self.duration else 0
+
+    @property
+    def cache_hit_ratio(self) -> Optional[float]:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    def as_dict(self) -> dict:
+        return dict(
+            duration=self.duration,
+            throughput=self.throughput,
+            cache=dict(
+                hits=self.cache_hits,
+                misses=self.cache_misses,
+                hit_ratio=self.cache_hit_ratio,
+            ),
+            startup=self.startup,
+            workers_memory=self.workers_memory,
+            overall=self.overall.summary(),
+            routes={name: r.summary() for name, r in sorted(self.routes.items())},
+        )
+
+    def json(self) -> str:
+        return json.dumps(self.as_dict(), indent=4)
+
+    def __str__(self):
+        def row(name: str, s: dict) -> str:
+            latencies = "".join(
+                f"{s[k] * 1000:>9.1f}" for k in (*(f"p{p}" for p in PERCENTILES), "max")
+            )
+            return f"{name:<12}{s['requests']:>9}{s['errors']:>8}{latencies}"
+
+        header = (
+            f"{'route':<12}{'requests':>9}{'errors':>8}"
+            + "".join(f"{f'p{p} ms':>9}" for p in PERCENTILES)
+            + f"{'max ms':>9}"
+        )
+        ratio = self.cache_hit_ratio
+        lines = [
+            f"{self.overall.requests} requests in {self.duration:.1f}s "
+            f"({self.throughput:.1f} req/s), cache hit ratio "
+            + (f"{ratio:.1%}" if ratio is not None else "n/a"),
+        ]
+        if self.startup is not None:
+            lines.append(f"first response {self.startup * 1000:.0f} ms after start")
+        if self.workers_memory:
+            lines.append(
+                f"worker memory (mean of {len(self.workers_memory)}): "
+                f"pss {self._mean_worker_memory('pss') / 2**20:.1f} MiB, "
+                f"private {self._mean_worker_memory('private') / 2**20:.1f} MiB"
+            )
+        lines += [
+            "",
+            header,
+            *(row(name, r.summary()) for name, r in sorted(self.routes.items())),
+            row("all", self.overall.summary()),
+        ]
+        return "\n".join(lines)
+
+
+class _Client(Thread):
+    def __init__(
+        self,
+        port: int,
+        mix: TrafficMix,
+        stop: Event,
+        seed: Optional[int],
+        max_requests: Optional[int],
+    ):
+        super().__init__(daemon=True)
+        self._conn = HTTPConnection("127.0.0.1", port, timeout=30)
+        self._mix = mix
+        self._stop_event = stop
+        self._rng = Random(seed)
+        self._max_requests = max_requests
+        self.routes: dict[str, RouteStats] = defaultdict(RouteStats)
+
+    def _request(self, path: str) -> int:
+        self._conn.request("GET", path)
+        response = self._conn.getresponse()
+        response.read()
+        return response.status
+
+    def run(self):
+        sent = 0
+        while not self._stop_event.is_set() and sent != self._max_requests:
+            route, path = self._mix.next_request(self._rng)
+            start = perf_counter()
+            try:
+                status = self._request(path)
+            except (OSError, HTTPException):
+                self._conn.close()
+                status = None
+            latency = perf_counter() - start
+            if status is not None and status < 400:
+                self.routes[route].latencies.append(latency)
+            else:
+                self.routes[route].errors += 1
+            sent += 1
+        self._conn.close()
+
+
+def run_load(
+    port: int,
+    mix: TrafficMix,
+    concurrency: int = 16,
+    duration: float = 30,
+    max_requests: int = None,
+    seed: int = None,
+) -> LoadReport:
+    """Replays the traffic mix from ``concurrency`` clients for
+    ``duration`` seconds, or until each client sent ``max_requests``."""
+    stop = Event()
+    per_client = -(-max_requests // concurrency) if max_requests else None
+    clients = [
+        _Client(port, mix, stop, None if seed is None else seed + i, per_client)
+        for i in range(concurrency)
+    ]
+    start = perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join(max(0, duration - (perf_counter() - start)))
+    stop.set()
+    for client in clients:
+        client.join()
+    routes: dict[str, RouteStats] = defaultdict(RouteStats)
+    for client in clients:
+        for name, stats in client.routes.items():
+            routes[name].latencies.extend(stats.latencies)
+            routes[name].errors += stats.errors
+    return LoadReport(duration=perf_counter() - start, routes=dict(routes))
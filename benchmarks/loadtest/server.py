@@ -0,0 +1,208 @@
+import time
+import socket
+from time import sleep
+from time import monotonic
+from pathlib import Path
+from http.client import HTTPConnection
+from http.client import HTTPException
+from multiprocessing import get_context
+from multiprocessing.sharedctypes import Synchronized
+from typing import Optional
+
+from gunicorn.app.base import Application
+from sqlalchemy import event
+
+from .catalog import build_repository
+from tests.fakes import FakeRedisRepresentationCache
+from diystore.infrastructure.cache.interfaces import Cache
+
+
+GUNICORN_CONF = Path(__file__).parents[2] / "app" / "gunicorn.conf.py"
+
+_mp = get_context("fork")
+
+
+class CacheCounters:
+    """Cache hits and misses shared by the forked server workers."""
+
+    def __init__(self):
+        self.hits: Synchronized = _mp.Value("L", 0)
+        self.misses: Synchronized = _mp.Value("L", 0)
+
+    @staticmethod
+    def _increment(counter: Synchronized):
+        with counter.get_lock():
+            counter.value += 1
+
+    def hit(self):
+        self._increment(self.hits)
+
+    def miss(self):
+        self._increment(self.misses)
+
+
+def _wait_io(latency: float):
+    # looked up on every call, as the gevent workers patch it after the fork
+    if latency:
+        time.sleep(latency)
+
+
+class CountingCache(Cache):
+    """Counts the hits and misses of a cache, and makes every operation wait
+    ``latency`` seconds, the round trip to a Redis server."""
+
+    def __init__(self, cache: Cache, counters: CacheCounters, latency: float = 0):
+        self._cache = cache
+        self._counters = counters
+        self._latency = latency
+
+    def get(self, **kwargs) -> Optional[str]:
+        _wait_io(self._latency)
+        representation = self._cache.get(**kwargs)
+        if representation is None:
+            self._counters.miss()
+        else:
+            self._counters.hit()
+        return representation
+
+    def set(self, representation: str, etag: str = None, **kwargs):
+        _wait_io(self._latency)
+        return self._cache.set(representation, etag, **kwargs)
+
+    def get_etag(self, **kwargs) -> Optional[str]:
+        _wait_io(self._latency)
+        return self._cache.get_etag(**kwargs)
+
+    def get_encoded(self, encoding: str, **kwargs):
+        _wait_io(self._latency)
+        # misses fall back to get, which counts them
+        body, etag = self._cache.get_encoded(encoding, **kwargs)
+        if body is not None:
+            self._counters.hit()
+        return body, etag
+
+    def set_encoded(self, encoding: str, body: bytes, etag: str, **kwargs):
+        _wait_io(self._latency)
+        return self._cache.set_encoded(encoding, body, etag, **kwargs)
+
+    def delete(self, **kwargs):
+        _wait_io(self._latency)
+        return self._cache.delete(**kwargs)
+
+
+class LoadTestServer(Application):
+    """Serves the api with gunicorn, configured by the project's
+    gunicorn.conf.py, against the given database. Every worker gets its own
+    in-process Redis stand-in, so the cache is not shared between workers.
+
+    ``io_latency`` seconds are waited on every statement and cache operation,
+    to load test as if the database and Redis were over the network."""
+
+    def __init__(
+        self,
+        database_url: str,
+        counters: CacheCounters,
+        io_latency: float = 0,
+        **options,
+    ):
+        self._database_url = database_url
+        self._counters = counters
+        self._io_latency = io_latency
+        self._options = options
+        super().__init__()
+
+    def init(self, parser, opts, args):
+        ...
+
+    def load_config(self):
+        self.load_config_from_file(str(GUNICORN_CONF))
+        for key, value in self._options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from diystore.api.flaskrestapi import create_app
+        from diystore.api.flaskrestapi import blueprints
+        from diystore.infrastructure.controllers.web.factories import (
+            ProductControllerFactory,
+        )
+
+        app = create_app()
+        repo = build_repository(self._database_url)
+        if self._io_latency:
+            event.listen(
+                repo._engine,
+                "before_cursor_execute",
+                lambda *_: _wait_io(self._io_latency),
+            )
+        blueprints.product_controller = ProductControllerFactory(
+            repo=repo,
+            cache=CountingCache(
+                FakeRedisRepresentationCache(), self._counters, self._io_latency
+            ),
+        )
+        return app
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            sleep(0.1)
+    raise TimeoutError(f"the server did not start listening on port {port}")
+
+
+def wait_for_response(port: int, path: str, timeout: float = 30):
+    deadline = monotonic() + timeout
+    while monotonic() < deadline:
+        conn = HTTPConnection("127.0.0.1", port, timeout=timeout)
+        try:
+            conn.request("GET", path)
+            if conn.getresponse().status < 500:
+                return
+        except (OSError, HTTPException):
+            sleep(0.01)
+        finally:
+            conn.close()
+    raise TimeoutError(f"the server did not answer {path} on port {port}")
+
+
+def _read_memory(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Pss", "Private_Clean", "Private_Dirty"):
+                values[name] = int(value.split()[0]) * 1024
+    return dict(
+        pss=values["Pss"], private=values["Private_Clean"] + values["Private_Dirty"]
+    )
+
+
+def measure_workers_memory(master_pid: int) -> list[dict]:
+    """Proportional set size and private memory of the workers of a gunicorn
+    master, from /proc (Linux only, an empty list elsewhere)."""
+    memory = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # the name can hold spaces, but is the only field in parentheses
+            ppid = int(stat.read_text().rpartition(")")[2].split()[1])
+            if ppid == master_pid:
+                memory.append(_read_memory(int(stat.parent.name)))
+        except (OSError, ValueError, KeyError):
+            continue
+    return memory
+
+
+def start_server(server: LoadTestServer):
+    process = _mp.Process(target=server.run, daemon=True)
+    process.start()
+    return process
@@ -0,0 +1,144 @@
+from random import Random
+from itertools import accumulate
+from itertools import product
+from urllib.parse import urlencode
+from typing import Callable
+from typing import Sequence
+
+from .catalog import Targets
+
+
+DEFAULT_MIX = dict(product=40, products=30, categories=15, reviews=10, vendors=5)
+
+
+class ZipfSampler:
+    """Samples items with a Zipf distribution: the k-th most popular item is
+    picked with a probability proportional to 1/k^s. Popularity ranks are
+    assigned randomly."""
+
+    def __init__(self, items: Sequence, s: float = 1.1, seed: int = None):
+        if not items:
+            raise ValueError("there are no items to sample")
+        self._items = list(items)
+        Random(seed).shuffle(self._items)
+        self._cum_weights = list(
+            accumulate(1 / k**s for k in range(1, len(self._items) + 1))
+        )
+
+    def sample(self, rng: Random):
+        return rng.choices(self._items, cum_weights=self._cum_weights)[0]
+
+
+def _generate_listing_filters() -> list[dict]:
+    price_ranges = ({}, dict(price_max=50), dict(price_min=50, price_max=200))
+    rating_ranges = ({}, dict(rating_min=3), dict(rating_min=4))
+    orderings = (
+        {},
+        dict(order_by="price", order_type="asc"),
+        dict(order_by="price", order_type="desc"),
+        dict(order_by="rating", order_type="asc"),
+    )
+    discounts = ({}, dict(with_discounts_only="true"))
+    return [
+        dict(**price, **rating, **ordering, **discount)
+        for price, rating, ordering, discount in product(
+            price_ranges, rating_ranges, orderings, discounts
+        )
+    ]
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Parses a "route=weight,..." traffic mix."""
+    try:
+        weights = {
+            route.strip(): int(weight)
+            for route, weight in (item.split("=") for item in mix.split(","))
+        }
+    except ValueError:
+        raise ValueError(f"invalid traffic mix {mix}")
+    unknown = set(weights) - set(DEFAULT_MIX)
+    if unknown:
+        raise ValueError(f"unknown routes in traffic mix: {', '.join(unknown)}")
+    return weights
+
+
+class TrafficMix:
+    """Generates the paths of the requests replayed by the load test, choosing
+    the route by its weight and the ids with a Zipf distribution."""
+
+    def __init__(
+        self,
+        targets: Targets,
+        weights: dict[str, int] = None,
+        s: float = 1.1,
+        seed: int = None,
+    ):
+        weights = weights or DEFAULT_MIX
+        t = targets
+        self._products = ZipfSampler(t.product_ids, s, seed)
+        self._terminal_categories = ZipfSampler(t.terminal_category_ids, s, seed)
+        self._listing_filters = ZipfSampler(_generate_listing_filters(), s, seed)
+        self._top_categories = ZipfSampler(t.top_category_ids, s, seed)
+        self._mid_categories = ZipfSampler(t.mid_category_ids, s, seed)
+        self._vendors = ZipfSampler(t.vendor_ids, s, seed)
+        self._reviewed_products = (
+            ZipfSampler(t.reviewed_product_ids, s, seed)
+            if t.reviewed_product_ids
+            else self._products
+        )
+        self._reviews = ZipfSampler(t.review_ids, s, seed) if t.review_ids else None
+        generators: dict[str, Callable[[Random], str]] = dict(
+            product=self._product,
+            products=self._products_listing,
+            categories=self._categories,
+            reviews=self._product_reviews,
+            vendors=self._vendors_route,
+        )
+        self._routes = [r for r in weights if weights[r] > 0]
+        self._generators = [generators[r] for r in self._routes]
+        self._cum_weights = list(accumulate(weights[r] for r in self._routes))
+
+    def _product(self, rng: Random) -> str:
+        return f"/products/{self._products.sample(rng)}"
+
+    def _products_listing(self, rng: Random) -> str:
+        query = dict(
+            category_id=self._terminal_categories.sample(rng),
+            **self._listing_filters.sample(rng),
+        )
+        return f"/products?{urlencode(query)}"
+
+    def _categories(self, rng: Random) -> str:
+        return rng.choice(
+            (
+                lambda: "/top-categories",
+                lambda: f"/top-categories/{self._top_categories.sample(rng)}",
+                lambda: (
+                    f"/top-categories/{self._top_categories.sample(rng)}"
+                    "/mid-categories"
+                ),
+                lambda: f"/mid-categories/{self._mid_categories.sample(rng)}",
+                lambda: (
+                    f"/mid-categories/{self._mid_categories.sample(rng)}"
+                    "/terminal-categories"
+                ),
+                lambda: (
+                    f"/terminal-categories/{self._terminal_categories.sample(rng)}"
+                ),
+            )
+        )()
+
+    def _product_reviews(self, rng: Random) -> str:
+        if self._reviews is not None and rng.random() < 0.2:
+            return f"/reviews/{self._reviews.sample(rng)}"
+        return f"/products/{self._reviewed_products.sample(rng)}/reviews"
+
+    def _vendors_route(self, rng: Random) -> str:
+        if rng.random() < 0.2:
+            return "/vendors"
+        return f"/vendors/{self._vendors.sample(rng)}"
+
+    def next_request(self, rng: Random) -> tuple[str, str]:
+        """Returns the route name and the path of the next request."""
+        i = rng.choices(range(len(self._routes)), cum_weights=self._cum_weights)[0]
+        return self._routes[i], self._generators[i](rng)
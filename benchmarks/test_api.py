@@ -0,0 +1,78 @@
+import pytest
+from flask import Flask
+
+from diystore.api.flaskrestapi.microcache import ResponseMicroCache
+
+from .catalog import Catalog
+from tests.fakes import FakeRedisRepresentationCache
+from .harness import Benchmark
+
+
+ROUTES = {
+    "product": "/products/{c.product_id.hex}",
+    "product_reviews": "/products/{c.product_id.hex}/reviews",
+    "review": "/reviews/{c.review_id.hex}",
+    "top_categories": "/top-categories",
+    "top_category": "/top-categories/{c.top_category_id.hex}",
+    "mid_categories": "/top-categories/{c.top_category_id.hex}/mid-categories",
+    "mid_category": "/mid-categories/{c.mid_category_id.hex}",
+    "terminal_categories": (
+        "/mid-categories/{c.mid_category_id.hex}/terminal-categories"
+    ),
+    "terminal_category": "/terminal-categories/{c.category_id.hex}",
+    "vendors": "/vendors",
+    "vendor": "/vendors/{c.vendor_id.hex}",
+}
+
+
+def _benchmark_route(
+    benchmark: Benchmark,
+    client,
+    cache: FakeRedisRepresentationCache,
+    url: str,
+    cache_state: str,
+):
+    def get():
+        if cache_state == "miss":
+            cache.clear()
+        return client.get(url)
+
+    response = benchmark(get)
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def enable_microcache(app: Flask, cache_state: str, monkeypatch: pytest.MonkeyPatch):
+    # "microcache" answers from the memory of the worker, before the controller
+    if cache_state == "microcache":
+        monkeypatch.setitem(app.extensions, "microcache", ResponseMicroCache(60))
+
+
+@pytest.mark.parametrize("cache_state", ("miss", "hit", "microcache"))
+@pytest.mark.parametrize("route", ROUTES)
+def test_api_route(
+    benchmark: Benchmark,
+    smallest_catalog: Catalog,
+    cache: FakeRedisRepresentationCache,
+    make_client,
+    enable_microcache,
+    route: str,
+    cache_state: str,
+):
+    url = ROUTES[route].format(c=smallest_catalog)
+    client = make_client(smallest_catalog)
+    _benchmark_route(benchmark, client, cache, url, cache_state)
+
+
+@pytest.mark.parametrize("cache_state", ("miss", "hit", "microcache"))
+def test_api_get_products(
+    benchmark: Benchmark,
+    catalog: Catalog,
+    cache: FakeRedisRepresentationCache,
+    make_client,
+    enable_microcache,
+    cache_state: str,
+):
+    url = f"/products?category_id={catalog.category_id.hex}"
+    client = make_client(catalog)
+    _benchmark_route(benchmark, client, cache, url, cache_state)
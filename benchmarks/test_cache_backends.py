@@ -0,0 +1,58 @@
+import pytest
+
+from .catalog import Catalog
+from tests.fakes import FakeRedisRepresentationCache
+from .harness import Benchmark
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.cache.local_cache import MemoryRepresentationCache
+from diystore.infrastructure.cache.local_cache import SharedMemoryRepresentationCache
+from diystore.infrastructure.cache.local_cache import SQLiteRepresentationCache
+from diystore.infrastructure.controllers.web.compression import compress
+
+
+BACKENDS = ("fake_redis", "memory", "shared_memory", "sqlite")
+
+
+def _make_cache(backend: str, path, size: int) -> Cache:
+    if backend == "fake_redis":
+        return FakeRedisRepresentationCache()
+    if backend == "memory":
+        return MemoryRepresentationCache()
+    if backend == "shared_memory":
+        # slots large enough for the listing
+        return SharedMemoryRepresentationCache(
+            str(path / "cache"), slots=64, slot_size=1 << (size * 2).bit_length()
+        )
+    return SQLiteRepresentationCache(str(path / "cache.sqlite"))
+
+
+@pytest.mark.parametrize("operation", ("get", "get_encoded", "set"))
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_cache_backend(
+    benchmark: Benchmark,
+    catalog: Catalog,
+    make_controller,
+    tmp_path,
+    backend: str,
+    operation: str,
+):
+    """Cost of the operations of the cache on a listing, the Redis stand-in
+    leaving out the round trip to a server."""
+    category_id = catalog.category_id.hex
+    key = dict(cname="ProductController", fname="get_many", category_id=category_id)
+    representation = make_controller(catalog).get_many(category_id=category_id)
+    body = compress(representation.encode(), "gzip")
+    cache = _make_cache(backend, tmp_path, len(representation))
+    cache.set(representation, etag="abc", **key)
+    cache.set_encoded("gzip", body, "abc", **key)
+
+    if operation == "get":
+        assert benchmark(cache.get, **key) == representation
+    elif operation == "get_encoded":
+        assert benchmark(cache.get_encoded, "gzip", **key) == (body, "abc")
+    else:
+        benchmark(cache.set, representation, etag="abc", **key)
+    benchmark.extra_info.update(size=len(representation))
+    dispose = getattr(cache, "dispose", None)
+    if dispose is not None:
+        dispose()
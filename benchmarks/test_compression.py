@@ -0,0 +1,57 @@
+import pytest
+
+from .catalog import Catalog
+from tests.fakes import FakeRedisRepresentationCache
+from .harness import Benchmark
+from diystore.infrastructure.controllers.web import ENCODINGS
+from diystore.infrastructure.controllers.web.compression import compress
+
+
+def _measure_compression(benchmark: Benchmark, representation: str, encoding: str):
+    data = representation.encode()
+    body = benchmark(compress, data, encoding)
+    benchmark.extra_info.update(
+        size=len(data), compressed=len(body), saved=f"{1 - len(body) / len(data):.1%}"
+    )
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_compression_of_product(
+    benchmark: Benchmark, smallest_catalog: Catalog, make_controller, encoding: str
+):
+    controller = make_controller(smallest_catalog)
+    representation = controller.get_one(product_id=smallest_catalog.product_id.hex)
+    _measure_compression(benchmark, representation, encoding)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_compression_of_products(
+    benchmark: Benchmark, catalog: Catalog, make_controller, encoding: str
+):
+    controller = make_controller(catalog)
+    representation = controller.get_many(category_id=catalog.category_id.hex)
+    _measure_compression(benchmark, representation, encoding)
+
+
+@pytest.mark.parametrize("cache_state", ("miss", "hit"))
+@pytest.mark.parametrize("encoding", ("identity", *ENCODINGS))
+def test_api_get_products_compressed(
+    benchmark: Benchmark,
+    catalog: Catalog,
+    cache: FakeRedisRepresentationCache,
+    make_client,
+    encoding: str,
+    cache_state: str,
+):
+    url = f"/products?category_id={catalog.category_id.hex}"
+    client = make_client(catalog)
+    headers = {"Accept-Encoding": encoding}
+
+    def get():
+        if cache_state == "miss":
+            cache.clear()
+        return client.get(url, headers=headers)
+
+    response = benchmark(get)
+    assert response.status_code == 200
+    benchmark.extra_info.update(size=len(response.get_data()))
@@ -0,0 +1,117 @@
+import pytest
+
+from .catalog import Catalog
+from tests.fakes import FakeRedisRepresentationCache
+from .harness import Benchmark
+from diystore.application.usecases.product import GetProductOutputDTO
+from diystore.application.usecases.product import GetProductsOutputDTO
+from diystore.infrastructure.controllers.presenters import generate_json_presentation
+from diystore.infrastructure.repositories.sqlrepository import ProductOrmModel
+from diystore.infrastructure.repositories.sqlrepository.listings import ListingIndex
+
+
+def test_orm_product_to_domain_entity(benchmark: Benchmark, smallest_catalog: Catalog):
+    with smallest_catalog.repo._session as s:
+        orm_product = s.get(ProductOrmModel, smallest_catalog.product_id.bytes)
+        benchmark(orm_product.to_domain_entity)
+
+
+def test_orm_product_to_domain_entity_with_reviews(
+    benchmark: Benchmark, smallest_catalog: Catalog
+):
+    with smallest_catalog.repo._session as s:
+        orm_product = s.get(ProductOrmModel, smallest_catalog.product_id.bytes)
+        reviews = tuple(r.to_domain_entity() for r in orm_product.reviews)
+        benchmark(orm_product.to_domain_entity, reviews=reviews)
+
+
+def test_sqlrepo_get_products(benchmark: Benchmark, catalog: Catalog):
+    products = benchmark(catalog.repo.get_products, catalog.category_id)
+    assert len(products) == catalog.size
+
+
+@pytest.mark.parametrize("listings", (False, True), ids=("sql", "listing_index"))
+def test_sqlrepo_get_products_ordering_by_rating(
+    benchmark: Benchmark, catalog: Catalog, monkeypatch, listings: bool
+):
+    """The default listing, filtered and sorted in SQL or selected from the
+    index of the category, whose products are then loaded by id."""
+    if listings:
+        monkeypatch.setattr(catalog.repo, "_listings", ListingIndex())
+    products = benchmark(
+        catalog.repo.get_products_ordering_by_rating,
+        catalog.category_id,
+        descending=True,
+    )
+    assert len(products) == catalog.size
+
+
+def test_get_product_output_dto_from_product(
+    benchmark: Benchmark, smallest_catalog: Catalog
+):
+    product = smallest_catalog.repo.get_product(smallest_catalog.product_id)
+    benchmark(GetProductOutputDTO.from_product, product)
+
+
+def test_get_products_output_dto_from_products(benchmark: Benchmark, catalog: Catalog):
+    products = catalog.repo.get_products(catalog.category_id)
+    benchmark(GetProductsOutputDTO.from_products, products)
+
+
+def test_json_presentation_of_product(benchmark: Benchmark, smallest_catalog: Catalog):
+    product = smallest_catalog.repo.get_product(smallest_catalog.product_id)
+    benchmark(generate_json_presentation, GetProductOutputDTO.from_product(product))
+
+
+def test_json_presentation_of_products(benchmark: Benchmark, catalog: Catalog):
+    products = catalog.repo.get_products(catalog.category_id)
+    output_dto = GetProductsOutputDTO.from_products(products)
+    benchmark(generate_json_presentation, output_dto)
+
+
+def test_controller_get_one_cache_miss(
+    benchmark: Benchmark,
+    smallest_catalog: Catalog,
+    cache: FakeRedisRepresentationCache,
+    make_controller,
+):
+    controller = make_controller(smallest_catalog)
+
+    def get_one():
+        cache.clear()
+        return controller.get_one(product_id=smallest_catalog.product_id.hex)
+
+    benchmark(get_one)
+
+
+def test_controller_get_one_cache_hit(
+    benchmark: Benchmark, smallest_catalog: Catalog, make_controller
+):
+    controller = make_controller(smallest_catalog)
+    product_id = smallest_catalog.product_id.hex
+    controller.get_one(product_id=product_id)
+    benchmark(controller.get_one, product_id=product_id)
+
+
+def test_controller_get_many_cache_miss(
+    benchmark: Benchmark,
+    catalog: Catalog,
+    cache: FakeRedisRepresentationCache,
+    make_controller,
+):
+    controller = make_controller(catalog)
+
+    def get_many():
+        cache.clear()
+        return controller.get_many(category_id=catalog.category_id.hex)
+
+    benchmark(get_many)
+
+
+def test_controller_get_many_cache_hit(
+    benchmark: Benchmark, catalog: Catalog, make_controller
+):
+    controller = make_controller(catalog)
+    category_id = catalog.category_id.hex
+    controller.get_many(category_id=category_id)
+    benchmark(controller.get_many, category_id=category_id)
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy.orm import selectinload
+
+from .catalog import Catalog
+from .catalog import seed_catalog
+from .harness import Benchmark
+from diystore.infrastructure.repositories.sqlrepository import ProductOrmModel
+from diystore.infrastructure.repositories.sqlrepository.hydration import hydration_context
+
+
+LARGE_CATEGORY_SIZE = 10_000
+
+
+@pytest.fixture(scope="session")
+def large_catalog() -> Catalog:
+    return seed_catalog(LARGE_CATEGORY_SIZE)
+
+
+def _hydrate(orm_products: list[ProductOrmModel], shared_context: bool):
+    if shared_context:
+        with hydration_context():
+            return [p.to_domain_entity() for p in orm_products]
+    products = []
+    for p in orm_products:
+        with hydration_context():
+            products.append(p.to_domain_entity())
+    return products
+
+
+@pytest.mark.parametrize("context", ("per_listing", "per_product"))
+def test_hydration_of_category_listing(
+    benchmark: Benchmark, large_catalog: Catalog, context: str
+):
+    """Memory held by the domain objects of a 10k products listing, when the
+    shared value objects are interned for the whole listing and when they
+    are built for every product."""
+    with large_catalog.repo._session as s:
+        orm_products = (
+            s.query(ProductOrmModel)
+            .filter_by(category_id=large_catalog.category_id.bytes)
+            .options(selectinload(ProductOrmModel.category))
+            .all()
+        )
+        products = benchmark.measure_memory(
+            _hydrate, orm_products, context == "per_listing"
+        )
+    assert len(products) == LARGE_CATEGORY_SIZE
+
+
+def test_sqlrepo_get_products(benchmark: Benchmark, large_catalog: Catalog):
+    products = benchmark.measure_memory(
+        large_catalog.repo.get_products, large_catalog.category_id
+    )
+    assert len(products) == LARGE_CATEGORY_SIZE
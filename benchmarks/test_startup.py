@@ -0,0 +1,56 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from .harness import Benchmark
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    # the settings of the database and the cache are left out, as starting
+    # the api must not need them
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith(("DATABASE_", "REDIS_"))
+    }
+    env.update(
+        PYTHONPATH=os.pathsep.join(sys.path),
+        API_CACHE_CONTROL__MAX_AGE="60",
+    )
+    return subprocess.run(
+        (sys.executable, *args), env=env, capture_output=True, text=True, check=True
+    )
+
+
+def _parse_importtime(stderr: str) -> dict[str, int]:
+    """Cumulative import time of every module, in microseconds."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "code",
+    (
+        "import diystore.api.flaskrestapi",
+        "import diystore.api.flaskrestapi as api; api.create_app()",
+    ),
+    ids=("import_api", "create_app"),
+)
+def test_startup(benchmark: Benchmark, code: str):
+    """Time a new process takes to import the api, and to create the app."""
+    benchmark(_python, "-c", code)
+    times = _parse_importtime(_python("-X", "importtime", "-c", code).stderr)
+    heaviest = sorted(
+        (m for m in times if "." not in m), key=times.get, reverse=True
+    )[:4]
+    benchmark.extra_info.update(
+        modules=len(times),
+        **{m: f"{times[m] / 1000:.0f}ms" for m in heaviest},
+    )
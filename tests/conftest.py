@@ -179,7 +179,15 @@ def orm_session(session_factory):
 
 @pytest.fixture
 def sqlrepo():
-    return SQLProductRepository(scheme="sqlite", host="/:memory:")
+    repo = SQLProductRepository(scheme="sqlite", host="/:memory:")
+    repo.create_schema()
+    return repo
+
+
+@pytest.fixture
+def query_profiler(sqlrepo):
+    with sqlrepo.profile() as profiler:
+        yield profiler
 
 
 @pytest.fixture(scope="session")
@@ -191,6 +199,7 @@ def testenv_infrasettings():
 def mock_product_cache():
     mock_cache = Mock(Cache)
     mock_cache.get.return_value = None
+    mock_cache.get_encoded.return_value = (None, None)
     return mock_cache
 
 
@@ -0,0 +1,176 @@
+from typing import Optional
+from threading import Condition
+from collections import deque
+
+from redis.exceptions import ConnectionError
+
+from diystore.infrastructure.cache.redis_cache import RedisRepresentationCache
+from diystore.infrastructure.cache.redis_cache.tracking import ClientSideCache
+from diystore.infrastructure.cache.redis_cache.tracking import INVALIDATION_CHANNEL
+from diystore.infrastructure.cache.ttl_policy import TTLPolicy
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of the redis client used by the
+    caches, so that the tests and benchmarks run with no server to reach."""
+
+    def __init__(
+        self, data: dict = None, decode_responses: bool = True, tracking: list = None
+    ):
+        # like redis, values are stored as bytes, and decoded on reads by
+        # the clients decoding responses
+        self._data = {} if data is None else data
+        self._decode = decode_responses
+        # the connections notified of the changes of the keys
+        self._tracking = [] if tracking is None else tracking
+        self.connection_pool = FakeConnectionPool()
+
+    def binary_client(self) -> "FakeRedis":
+        """A client of the same database, not decoding responses."""
+        return FakeRedis(self._data, decode_responses=False, tracking=self._tracking)
+
+    def make_connection(self) -> "FakeTrackingConnection":
+        return FakeTrackingConnection(self._tracking)
+
+    def _notify(self, keys: Optional[list]):
+        for conn in list(self._tracking):
+            conn.notify(keys)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._data.get(key)
+        return value.decode() if self._decode and value is not None else value
+
+    def mget(self, keys, *args: str) -> list:
+        keys = [keys, *args] if isinstance(keys, str) else [*keys, *args]
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: str, ex: int = None) -> bool:
+        self._data[key] = value.encode() if isinstance(value, str) else value
+        self._notify([key])
+        return True
+
+    def delete(self, *keys: str) -> int:
+        deleted = [k for k in keys if self._data.pop(k, None) is not None]
+        if deleted:
+            self._notify(deleted)
+        return len(deleted)
+
+    def flushdb(self) -> bool:
+        self._data.clear()
+        self._notify(None)
+        return True
+
+    def pipeline(self) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakeConnectionPool:
+    def disconnect(self):
+        ...
+
+    def reset(self):
+        ...
+
+
+class FakePipeline:
+    def __init__(self, conn: FakeRedis):
+        self._conn = conn
+        self._results = []
+
+    def __enter__(self) -> "FakePipeline":
+        return self
+
+    def __exit__(self, *exc):
+        ...
+
+    def set(self, key: str, value: str, ex: int = None):
+        self._results.append(self._conn.set(key, value, ex))
+
+    def execute(self) -> list:
+        results, self._results = self._results, []
+        return results
+
+
+class FakeTrackingConnection:
+    """Connection on which the invalidation messages of the keys changed
+    through a FakeRedis are received, once tracking is enabled, like a
+    connection redirected the notifications of a Redis server."""
+
+    def __init__(self, tracking: list):
+        self._tracking = tracking
+        self._prefixes = ()
+        self._replies = deque()
+        self._ready = Condition()
+        self._broken = False
+
+    def connect(self):
+        ...
+
+    def disconnect(self):
+        if self in self._tracking:
+            self._tracking.remove(self)
+
+    def break_connection(self):
+        """Simulates the loss of the connection."""
+        self.disconnect()
+        with self._ready:
+            self._broken = True
+            self._ready.notify_all()
+
+    def send_command(self, *args):
+        command = [a.decode() if isinstance(a, bytes) else str(a) for a in args]
+        if command[:2] == ["CLIENT", "ID"]:
+            self._reply(1)
+        elif command[:2] == ["CLIENT", "TRACKING"]:
+            self._prefixes = tuple(
+                command[i + 1] for i, a in enumerate(command) if a == "PREFIX"
+            )
+            self._tracking.append(self)
+            self._reply(b"OK")
+        elif command[0] == "SUBSCRIBE":
+            self._reply([b"subscribe", INVALIDATION_CHANNEL, 1])
+
+    def notify(self, keys: Optional[list]):
+        if keys is not None:
+            keys = [k.encode() for k in keys if k.startswith(self._prefixes or "")]
+            if not keys:
+                return
+        self._reply([b"message", INVALIDATION_CHANNEL, keys])
+
+    def _reply(self, reply):
+        with self._ready:
+            self._replies.append(reply)
+            self._ready.notify_all()
+
+    def can_read(self, timeout: float = 0) -> bool:
+        with self._ready:
+            self._ready.wait_for(lambda: self._replies or self._broken, timeout)
+            if self._broken:
+                raise ConnectionError("connection lost")
+            return bool(self._replies)
+
+    def read_response(self):
+        if not self.can_read(timeout=None):
+            raise ConnectionError("no reply")
+        with self._ready:
+            return self._replies.popleft()
+
+
+class FakeRedisRepresentationCache(RedisRepresentationCache):
+    def __init__(
+        self, ttl: int = 360, client_tracking: bool = False, ttl_policy: TTLPolicy = None
+    ):
+        self._conn = FakeRedis()
+        self._binary_conn = self._conn.binary_client()
+        self._ttl_policy = ttl_policy or TTLPolicy(ttl)
+        self._key_prefix = "repr:"
+        self._local = None
+        if client_tracking:
+            self._local = ClientSideCache(
+                self._conn.make_connection,
+                prefixes=(self._key_prefix,),
+                poll_interval=0.1,
+            )
+
+    def clear(self):
+        self._conn.flushdb()
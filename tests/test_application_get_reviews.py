@@ -1,11 +1,15 @@
 from uuid import uuid4
 
+import pytest
+from pydantic import ValidationError
+
 from diystore.domain.entities.product.stubs import ProductStub
 from diystore.domain.entities.product.stubs import ProductReviewStub
 from diystore.application.usecases.product import ProductRepository
 from diystore.application.usecases.product import GetProductReviewsInputDTO
 from diystore.application.usecases.product import GetProductReviewsOutputDTO
 from diystore.application.usecases.product import get_reviews
+from diystore.application.usecases.product import ReviewsCursor
 
 
 def test_application_get_reviews_non_existent_product(
@@ -53,3 +57,52 @@ def test_application_get_reviews_product_with_reviews(
 
     # THEN a DTO containing information about all its reviews is returned
     assert output_dto == expected_output_dto
+
+
+def test_application_get_reviews_page_with_next_cursor(
+    mock_products_repository: ProductRepository,
+):
+    # GIVEN a product with more reviews than the requested page size
+    reviews = ProductReviewStub.build_batch(3)
+    mock_products_repository.get_reviews.return_value = tuple(reviews)
+
+    # WHEN a page of two reviews is queried
+    input_dto = GetProductReviewsInputDTO(product_id=uuid4(), limit=2)
+    output_dto = get_reviews(input_dto, mock_products_repository)
+
+    # THEN the page is returned along with a cursor pointing at its last review
+    assert len(output_dto.reviews) == 2
+    assert output_dto.next_cursor == ReviewsCursor.from_review(reviews[1])
+    _, kwargs = mock_products_repository.get_reviews.call_args
+    assert kwargs["limit"] == 3
+
+
+def test_application_get_reviews_cursor_is_passed_as_keyset(
+    mock_products_repository: ProductRepository,
+):
+    # GIVEN a cursor pointing at a review
+    review = ProductReviewStub()
+    cursor = ReviewsCursor.from_review(review)
+    mock_products_repository.get_reviews.return_value = ()
+
+    # WHEN the following page is queried
+    input_dto = GetProductReviewsInputDTO(product_id=uuid4(), cursor=cursor)
+    output_dto = get_reviews(input_dto, mock_products_repository)
+
+    # THEN the repository is queried after that review and no cursor is returned
+    _, kwargs = mock_products_repository.get_reviews.call_args
+    assert kwargs["after_date"] == review.creation_date
+    assert kwargs["after_id"] == review.id
+    assert output_dto.next_cursor is None
+
+
+@pytest.mark.parametrize("cursor", ("abc", "bm90LWEtY3Vyc29y", 1))
+def test_application_get_reviews_invalid_cursor(cursor):
+    with pytest.raises(ValidationError):
+        GetProductReviewsInputDTO(product_id=uuid4(), cursor=cursor)
+
+
+@pytest.mark.parametrize("limit", (0, 101, "a"))
+def test_application_get_reviews_invalid_limit(limit):
+    with pytest.raises(ValidationError):
+        GetProductReviewsInputDTO(product_id=uuid4(), limit=limit)
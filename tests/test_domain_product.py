@@ -565,6 +565,46 @@ def test_domain_product_delete_client_review_found():
     assert deleted_review == existant_review
 
 
+def test_domain_product_review_aggregates_are_computed_from_reviews():
+    reviews = (ProductReviewStub(rating=1), ProductReviewStub(rating=4))
+    product: Product = ProductStub(reviews=reviews)
+    assert product.review_count == 2
+    assert product.rating_sum == Decimal(5)
+    assert product.calculate_rating() == Decimal("2.5")
+
+
+def test_domain_product_review_aggregates_are_kept_when_passed():
+    product: Product = ProductStub(review_count=10, rating_sum=Decimal(32))
+    assert product.reviews == {}
+    assert product.get_review_count() == 10
+    assert product.calculate_rating() == Decimal("3.2")
+
+
+def test_domain_product_add_client_review_updates_aggregates_incrementally():
+    product: Product = ProductStub(review_count=10, rating_sum=Decimal(30))
+    product.add_client_review(ProductReviewStub(rating=5))
+    assert product.review_count == 11
+    assert product.rating_sum == Decimal(35)
+    assert product.rating == Decimal("3.2")
+
+
+def test_domain_product_add_client_review_replacing_existing_review():
+    review = ProductReviewStub(rating=1)
+    product: Product = ProductStub(reviews=[review])
+    product.add_client_review(ProductReviewStub(id=review.id, rating=3))
+    assert product.review_count == 1
+    assert product.rating == Decimal(3)
+
+
+def test_domain_product_delete_last_client_review_resets_rating():
+    review = ProductReviewStub(rating=2)
+    product: Product = ProductStub(reviews=[review])
+    product.delete_client_review(review.id)
+    assert product.review_count == 0
+    assert product.rating_sum == 0
+    assert product.rating is None
+
+
 def test_domain_product_photo_url_is_optional():
     p = ProductStub(photo_url=None)
     assert p.photo_url is None
@@ -0,0 +1,166 @@
+import os
+from time import sleep
+from unittest.mock import Mock
+
+import pytest
+
+from diystore.infrastructure.cache.redis_cache.tracking import ClientSideCache
+from .fakes import FakeRedis
+from .fakes import FakeRedisRepresentationCache
+
+
+def _wait_for(condition, timeout: float = 1):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        sleep(0.01)
+    return condition()
+
+
+def _seed(cache: FakeRedisRepresentationCache, **values):
+    # written without notifying, so that no invalidation of these keys is
+    # still on its way when they are read
+    cache._conn._data.update(
+        {
+            cache._key_prefix + k: v.encode() if isinstance(v, str) else v
+            for k, v in values.items()
+        }
+    )
+
+
+@pytest.fixture
+def tracking_cache():
+    cache = FakeRedisRepresentationCache(client_tracking=True)
+    assert cache._local.start(timeout=1)
+    yield cache
+    cache.dispose()
+
+
+@pytest.fixture
+def redis_reads(tracking_cache, monkeypatch):
+    mget = Mock(wraps=tracking_cache._binary_conn.mget)
+    monkeypatch.setattr(tracking_cache._binary_conn, "mget", mget)
+    return mget
+
+
+def test_infra_client_tracking_read_once(tracking_cache, redis_reads):
+    _seed(tracking_cache, get_vendors="[]", **{"get_vendors:etag": "abc"})
+    assert tracking_cache.get(fname="get_vendors") == "[]"
+    assert tracking_cache.get(fname="get_vendors") == "[]"
+    assert tracking_cache.get_etag(fname="get_vendors") == "abc"
+    assert tracking_cache.get_etag(fname="get_vendors") == "abc"
+    assert redis_reads.call_count == 2
+
+
+def test_infra_client_tracking_invalidated_when_rewritten(tracking_cache):
+    # GIVEN a local copy of a representation
+    _seed(tracking_cache, get_vendors="[]")
+    tracking_cache.get(fname="get_vendors")
+    # WHEN it's rewritten, by this worker or another
+    tracking_cache.set("[1]", fname="get_vendors")
+    # THEN the copy is dropped as soon as Redis notifies the change
+    assert _wait_for(lambda: len(tracking_cache._local) == 0)
+    assert tracking_cache.get(fname="get_vendors") == "[1]"
+
+
+def test_infra_client_tracking_invalidated_when_deleted(tracking_cache):
+    _seed(tracking_cache, get_vendors="[]", **{"get_vendors:etag": "abc"})
+    tracking_cache.get(fname="get_vendors")
+    tracking_cache.get_etag(fname="get_vendors")
+    tracking_cache.delete(fname="get_vendors")
+    assert _wait_for(lambda: len(tracking_cache._local) == 0)
+    assert tracking_cache.get(fname="get_vendors") is None
+
+
+def test_infra_client_tracking_invalidated_when_flushed(tracking_cache):
+    _seed(tracking_cache, get_vendors="[]")
+    tracking_cache.get(fname="get_vendors")
+    tracking_cache.clear()
+    assert _wait_for(lambda: len(tracking_cache._local) == 0)
+
+
+def test_infra_client_tracking_encoded_representations(tracking_cache, redis_reads):
+    _seed(
+        tracking_cache,
+        **{
+            "get_vendors:etag": "abc",
+            "get_vendors:gzip": b"compressed",
+            "get_vendors:gzip:etag": "abc",
+        },
+    )
+    assert tracking_cache.get_encoded("gzip", fname="get_vendors") == (b"compressed", "abc")
+    assert tracking_cache.get_encoded("gzip", fname="get_vendors") == (b"compressed", "abc")
+    assert redis_reads.call_count == 1
+
+
+def test_infra_client_tracking_only_representations_notified(
+    tracking_cache, monkeypatch
+):
+    handled = []
+    handle = tracking_cache._local._handle
+    monkeypatch.setattr(
+        tracking_cache._local, "_handle", lambda m: handled.append(m) or handle(m)
+    )
+    # GIVEN a local copy of a representation
+    _seed(tracking_cache, get_vendors="[]")
+    tracking_cache.get(fname="get_vendors")
+    # WHEN keys other than the representations change in the database
+    tracking_cache._conn.set("session:abc", "{}")
+    tracking_cache._conn.delete("session:abc")
+    # THEN Redis does not notify them, only the representations
+    tracking_cache.set("[1]", fname="get_vendors")
+    assert _wait_for(lambda: handled)
+    assert [keys for _, _, keys in handled] == [[b"repr:get_vendors"]]
+    (connection,) = tracking_cache._conn._tracking
+    assert connection._prefixes == ("repr:",)
+
+
+def test_infra_client_tracking_change_during_read_not_kept():
+    # GIVEN a subscribed local cache
+    redis = FakeRedis(decode_responses=False)
+    local = ClientSideCache(redis.make_connection, poll_interval=0.01)
+    assert local.start(timeout=1)
+    redis._data["key"] = b"old"
+
+    # WHEN the key changes while being read
+    def fetch(keys):
+        values = redis.mget(keys)
+        redis.set("key", b"new")
+        _wait_for(lambda: local._pending.get("key") is None)
+        return values
+
+    assert local.get_many(["key"], fetch) == [b"old"]
+    # THEN the value read is not kept
+    assert len(local) == 0
+    assert not local._pending
+    local.stop()
+
+
+def test_infra_client_tracking_nothing_kept_while_disconnected(tracking_cache, redis_reads):
+    _seed(tracking_cache, get_vendors="[]")
+    tracking_cache.get(fname="get_vendors")
+    (connection,) = tracking_cache._conn._tracking
+    tracking_cache._local._retry_interval = 10
+    connection.break_connection()
+    assert _wait_for(lambda: not tracking_cache._local.subscribed)
+    assert len(tracking_cache._local) == 0
+    tracking_cache.get(fname="get_vendors")
+    tracking_cache.get(fname="get_vendors")
+    assert redis_reads.call_count == 3
+
+
+def test_infra_client_tracking_resubscribes(tracking_cache):
+    (connection,) = tracking_cache._conn._tracking
+    tracking_cache._local._retry_interval = 0.01
+    connection.break_connection()
+    assert _wait_for(lambda: tracking_cache._conn._tracking not in ([], [connection]))
+    assert tracking_cache._local.start(timeout=1)
+
+
+def test_infra_client_tracking_restarted_in_forked_process(tracking_cache, monkeypatch):
+    _seed(tracking_cache, get_vendors="[]")
+    tracking_cache.get(fname="get_vendors")
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    tracking_cache.dispose(close=False)
+    assert len(tracking_cache._local) == 0
+    assert tracking_cache._local.start(timeout=1)
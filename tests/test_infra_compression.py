@@ -0,0 +1,149 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.controllers.web import start_content_coding
+from diystore.infrastructure.controllers.web import stop_content_coding
+from diystore.infrastructure.controllers.web import get_content_coding
+from diystore.infrastructure.controllers.web import start_conditional_request
+from diystore.infrastructure.controllers.web import stop_conditional_request
+from diystore.infrastructure.controllers.web.conditional import generate_etag
+from diystore.infrastructure.controllers.web.compression import pack_body
+from diystore.infrastructure.controllers.web.exceptions import NotModified
+from diystore.api.flaskrestapi import blueprints
+
+
+@pytest.fixture
+def gzip_coding():
+    token = start_content_coding("gzip")
+    yield get_content_coding()
+    stop_content_coding(token)
+
+
+@pytest.fixture
+def compressing_app(product_controller: ProductController):
+    app = Flask(__name__)
+    app.config.update(
+        MIMETYPE="application/json",
+        CACHE_CONTROL=dict(MAX_AGE=60),
+        ADD_ETAG=True,
+        COMPRESSION=True,
+        COMPRESSION_MIN_SIZE=0,
+    )
+    app.register_blueprint(blueprints.products_bp)
+    blueprints.product_controller = product_controller
+    yield app
+    blueprints.product_controller = None
+
+
+def test_infra_compression_cache_miss_caches_compressed_representation(
+    product_controller: ProductController, mock_product_cache, gzip_coding
+):
+    # WHEN a representation is generated for a client accepting gzip
+    body = product_controller.get_vendors()
+    # THEN it's compressed, and cached with the ETag of the representation
+    representation = gzip.decompress(body).decode()
+    etag = generate_etag(representation)
+    encoding, cached_body, cached_etag = mock_product_cache.set_encoded.call_args.args
+    assert (encoding, cached_body, cached_etag) == (
+        "gzip",
+        pack_body(body, True),
+        etag,
+    )
+    assert gzip_coding.etag == f"{etag}-gzip"
+
+
+def test_infra_compression_cache_hit_returns_compressed_representation(
+    product_controller: ProductController, mock_product_cache, gzip_coding
+):
+    mock_product_cache.get_encoded.return_value = (
+        pack_body(b"compressed", True),
+        "abc",
+    )
+    assert product_controller.get_vendors() == b"compressed"
+    assert gzip_coding.etag == "abc-gzip"
+    mock_product_cache.get.assert_not_called()
+    mock_product_cache.set_encoded.assert_not_called()
+
+
+def test_infra_compression_compresses_cached_representation_once(
+    product_controller: ProductController, mock_product_cache, gzip_coding
+):
+    # GIVEN a cached representation not compressed yet
+    mock_product_cache.get.return_value = "[]"
+    # WHEN it's requested by a client accepting gzip
+    body = product_controller.get_vendors()
+    # THEN the compressed representation is cached
+    assert gzip.decompress(body) == b"[]"
+    mock_product_cache.set_encoded.assert_called_once()
+    mock_product_cache.set.assert_not_called()
+
+
+def test_infra_compression_small_representation_not_compressed(
+    product_controller: ProductController, mock_product_cache
+):
+    mock_product_cache.get.return_value = "[]"
+    token = start_content_coding("gzip", min_size=1024)
+    try:
+        assert product_controller.get_vendors() == "[]"
+        assert not get_content_coding().applied
+    finally:
+        stop_content_coding(token)
+    # cached as is for the coding
+    encoding, cached_body, cached_etag = mock_product_cache.set_encoded.call_args.args
+    assert (encoding, cached_body, cached_etag) == (
+        "gzip",
+        pack_body(b"[]", False),
+        generate_etag("[]"),
+    )
+
+
+def test_infra_compression_small_representation_single_lookup(
+    product_controller: ProductController, mock_product_cache
+):
+    # GIVEN a representation cached as is for the coding
+    mock_product_cache.get_encoded.return_value = (pack_body(b"[]", False), "abc")
+    token = start_content_coding("gzip", min_size=1024)
+    try:
+        # WHEN it's requested
+        assert product_controller.get_vendors() == "[]"
+        # THEN it's served uncompressed from that single lookup
+        assert not get_content_coding().applied
+    finally:
+        stop_content_coding(token)
+    mock_product_cache.get.assert_not_called()
+    mock_product_cache.set_encoded.assert_not_called()
+
+
+def test_infra_compression_not_modified_compressed_representation(
+    product_controller: ProductController, mock_product_cache, gzip_coding
+):
+    mock_product_cache.get_etag.return_value = "abc"
+    token = start_conditional_request({"abc-gzip"})
+    try:
+        with pytest.raises(NotModified) as e:
+            product_controller.get_vendors()
+    finally:
+        stop_conditional_request(token)
+    assert e.value.etag == "abc-gzip"
+
+
+def test_infra_compression_http_negotiation(compressing_app):
+    client = compressing_app.test_client()
+    plain = client.get("/vendors")
+    compressed = client.get("/vendors", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert plain.content_encoding is None
+    assert compressed.content_encoding == "gzip"
+    assert "Accept-Encoding" in compressed.vary
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    etag, _ = plain.get_etag()
+    assert compressed.get_etag() == (f"{etag}-gzip", False)
+
+
+def test_infra_compression_http_disabled(compressing_app):
+    compressing_app.config["COMPRESSION"] = False
+    client = compressing_app.test_client()
+    response = client.get("/vendors", headers={"Accept-Encoding": "gzip"})
+    assert response.content_encoding is None
@@ -0,0 +1,78 @@
+from time import sleep
+from uuid import UUID
+from threading import Barrier
+from concurrent.futures import ThreadPoolExecutor
+
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.controllers.web import factories
+from diystore.infrastructure.controllers.web.factories import ProductControllerFactory
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import LoadedProductOrmModelStub
+from diystore.api.flaskrestapi import blueprints
+
+
+def test_infra_concurrency_controller_created_once(monkeypatch, mock_product_cache):
+    # GIVEN a controller slow to create, e.g. while connecting to the database
+    created = []
+
+    def create_controller():
+        sleep(0.01)
+        created.append(ProductController(None, mock_product_cache, None))
+        return created[-1]
+
+    monkeypatch.setattr(factories, "ProductControllerFactory", create_controller)
+    monkeypatch.setattr(blueprints, "product_controller", None)
+    barrier = Barrier(8)
+
+    def first_request():
+        barrier.wait()
+        return blueprints.get_product_controller()
+
+    # WHEN the first requests are handled concurrently
+    with ThreadPoolExecutor(8) as executor:
+        controllers = list(executor.map(lambda _: first_request(), range(8)))
+    # THEN they share a single controller
+    assert len(created) == 1
+    assert all(c is created[0] for c in controllers)
+
+
+def test_infra_concurrency_repository_shared_between_threads(tmp_path):
+    # GIVEN a repository on a database shared by the threads
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{tmp_path}/db.sqlite")
+    repo.create_schema()
+    products = LoadedProductOrmModelStub.create_batch(4)
+    product_ids = [UUID(bytes=p.id) for p in products]
+    with repo._session as s:
+        s.add_all(products)
+        s.commit()
+    # WHEN the products are retrieved concurrently
+    with ThreadPoolExecutor(8) as executor:
+        retrieved = list(executor.map(repo.get_product, product_ids * 10))
+    # THEN every call gets its product
+    assert [p.id for p in retrieved] == product_ids * 10
+
+
+def test_infra_concurrency_controller_shared_between_threads(
+    tmp_path, mock_product_cache
+):
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{tmp_path}/db.sqlite")
+    repo.create_schema()
+    products = LoadedProductOrmModelStub.create_batch(4)
+    product_ids = [UUID(bytes=p.id).hex for p in products]
+    with repo._session as s:
+        s.add_all(products)
+        s.commit()
+    controller = ProductControllerFactory(repo=repo, cache=mock_product_cache)
+    with ThreadPoolExecutor(8) as executor:
+        representations = list(
+            executor.map(lambda _id: controller.get_one(product_id=_id), product_ids * 5)
+        )
+    assert all(_id in r for _id, r in zip(product_ids * 5, representations))
+
+
+def test_infra_concurrency_pool_options_ignored_by_sqlite():
+    repo = SQLProductRepository(
+        scheme="sqlite", host="/:memory:", pool_size=8, max_overflow=2
+    )
+    repo.create_schema()
+    assert repo.get_product(UUID(int=1)) is None
@@ -0,0 +1,93 @@
+from uuid import UUID
+
+import pytest
+from flask import Flask
+
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.controllers.web import start_conditional_request
+from diystore.infrastructure.controllers.web import stop_conditional_request
+from diystore.infrastructure.controllers.web.conditional import generate_etag
+from diystore.infrastructure.controllers.web.exceptions import NotModified
+from diystore.api.flaskrestapi import blueprints
+
+
+@pytest.fixture
+def conditional_app(product_controller: ProductController):
+    app = Flask(__name__)
+    app.config.update(
+        MIMETYPE="application/json", CACHE_CONTROL=dict(MAX_AGE=60), ADD_ETAG=True
+    )
+    app.register_blueprint(blueprints.products_bp)
+    blueprints.product_controller = product_controller
+    yield app
+    blueprints.product_controller = None
+
+
+def test_infra_conditional_matching_etag_raises_not_modified(
+    product_controller: ProductController, mock_product_cache
+):
+    # GIVEN a cached representation with a known ETag
+    mock_product_cache.get_etag.return_value = "abc"
+    token = start_conditional_request({"abc"})
+    # WHEN it's requested with the same ETag
+    try:
+        with pytest.raises(NotModified) as e:
+            product_controller.get_vendors()
+    finally:
+        stop_conditional_request(token)
+    # THEN the body is never loaded
+    assert e.value.etag == "abc"
+    mock_product_cache.get.assert_not_called()
+
+
+def test_infra_conditional_stale_etag_returns_representation(
+    product_controller: ProductController, mock_product_cache
+):
+    mock_product_cache.get_etag.return_value = "new"
+    mock_product_cache.get.return_value = "[]"
+    token = start_conditional_request({"old"})
+    try:
+        assert product_controller.get_vendors() == "[]"
+    finally:
+        stop_conditional_request(token)
+
+
+def test_infra_conditional_unconditional_request_skips_etag_lookup(
+    product_controller: ProductController, mock_product_cache
+):
+    product_controller.get_vendors()
+    mock_product_cache.get_etag.assert_not_called()
+
+
+def test_infra_conditional_cache_miss_stores_etag(
+    product_controller: ProductController, mock_product_cache
+):
+    representation = product_controller.get_vendors()
+    _, kwargs = mock_product_cache.set.call_args
+    assert kwargs["etag"] == generate_etag(representation)
+
+
+def test_infra_conditional_http_not_modified(conditional_app, mock_product_cache):
+    # GIVEN a response served with its ETag
+    client = conditional_app.test_client()
+    response = client.get("/vendors")
+    etag, _ = response.get_etag()
+    assert etag == generate_etag(response.get_data(as_text=True))
+    # WHEN it's requested again with that ETag and the cache holds it
+    mock_product_cache.get_etag.return_value = etag
+    mock_product_cache.get.reset_mock()
+    response = client.get("/vendors", headers={"If-None-Match": f'"{etag}"'})
+    # THEN a 304 is answered from the cached ETag alone
+    assert response.status_code == 304
+    assert response.get_etag() == (etag, False)
+    assert response.get_data() == b""
+    mock_product_cache.get.assert_not_called()
+
+
+def test_infra_conditional_http_stale_etag(conditional_app, mock_product_cache):
+    mock_product_cache.get_etag.return_value = "new"
+    client = conditional_app.test_client()
+    response = client.get(
+        f"/vendors/{UUID(int=1).hex}", headers={"If-None-Match": '"old"'}
+    )
+    assert response.status_code == 404
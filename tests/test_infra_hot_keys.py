@@ -0,0 +1,165 @@
+from threading import Thread
+from unittest.mock import Mock
+
+from flask import Flask
+
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.cache.hot_key_cache import CountMinSketch
+from diystore.infrastructure.cache.hot_key_cache import HotKeyCache
+from diystore.infrastructure.cache.hot_key_cache import HotKeyTracker
+from diystore.infrastructure.cache.local_cache import MemoryRepresentationCache
+from diystore.infrastructure.main.settings import InfraSettings
+from diystore.infrastructure.main import create_ioc_container
+from diystore.api.flaskrestapi import _configure_app
+from diystore.api.flaskrestapi.blueprints import hot_keys_bp
+from diystore.api.api_settings import WebAPISettings
+from .fakes import FakeRedisRepresentationCache
+
+
+def test_infra_hot_keys_count_min_sketch():
+    sketch = CountMinSketch(width=64, depth=4)
+    for i in range(500):
+        sketch.add(f"key-{i % 50}")
+    sketch.add("hot", 100)
+    assert sketch.estimate("hot") >= 100
+    assert all(sketch.estimate(f"key-{i}") >= 10 for i in range(50))
+    sketch.decay()
+    assert sketch.estimate("hot") >= 50
+
+
+def test_infra_hot_keys_tracker():
+    tracker = HotKeyTracker(threshold=5, window=1000)
+    for i in range(100):
+        tracker.record(f"product-{i}")
+        tracker.record("top_categories")
+    assert tracker.is_hot("top_categories")
+    assert not tracker.is_hot("product-1")
+    assert tracker.hot_keys() == [("top_categories", 100)]
+
+
+def test_infra_hot_keys_tracker_cools_down():
+    tracker = HotKeyTracker(threshold=10, window=20)
+    for _ in range(20):
+        tracker.record("top_categories")
+    assert tracker.is_hot("top_categories")
+    # halved every 20 reads, of other keys now
+    for i in range(100):
+        tracker.record(f"product-{i}")
+    assert not tracker.is_hot("top_categories")
+
+
+def test_infra_hot_keys_tracker_max_hot():
+    tracker = HotKeyTracker(threshold=1, max_hot=2)
+    for key, n in (("a", 3), ("b", 2), ("c", 4)):
+        for _ in range(n):
+            tracker.record(key)
+    assert tracker.hot_keys() == [("c", 4), ("a", 3)]
+
+
+def test_infra_hot_keys_cache_serves_local_copies():
+    # GIVEN a key read often enough to be hot
+    redis_cache = FakeRedisRepresentationCache()
+    redis_cache.set("[]", etag="abc", fname="get_vendors")
+    redis_cache.get = Mock(wraps=redis_cache.get)
+    cache = HotKeyCache(redis_cache, HotKeyTracker(threshold=3))
+    for _ in range(3):
+        assert cache.get(fname="get_vendors") == "[]"
+    # WHEN it's read again
+    for _ in range(10):
+        assert cache.get(fname="get_vendors") == "[]"
+    # THEN it's read from the local copy
+    assert redis_cache.get.call_count == 3
+    assert cache.hot_keys() == [("get_vendors", 13)]
+
+
+def test_infra_hot_keys_cache_copies_expire():
+    clock = Mock(return_value=0)
+    cache = HotKeyCache(
+        MemoryRepresentationCache(), HotKeyTracker(threshold=1), local_ttl=1, clock=clock
+    )
+    cache.set("[]", etag="abc", fname="get_vendors")
+    assert cache.get_etag(fname="get_vendors") == "abc"
+    # changed by another worker
+    cache._cache.set("[1]", etag="def", fname="get_vendors")
+    assert cache.get_etag(fname="get_vendors") == "abc"
+    clock.return_value = 1
+    assert cache.get_etag(fname="get_vendors") == "def"
+
+
+def test_infra_hot_keys_cache_copies_dropped_on_writes():
+    cache = HotKeyCache(MemoryRepresentationCache(), HotKeyTracker(threshold=1))
+    cache.set("[]", etag="abc", fname="get_vendors")
+    cache.set_encoded("gzip", b"compressed", "abc", fname="get_vendors")
+    assert cache.get_encoded("gzip", fname="get_vendors") == (b"compressed", "abc")
+    cache.set_encoded("gzip", b"recompressed", "abc", fname="get_vendors")
+    assert cache.get_encoded("gzip", fname="get_vendors") == (b"recompressed", "abc")
+    cache.set("[1]", etag="def", fname="get_vendors")
+    assert cache.get(fname="get_vendors") == "[1]"
+    cache.delete(fname="get_vendors")
+    assert cache.get(fname="get_vendors") is None
+
+
+def test_infra_hot_keys_cache_misses_not_kept():
+    cache = HotKeyCache(MemoryRepresentationCache(), HotKeyTracker(threshold=1))
+    assert cache.get(fname="get_vendors") is None
+    assert cache.get_encoded("gzip", fname="get_vendors") == (None, None)
+    cache._cache.set("[]", etag="abc", fname="get_vendors")
+    assert cache.get(fname="get_vendors") == "[]"
+
+
+def test_infra_hot_keys_cache_concurrent_threads():
+    # GIVEN more hot keys than copies kept, so that the copies are pruned
+    cache = HotKeyCache(
+        MemoryRepresentationCache(), HotKeyTracker(threshold=1, max_hot=4)
+    )
+    errors = []
+
+    def read_and_write(n: int):
+        try:
+            for i in range(2000):
+                key = f"get_vendor:{(n + i) % 16}"
+                if i % 7 == 0:
+                    cache.set("[]", etag="abc", fname=key)
+                cache.get(fname=key)
+                cache.get_etag(fname=key)
+        except Exception as e:
+            errors.append(e)
+
+    # WHEN threads of a worker read and write them concurrently
+    threads = [Thread(target=read_and_write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # THEN the copies stay consistent
+    assert not errors
+    assert len(cache.hot_keys()) <= 4
+
+
+def test_infra_hot_keys_from_settings(monkeypatch):
+    monkeypatch.delenv("REDIS_URL")
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    monkeypatch.setenv("CACHE_HOT_KEYS", "true")
+    cache = create_ioc_container(InfraSettings()).provide(Cache)
+    assert isinstance(cache, HotKeyCache)
+    assert isinstance(cache._cache, MemoryRepresentationCache)
+
+
+def test_infra_hot_keys_endpoint(monkeypatch):
+    cache = HotKeyCache(MemoryRepresentationCache(), HotKeyTracker(threshold=2))
+    for _ in range(2):
+        cache.get(fname="get_vendors")
+    ioc = Mock(**{"provide.return_value": cache})
+    monkeypatch.setattr(hot_keys_bp, "get_ioc_container", lambda: ioc)
+    app = Flask(__name__)
+    app.register_blueprint(hot_keys_bp.bp)
+    response = app.test_client().get("/metrics/hot-keys")
+    assert response.status_code == 200
+    assert response.json["hot_keys"] == [dict(key="get_vendors", count=2)]
+
+
+def test_infra_hot_keys_endpoint_without_metrics():
+    app = Flask(__name__)
+    _configure_app(app, WebAPISettings(CACHE_CONTROL=dict(MAX_AGE=60), METRICS=False))
+    assert "metrics.get_metrics" not in app.view_functions
+    assert "hot_keys.get_hot_keys" in app.view_functions
@@ -0,0 +1,142 @@
+import json
+import logging
+from time import sleep
+from uuid import UUID
+
+from flask import Flask
+
+from diystore.infrastructure.instrumentation import Timings
+from diystore.infrastructure.instrumentation import timer
+from diystore.infrastructure.instrumentation import timed
+from diystore.infrastructure.instrumentation import start_timings
+from diystore.infrastructure.instrumentation import stop_timings
+from diystore.infrastructure.instrumentation import get_timings
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import LoadedProductOrmModelStub
+from diystore.api.flaskrestapi import blueprints
+
+
+def test_infra_instrumentation_timer_noop_without_timings():
+    assert get_timings() is None
+    with timer("db"):
+        pass
+    assert get_timings() is None
+
+
+def test_infra_instrumentation_timed_noop_without_timings():
+    @timed("hydration")
+    def f(x):
+        return x * 2
+
+    assert f(2) == 4
+    assert get_timings() is None
+
+
+def test_infra_instrumentation_timings_are_exclusive():
+    # GIVEN started timings
+    token = start_timings()
+    # WHEN measuring nested blocks
+    with timer("usecase"):
+        sleep(0.01)
+        with timer("db"):
+            sleep(0.02)
+        with timer("db"):
+            sleep(0.02)
+    timings = stop_timings(token)
+    # THEN each layer accounts only for its own time
+    measured = dict(timings.items())
+    assert measured["db"].count == 2
+    assert measured["usecase"].count == 1
+    assert measured["db"].duration >= 0.04
+    assert 0.01 <= measured["usecase"].duration < 0.04
+    assert get_timings() is None
+
+
+def test_infra_instrumentation_server_timing_header():
+    timings = Timings()
+    with timings.measure("db"):
+        pass
+    with timings.measure("db"):
+        pass
+    header = timings.generate_server_timing_header()
+    db, total = header.split(", ")
+    assert db.startswith("db;dur=")
+    assert db.endswith(';desc="2 calls"')
+    assert total.startswith("total;dur=")
+
+
+def test_infra_instrumentation_as_dict():
+    timings = Timings()
+    with timings.measure("cache"):
+        pass
+    d = timings.as_dict()
+    assert d["total_ms"] >= 0
+    assert d["timings"]["cache"]["count"] == 1
+
+
+def test_infra_instrumentation_controller_layers(
+    product_controller: ProductController, sqlrepo: SQLProductRepository
+):
+    # GIVEN a persisted product
+    product_controller._repo = sqlrepo
+    product_orm = LoadedProductOrmModelStub()
+    product_id = UUID(bytes=product_orm.id).hex
+    with sqlrepo._session as s:
+        s.add(product_orm)
+        s.commit()
+    # WHEN it's requested with timings started
+    token = start_timings()
+    product_controller.get_one(product_id=product_id)
+    timings = stop_timings(token)
+    # THEN every layer was measured
+    assert {"cache", "usecase", "db", "hydration", "presenter"} <= {
+        name for name, _ in timings.items()
+    }
+
+
+def _get_top_categories(controller: ProductController, **config):
+    app = Flask(__name__)
+    app.config.update(
+        MIMETYPE="application/json", CACHE_CONTROL=dict(MAX_AGE=60), **config
+    )
+    app.register_blueprint(blueprints.products_bp)
+    blueprints.product_controller = controller
+    try:
+        return app.test_client().get("/top-categories")
+    finally:
+        blueprints.product_controller = None
+
+
+def test_infra_instrumentation_server_timing_response_header(
+    product_controller: ProductController,
+):
+    response = _get_top_categories(product_controller, SERVER_TIMING=True)
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert "usecase;dur=" in response.headers["Server-Timing"]
+    assert get_timings() is None
+
+
+def test_infra_instrumentation_server_timing_disabled(
+    product_controller: ProductController,
+):
+    response = _get_top_categories(product_controller)
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+
+def test_infra_instrumentation_server_timing_logged(
+    product_controller: ProductController, caplog
+):
+    # GIVEN the default logging configuration, the root logger at WARNING
+    # WHEN a request is timed
+    response = _get_top_categories(product_controller, SERVER_TIMING=True)
+    assert response.status_code == 200
+    # THEN its timings are logged
+    records = [r for r in caplog.records if r.levelno == logging.INFO]
+    assert len(records) == 1
+    logged = json.loads(records[0].getMessage())
+    assert logged["event"] == "request_timings"
+    assert logged["path"] == "/top-categories"
+    assert logged["status"] == 200
@@ -0,0 +1,142 @@
+import os
+import sys
+import subprocess
+from uuid import UUID
+
+import pytest
+from flask import Flask
+from prometheus_client import REGISTRY
+
+from diystore.infrastructure.instrumentation import generate_metrics
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.controllers.web.factories import ProductControllerFactory
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import LoadedProductOrmModelStub
+from diystore.api.flaskrestapi import blueprints
+from diystore.api.flaskrestapi.blueprints.metrics_bp import bp as metrics_bp
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_infra_metrics_cache_miss(product_controller: ProductController):
+    before = _sample(
+        "diystore_cache_lookups_total", method="get_vendors", result="miss"
+    )
+    product_controller.get_vendors()
+    after = _sample("diystore_cache_lookups_total", method="get_vendors", result="miss")
+    assert after == before + 1
+
+
+def test_infra_metrics_cache_hit(
+    product_controller: ProductController, mock_product_cache
+):
+    mock_product_cache.get.return_value = "[]"
+    before = _sample("diystore_cache_lookups_total", method="get_vendors", result="hit")
+    product_controller.get_vendors()
+    after = _sample("diystore_cache_lookups_total", method="get_vendors", result="hit")
+    assert after == before + 1
+
+
+def test_infra_metrics_cache_error(
+    product_controller: ProductController, mock_product_cache
+):
+    mock_product_cache.get.side_effect = ConnectionError
+    labels = dict(method="get_vendors", result="error")
+    before = _sample("diystore_cache_lookups_total", **labels)
+    with pytest.raises(ConnectionError):
+        product_controller.get_vendors()
+    assert _sample("diystore_cache_lookups_total", **labels) == before + 1
+
+
+def test_infra_metrics_cache_disabled(
+    sqlrepo: SQLProductRepository, mock_product_cache
+):
+    # GIVEN a controller with the metrics disabled, like its repository
+    sqlrepo._metrics = False
+    controller = ProductControllerFactory(repo=sqlrepo, cache=mock_product_cache)
+    labels = dict(method="get_vendors", result="miss")
+    before = _sample("diystore_cache_lookups_total", **labels)
+    # WHEN its cache is missed
+    controller.get_vendors()
+    # THEN the lookup is not counted
+    assert _sample("diystore_cache_lookups_total", **labels) == before
+
+
+def test_infra_metrics_repository_queries(sqlrepo: SQLProductRepository):
+    # GIVEN a persisted product
+    product_orm = LoadedProductOrmModelStub()
+    product_id = UUID(bytes=product_orm.id)
+    with sqlrepo._session as s:
+        s.add(product_orm)
+        s.commit()
+    queries = _sample("diystore_db_queries_total", method="get_product")
+    checkouts = _sample("diystore_db_pool_checkout_duration_seconds_count")
+    checked_out = _sample("diystore_db_pool_checked_out_connections")
+    # WHEN it's retrieved
+    sqlrepo.get_product(product_id)
+    # THEN the queries of the method and the pool checkout are observed
+    assert _sample("diystore_db_queries_total", method="get_product") > queries
+    assert _sample("diystore_db_pool_checkout_duration_seconds_count") == checkouts + 1
+    assert _sample("diystore_db_pool_checked_out_connections") == checked_out
+
+
+def test_infra_metrics_repository_disabled():
+    # GIVEN a repository with the metrics disabled
+    repo = SQLProductRepository(scheme="sqlite", host="/:memory:", metrics=False)
+    repo.create_schema()
+    queries = _sample("diystore_db_queries_total", method="get_product")
+    checkouts = _sample("diystore_db_pool_checkout_duration_seconds_count")
+    # WHEN a product is retrieved
+    repo.get_product(UUID(int=1))
+    # THEN neither the queries nor the pool checkout are observed
+    assert _sample("diystore_db_queries_total", method="get_product") == queries
+    assert _sample("diystore_db_pool_checkout_duration_seconds_count") == checkouts
+
+
+def test_infra_metrics_endpoint_and_request_metrics(
+    product_controller: ProductController,
+):
+    app = Flask(__name__)
+    app.config.update(MIMETYPE="application/json", CACHE_CONTROL=dict(MAX_AGE=60))
+    app.register_blueprint(blueprints.products_bp)
+    app.register_blueprint(metrics_bp)
+    blueprints.product_controller = product_controller
+    labels = dict(method="GET", route="/vendors/<string:vendor_id>")
+    before = _sample("diystore_http_requests_total", status="404", **labels)
+    try:
+        client = app.test_client()
+        client.get(f"/vendors/{UUID(int=1).hex}")
+        response = client.get("/metrics")
+    finally:
+        blueprints.product_controller = None
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert "diystore_http_request_duration_seconds_bucket" in body
+    assert "diystore_http_response_size_bytes_bucket" in body
+    assert _sample("diystore_http_requests_total", status="404", **labels) == before + 1
+
+
+def test_infra_metrics_aggregated_across_processes(tmp_path, monkeypatch):
+    # GIVEN two processes counting cache hits in the multiprocess directory
+    env = dict(
+        os.environ,
+        PROMETHEUS_MULTIPROC_DIR=str(tmp_path),
+        PYTHONPATH=os.pathsep.join(sys.path),
+    )
+    code = (
+        "from diystore.infrastructure.instrumentation import CACHE_LOOKUPS;"
+        "CACHE_LOOKUPS.labels('get_one', 'hit').inc()"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    # WHEN the metrics are generated
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    data, _ = generate_metrics()
+    # THEN the counts of both processes are summed
+    assert (
+        'diystore_cache_lookups_total{method="get_one",result="hit"} 2.0'
+        in data.decode()
+    )
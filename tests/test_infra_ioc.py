@@ -0,0 +1,173 @@
+from time import sleep
+from threading import Barrier
+from unittest.mock import Mock
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from diystore.application.usecases.product import ProductRepository
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.main import IoCContainer
+from diystore.infrastructure.main import Lifetime
+from diystore.infrastructure.main import create_ioc_container
+from diystore.infrastructure.main import ioc_factory
+from diystore.api import flaskrestapi
+from diystore.api.flaskrestapi import blueprints
+
+
+class Dependency:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.dispose = Mock()
+
+
+def test_infra_ioc_transient_built_on_every_call():
+    ioc = IoCContainer()
+    ioc.register(ProductRepository, Dependency, a=1)
+    first, second = ioc.provide(ProductRepository), ioc.provide(ProductRepository)
+    assert first is not second
+    assert first.kwargs == dict(a=1)
+
+
+def test_infra_ioc_singleton_built_once():
+    implementation = Mock(side_effect=Dependency)
+    ioc = IoCContainer()
+    ioc.register(ProductRepository, implementation, lifetime=Lifetime.SINGLETON, a=1)
+    implementation.assert_not_called()
+    assert ioc.provide(ProductRepository) is ioc.provide(ProductRepository)
+    implementation.assert_called_once_with(a=1)
+
+
+def test_infra_ioc_singleton_built_once_by_concurrent_calls():
+    # GIVEN a singleton slow to build, e.g. an engine connecting
+    built = []
+
+    def create():
+        sleep(0.01)
+        built.append(Dependency())
+        return built[-1]
+
+    ioc = IoCContainer()
+    ioc.register(ProductRepository, create, lifetime=Lifetime.SINGLETON)
+    barrier = Barrier(8)
+
+    def provide():
+        barrier.wait()
+        return ioc.provide(ProductRepository)
+
+    # WHEN it's first provided concurrently
+    with ThreadPoolExecutor(8) as executor:
+        provided = list(executor.map(lambda _: provide(), range(8)))
+    # THEN it's built once
+    assert len(built) == 1
+    assert all(p is built[0] for p in provided)
+
+
+def test_infra_ioc_scoped_built_once_per_scope():
+    ioc = IoCContainer()
+    ioc.register(Cache, Dependency, lifetime=Lifetime.SCOPED)
+    with ioc.scope():
+        first = ioc.provide(Cache)
+        assert ioc.provide(Cache) is first
+    first.dispose.assert_called_once_with(close=True)
+    with ioc.scope():
+        assert ioc.provide(Cache) is not first
+
+
+def test_infra_ioc_scoped_outside_scope():
+    ioc = IoCContainer()
+    ioc.register(Cache, Dependency, lifetime=Lifetime.SCOPED)
+    with pytest.raises(LookupError):
+        ioc.provide(Cache)
+
+
+def test_infra_ioc_scopes_isolated_between_threads():
+    ioc = IoCContainer()
+    ioc.register(Cache, Dependency, lifetime=Lifetime.SCOPED)
+
+    def provide_in_scope(_):
+        with ioc.scope():
+            return ioc.provide(Cache)
+
+    with ThreadPoolExecutor(4) as executor:
+        provided = list(executor.map(provide_in_scope, range(4)))
+    assert len({id(p) for p in provided}) == 4
+
+
+def test_infra_ioc_dispose_keeps_singletons():
+    ioc = IoCContainer()
+    ioc.register(ProductRepository, Dependency, lifetime=Lifetime.SINGLETON)
+    ioc.register(Cache, Dependency, lifetime=Lifetime.SINGLETON)
+    repo = ioc.provide(ProductRepository)
+    ioc.dispose(close=False)
+    repo.dispose.assert_called_once_with(close=False)
+    assert ioc.provide(ProductRepository) is repo
+
+
+def test_infra_ioc_shutdown():
+    # GIVEN a container with a singleton built, and a shutdown hook
+    ioc = IoCContainer()
+    ioc.register(ProductRepository, Dependency, lifetime=Lifetime.SINGLETON)
+    repo = ioc.provide(ProductRepository)
+    hook = Mock()
+    ioc.on_shutdown(hook)
+    # WHEN it's shut down
+    ioc.shutdown()
+    # THEN the singleton's connections are closed, and the hook run once
+    repo.dispose.assert_called_once_with(close=True)
+    hook.assert_called_once_with()
+    ioc.shutdown()
+    hook.assert_called_once_with()
+    assert ioc.provide(ProductRepository) is not repo
+
+
+def test_infra_ioc_factory_one_pool_per_backend(monkeypatch):
+    monkeypatch.setattr(ioc_factory, "SQLProductRepository", Dependency)
+    monkeypatch.setattr(ioc_factory, "RedisRepresentationCache", Dependency)
+    ioc = create_ioc_container()
+    assert ioc.provide(ProductRepository) is ioc.provide(ProductRepository)
+    assert ioc.provide(Cache) is ioc.provide(Cache)
+
+
+def test_infra_ioc_process_container(monkeypatch):
+    monkeypatch.setattr(ioc_factory, "_ioc_container", None)
+    ioc = ioc_factory.get_ioc_container()
+    assert ioc_factory.get_ioc_container() is ioc
+    ioc_factory.shutdown_ioc_container()
+    assert ioc_factory.get_ioc_container() is not ioc
+
+
+def test_infra_ioc_scope_of_a_request(monkeypatch):
+    # GIVEN a scoped binding of the process container
+    ioc = IoCContainer()
+    ioc.register(Cache, Dependency, lifetime=Lifetime.SCOPED)
+    monkeypatch.setattr(flaskrestapi, "get_ioc_container", lambda: ioc)
+    monkeypatch.setenv("API_CACHE_CONTROL__MAX_AGE", "60")
+    app = flaskrestapi.create_app()
+    provided = []
+
+    @app.get("/scoped")
+    def scoped():
+        provided.extend((ioc.provide(Cache), ioc.provide(Cache)))
+        return ""
+
+    # WHEN it's provided while handling requests
+    client = app.test_client()
+    client.get("/scoped")
+    client.get("/scoped")
+    # THEN each request has its own instance, disposed once it ends
+    first, second, third, fourth = provided
+    assert first is second and third is fourth and first is not third
+    first.dispose.assert_called_once_with(close=True)
+    third.dispose.assert_called_once_with(close=True)
+
+
+def test_infra_ioc_shutdown_forgets_the_product_controller(monkeypatch):
+    monkeypatch.setattr(ioc_factory, "_ioc_container", None)
+    monkeypatch.setattr(ioc_factory, "SQLProductRepository", Dependency)
+    monkeypatch.setattr(ioc_factory, "RedisRepresentationCache", Dependency)
+    controller = blueprints.get_product_controller()
+    flaskrestapi.shutdown()
+    assert blueprints.product_controller is None
+    assert blueprints.get_product_controller() is not controller
+    flaskrestapi.shutdown()
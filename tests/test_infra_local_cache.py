@@ -0,0 +1,189 @@
+import os
+
+import pytest
+
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.cache.local_cache import KeyValueRepresentationCache
+from diystore.infrastructure.cache.local_cache import MemoryRepresentationCache
+from diystore.infrastructure.cache.local_cache import SharedMemoryRepresentationCache
+from diystore.infrastructure.cache.local_cache import SQLiteRepresentationCache
+from diystore.infrastructure.cache.local_cache import shared_memory_cache
+from diystore.infrastructure.cache.local_cache import sqlite_cache
+from diystore.infrastructure.main.settings import InfraSettings
+from diystore.infrastructure.main import create_ioc_container
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shared_memory_cache, "time", clock)
+    monkeypatch.setattr(sqlite_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=("memory", "shared_memory", "sqlite"))
+def make_cache(request, tmp_path, clock):
+    def make(**kwargs) -> KeyValueRepresentationCache:
+        if request.param == "memory":
+            return MemoryRepresentationCache(clock=clock, **kwargs)
+        if request.param == "shared_memory":
+            return SharedMemoryRepresentationCache(
+                str(tmp_path / "cache"), slots=64, slot_size=4096, **kwargs
+            )
+        return SQLiteRepresentationCache(str(tmp_path / "cache.sqlite"), **kwargs)
+
+    return make
+
+
+def test_infra_local_cache_representation(make_cache):
+    cache = make_cache()
+    assert cache.get(fname="get_vendors") is None
+    cache.set("[]", etag="abc", fname="get_vendors")
+    assert cache.get(fname="get_vendors") == "[]"
+    assert cache.get_etag(fname="get_vendors") == "abc"
+    cache.delete(fname="get_vendors")
+    assert cache.get(fname="get_vendors") is None
+    assert cache.get_etag(fname="get_vendors") is None
+
+
+def test_infra_local_cache_encoded_representation(make_cache):
+    cache = make_cache()
+    cache.set("[]", etag="abc", fname="get_vendors")
+    cache.set_encoded("gzip", b"compressed", "abc", fname="get_vendors")
+    assert cache.get_encoded("gzip", fname="get_vendors") == (b"compressed", "abc")
+    # compressed before the representation changed
+    cache.set("[1]", etag="def", fname="get_vendors")
+    assert cache.get_encoded("gzip", fname="get_vendors") == (None, None)
+
+
+def test_infra_local_cache_expires(make_cache, clock):
+    cache = make_cache(ttl=10)
+    cache.set("[]", fname="get_vendors")
+    clock.now += 9
+    assert cache.get(fname="get_vendors") == "[]"
+    clock.now += 1
+    assert cache.get(fname="get_vendors") is None
+
+
+def test_infra_local_cache_many_keys(make_cache):
+    cache = make_cache()
+    for i in range(40):
+        cache.set(f"[{i}]", fname="get_product", product_id=i)
+    hits = [cache.get(fname="get_product", product_id=i) for i in range(40)]
+    # the shared memory table may evict the keys colliding over a few slots
+    assert sum(h == f"[{i}]" for i, h in enumerate(hits)) >= 36
+    assert all(h in (None, f"[{i}]") for i, h in enumerate(hits))
+
+
+def test_infra_local_cache_memory_evicts_least_recently_used(clock):
+    cache = MemoryRepresentationCache(max_entries=2, clock=clock)
+    cache.set("a", fname="a")
+    cache.set("b", fname="b")
+    cache.get(fname="a")
+    cache.set("c", fname="c")
+    assert cache.get(fname="b") is None
+    assert cache.get(fname="a") == "a"
+
+
+@pytest.mark.parametrize(
+    "make_shared_cache",
+    (
+        lambda path: SharedMemoryRepresentationCache(
+            str(path / "cache"), slots=64, slot_size=4096
+        ),
+        lambda path: SQLiteRepresentationCache(str(path / "cache.sqlite")),
+    ),
+    ids=("shared_memory", "sqlite"),
+)
+def test_infra_local_cache_shared_between_workers(tmp_path, make_shared_cache):
+    # GIVEN a cache opened by a master, then used by a forked worker
+    cache = make_shared_cache(tmp_path)
+    cache.set("[]", fname="get_vendors")
+    pid = os.fork()
+    if pid == 0:
+        cache.dispose(close=False)
+        cache.set("[1]", fname="get_top_categories")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    # THEN what the worker stored is read by the others
+    assert make_shared_cache(tmp_path).get(fname="get_top_categories") == "[1]"
+    assert cache.get(fname="get_top_categories") == "[1]"
+
+
+def _overflow_files(tmp_path) -> list:
+    return os.listdir(tmp_path / "cache.8x256.overflow")
+
+
+def test_infra_local_cache_shared_memory_value_larger_than_slot(tmp_path):
+    # GIVEN a representation larger than a slot
+    cache = SharedMemoryRepresentationCache(str(tmp_path / "cache"), slots=8, slot_size=256)
+    cache.set("[]", fname="get_vendors")
+    cache.set("x" * 300, etag="abc", fname="get_vendors")
+    # THEN it's kept in an overflow file, next to its ETag
+    assert cache.get(fname="get_vendors") == "x" * 300
+    assert cache.get_etag(fname="get_vendors") == "abc"
+    assert len(_overflow_files(tmp_path)) == 1
+    # and the file is removed once the value fits in its slot again
+    cache.set("[]", fname="get_vendors")
+    assert cache.get(fname="get_vendors") == "[]"
+    assert _overflow_files(tmp_path) == []
+
+
+def test_infra_local_cache_shared_memory_overflow_removed(tmp_path):
+    cache = SharedMemoryRepresentationCache(str(tmp_path / "cache"), slots=8, slot_size=256)
+    cache.set("x" * 300, fname="get_vendors")
+    cache.set("y" * 300, fname="get_top_categories")
+    cache.delete(fname="get_vendors")
+    assert cache.get(fname="get_vendors") is None
+    assert len(_overflow_files(tmp_path)) == 1
+    cache.clear()
+    assert cache.get(fname="get_top_categories") is None
+    assert _overflow_files(tmp_path) == []
+
+
+def test_infra_local_cache_shared_memory_overflow_not_written(monkeypatch, tmp_path):
+    # GIVEN a cached value, and a device too full for the overflow files
+    cache = SharedMemoryRepresentationCache(str(tmp_path / "cache"), slots=8, slot_size=256)
+    cache.set("[]", fname="get_vendors")
+
+    def replace(*args):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(shared_memory_cache.os, "replace", replace)
+    # WHEN a value larger than a slot is set
+    cache.set("x" * 300, fname="get_vendors")
+    # THEN it's not kept, and the previous value is not served any longer
+    assert cache.get(fname="get_vendors") is None
+
+
+def test_infra_local_cache_shared_memory_clear(tmp_path):
+    cache = SharedMemoryRepresentationCache(str(tmp_path / "cache"), slots=8, slot_size=256)
+    cache.set("[]", fname="get_vendors")
+    cache.clear()
+    assert cache.get(fname="get_vendors") is None
+
+
+@pytest.mark.parametrize(
+    "backend, implementation",
+    (
+        ("memory", MemoryRepresentationCache),
+        ("shared_memory", SharedMemoryRepresentationCache),
+        ("sqlite", SQLiteRepresentationCache),
+    ),
+)
+def test_infra_local_cache_from_settings(monkeypatch, tmp_path, backend, implementation):
+    monkeypatch.delenv("REDIS_URL")
+    monkeypatch.setenv("CACHE_BACKEND", backend)
+    monkeypatch.setenv("CACHE_PATH", str(tmp_path / "cache"))
+    cache = create_ioc_container(InfraSettings()).provide(Cache)
+    assert isinstance(cache, implementation)
+    cache.set("[]", fname="get_vendors")
+    assert cache.get(fname="get_vendors") == "[]"
@@ -0,0 +1,137 @@
+import gzip
+from unittest.mock import Mock
+
+import pytest
+from pydantic import ValidationError
+from flask import Flask
+from flask import Response
+from flask import request
+
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.api.flaskrestapi import blueprints
+from diystore.api.flaskrestapi.microcache import ResponseMicroCache
+from diystore.api.api_settings import WebAPISettings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def microcaching_app(product_controller: ProductController, clock):
+    app = Flask(__name__)
+    app.config.update(
+        MIMETYPE="application/json",
+        CACHE_CONTROL=dict(MAX_AGE=60),
+        ADD_ETAG=True,
+        COMPRESSION=True,
+        COMPRESSION_MIN_SIZE=0,
+    )
+    app.extensions["microcache"] = ResponseMicroCache(2, clock=clock)
+    app.register_blueprint(blueprints.products_bp)
+    blueprints.product_controller = product_controller
+    yield app
+    blueprints.product_controller = None
+
+
+def test_infra_microcache_key_normalizes_query():
+    app = Flask(__name__)
+    with app.test_request_context("/products?b=2&a=1&a=0"):
+        first = ResponseMicroCache.generate_key(request)
+    with app.test_request_context("/products?a=0&a=1&b=2"):
+        assert ResponseMicroCache.generate_key(request) == first
+        assert ResponseMicroCache.generate_key(request, "gzip") != first
+
+
+def test_infra_microcache_expires(clock):
+    microcache = ResponseMicroCache(2, clock=clock)
+    microcache.set("k", Response("body", headers={"ETag": '"abc"'}))
+    cached = microcache.get("k")
+    assert cached.get_data() == b"body"
+    assert cached.get_etag() == ("abc", False)
+    clock.now = 2
+    assert microcache.get("k") is None
+    assert len(microcache) == 0
+
+
+def test_infra_microcache_evicts_least_recently_used(clock):
+    microcache = ResponseMicroCache(2, max_entries=2, clock=clock)
+    microcache.set("a", Response("a"))
+    microcache.set("b", Response("b"))
+    microcache.get("a")
+    microcache.set("c", Response("c"))
+    assert microcache.get("b") is None
+    assert microcache.get("a") is not None
+
+
+def test_infra_microcache_response_served_from_memory(
+    microcaching_app, product_controller, monkeypatch
+):
+    # GIVEN a response already sent
+    client = microcaching_app.test_client()
+    first = client.get("/vendors?b=1&a=2")
+    spy = Mock(wraps=product_controller.get_vendors)
+    monkeypatch.setattr(product_controller, "get_vendors", spy)
+    # WHEN the same URL is requested again, its arguments in another order
+    second = client.get("/vendors?a=2&b=1")
+    # THEN the response is served without reaching the controller
+    spy.assert_not_called()
+    assert second.get_data() == first.get_data()
+    assert second.get_etag() == first.get_etag()
+    assert second.mimetype == "application/json"
+
+
+def test_infra_microcache_expired_response_regenerated(
+    microcaching_app, product_controller, monkeypatch, clock
+):
+    client = microcaching_app.test_client()
+    client.get("/vendors")
+    spy = Mock(wraps=product_controller.get_vendors)
+    monkeypatch.setattr(product_controller, "get_vendors", spy)
+    clock.now = 2
+    client.get("/vendors")
+    spy.assert_called_once()
+
+
+def test_infra_microcache_conditional_request(microcaching_app):
+    client = microcaching_app.test_client()
+    etag, _ = client.get("/vendors").get_etag()
+    response = client.get("/vendors", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304
+
+
+def test_infra_microcache_content_codings_cached_apart(microcaching_app):
+    client = microcaching_app.test_client()
+    plain = client.get("/vendors")
+    compressed = client.get("/vendors", headers={"Accept-Encoding": "gzip, br;q=0"})
+    cached = client.get("/vendors", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert compressed.content_encoding == cached.content_encoding == "gzip"
+    assert gzip.decompress(cached.get_data()) == plain.get_data()
+    assert client.get("/vendors").content_encoding is None
+
+
+def test_infra_microcache_errors_not_cached(microcaching_app):
+    client = microcaching_app.test_client()
+    client.get("/vendors/not-an-id")
+    assert len(microcaching_app.extensions["microcache"]) == 0
+
+
+@pytest.mark.parametrize("ttl", (0, 1, 2.5, 5))
+def test_infra_microcache_ttl_setting(ttl):
+    settings = WebAPISettings(CACHE_CONTROL=dict(MAX_AGE=60), MICROCACHE_TTL=ttl)
+    assert settings.MICROCACHE_TTL == ttl
+
+
+@pytest.mark.parametrize("ttl", (-1, 0.5, 5.1, 60))
+def test_infra_microcache_ttl_setting_out_of_bounds(ttl):
+    with pytest.raises(ValidationError):
+        WebAPISettings(CACHE_CONTROL=dict(MAX_AGE=60), MICROCACHE_TTL=ttl)
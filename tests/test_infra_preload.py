@@ -0,0 +1,105 @@
+import gc
+import runpy
+from uuid import UUID
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from diystore.application.usecases.product import ProductRepository
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.controllers.web import ProductController
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.api import flaskrestapi
+from diystore.infrastructure.controllers.web import factories
+from diystore.api.flaskrestapi import blueprints
+
+
+def test_infra_preload_controller_disposes_connections():
+    repo = Mock(SQLProductRepository)
+    cache = Mock(Cache)
+    cache.dispose = Mock()
+    controller = ProductController(repo, cache, None)
+    controller.dispose(close=False)
+    repo.dispose.assert_called_once_with(close=False)
+    cache.dispose.assert_called_once_with(close=False)
+
+
+def test_infra_preload_controller_dependencies_without_connections():
+    controller = ProductController(Mock(ProductRepository), Mock(Cache), None)
+    controller.dispose()
+
+
+def test_infra_preload_builds_controller_and_closes_connections(monkeypatch):
+    # GIVEN the app loaded in the master, before any request
+    controller = Mock(ProductController)
+    monkeypatch.setattr(blueprints, "product_controller", None)
+    monkeypatch.setattr(factories, "ProductControllerFactory", lambda: controller)
+    # WHEN it's preloaded
+    flaskrestapi.preload()
+    # THEN the controller is built, but holds no connection the workers inherit
+    assert blueprints.product_controller is controller
+    controller.dispose.assert_called_once_with()
+
+
+def test_infra_preload_reset_after_fork(monkeypatch):
+    controller = Mock(ProductController)
+    monkeypatch.setattr(blueprints, "product_controller", controller)
+    flaskrestapi.reset_after_fork()
+    controller.dispose.assert_called_once_with(close=False)
+
+
+def test_infra_preload_reset_after_fork_without_controller(monkeypatch):
+    monkeypatch.setattr(blueprints, "product_controller", None)
+    flaskrestapi.reset_after_fork()
+
+
+def test_infra_preload_repository_usable_after_dispose(tmp_path):
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{tmp_path}/db.sqlite")
+    repo.create_schema()
+    repo.dispose(close=False)
+    assert not repo.get_products(UUID(int=1))
+
+
+def _load_gunicorn_config(monkeypatch, tmp_path, **env) -> dict:
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path / "metrics"))
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    return runpy.run_path(str(Path(__file__).parents[1] / "app" / "gunicorn.conf.py"))
+
+
+@pytest.mark.parametrize(
+    "worker_class, preload_app",
+    [("sync", True), ("gthread", True), ("gevent", False)],
+)
+def test_infra_preload_gunicorn_config(
+    monkeypatch, tmp_path, worker_class, preload_app
+):
+    config = _load_gunicorn_config(
+        monkeypatch, tmp_path, WEB_WORKER_CLASS=worker_class, WEB_PRELOAD="true"
+    )
+    assert config["preload_app"] is preload_app
+
+
+def test_infra_preload_gunicorn_master_collects_after_preload(monkeypatch, tmp_path):
+    # GIVEN the gunicorn config, loaded with the garbage collector enabled
+    config = _load_gunicorn_config(monkeypatch, tmp_path)
+    assert gc.isenabled()
+    collecting_while_preloading = []
+    preload = Mock(
+        side_effect=lambda: collecting_while_preloading.append(gc.isenabled())
+    )
+    monkeypatch.setattr(flaskrestapi, "preload", preload)
+    server = Mock()
+    server.cfg.preload_app = True
+
+    # WHEN the master starts
+    try:
+        config["on_starting"](server)
+        # THEN the app is preloaded without collections, which then resume
+        assert collecting_while_preloading == [False]
+        assert gc.isenabled()
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+        gc.enable()
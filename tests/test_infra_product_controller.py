@@ -607,3 +607,39 @@ def test_infra_product_controller_get_reviews_product_with_reviews(
         assert review.creation_date.isoformat() in representation
         assert review.feedback in representation
     assert len(reviews) == len(json.loads(representation).get("reviews"))
+
+
+@pytest.mark.parametrize(("parameter", "value"), (("limit", "0"), ("cursor", "abc")))
+def test_infra_product_controller_get_reviews_invalid_pagination_argument(
+    product_controller: ProductController, parameter, value
+):
+    with pytest.raises(InvalidQueryArgument):
+        product_controller.get_reviews(product_id=uuid4().hex, **{parameter: value})
+
+
+def test_infra_product_controller_get_reviews_paginated(
+    product_controller: ProductController,
+):
+    # GIVEN an existing product with reviews
+    product = ProductStub()
+    reviews = ProductReviewStub.build_batch(3, product_id=product.id)
+    repo = product_controller._repo
+    with repo._session as s:
+        s.add(ProductOrmModel.from_domain_entity(product))
+        s.add_all(ProductReviewOrmModel.from_domain_entity(r) for r in reviews)
+        s.commit()
+
+    # WHEN its reviews are walked through page by page
+    first_page = json.loads(
+        product_controller.get_reviews(product_id=product.id.hex, limit="2")
+    )
+    second_page = json.loads(
+        product_controller.get_reviews(
+            product_id=product.id.hex, limit="2", cursor=first_page["next_cursor"]
+        )
+    )
+
+    # THEN every review is returned once and the last page has no cursor
+    retrieved_ids = [r["id"] for r in first_page["reviews"] + second_page["reviews"]]
+    assert sorted(retrieved_ids) == sorted(r.id.hex for r in reviews)
+    assert second_page["next_cursor"] is None
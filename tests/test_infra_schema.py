@@ -0,0 +1,59 @@
+import pytest
+from flask import Flask
+from sqlalchemy import inspect
+
+from diystore.application.usecases.product import ProductRepository
+from diystore.infrastructure.main import IoCContainer
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.api.flaskrestapi.blueprints import schema_bp
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "db.sqlite"
+
+
+@pytest.fixture
+def cli_runner(db_path, monkeypatch):
+    ioc = IoCContainer()
+    ioc.register(ProductRepository, SQLProductRepository, scheme="sqlite", host=f"/{db_path}")
+    monkeypatch.setattr(schema_bp, "get_ioc_container", lambda: ioc)
+    app = Flask(__name__)
+    app.register_blueprint(schema_bp.bp)
+    return app.test_cli_runner()
+
+
+def test_infra_schema_repository_does_not_connect_on_creation(db_path):
+    SQLProductRepository(scheme="sqlite", host=f"/{db_path}")
+    assert not db_path.exists()
+
+
+def test_infra_schema_create_and_drop(db_path):
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{db_path}")
+    repo.create_schema()
+    assert "product" in inspect(repo._engine).get_table_names()
+    repo.drop_schema()
+    assert inspect(repo._engine).get_table_names() == []
+
+
+def test_infra_schema_cli_create(cli_runner, db_path):
+    result = cli_runner.invoke(args=["schema", "create"])
+    assert result.exit_code == 0
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{db_path}")
+    assert "product" in inspect(repo._engine).get_table_names()
+
+
+def test_infra_schema_cli_drop(cli_runner, db_path):
+    cli_runner.invoke(args=["schema", "create"])
+    result = cli_runner.invoke(args=["schema", "drop", "--yes"])
+    assert result.exit_code == 0
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{db_path}")
+    assert inspect(repo._engine).get_table_names() == []
+
+
+def test_infra_schema_cli_drop_aborted(cli_runner, db_path):
+    cli_runner.invoke(args=["schema", "create"])
+    result = cli_runner.invoke(args=["schema", "drop"], input="n\n")
+    assert "Aborting" in result.output
+    repo = SQLProductRepository(scheme="sqlite", host=f"/{db_path}")
+    assert inspect(repo._engine).get_table_names()
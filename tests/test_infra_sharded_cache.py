@@ -0,0 +1,150 @@
+from unittest.mock import Mock
+from collections import Counter
+
+import pytest
+
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.cache.sharded_cache import HashRing
+from diystore.infrastructure.cache.sharded_cache import ShardedRepresentationCache
+from diystore.infrastructure.cache.local_cache import MemoryRepresentationCache
+from diystore.infrastructure.main.settings import InfraSettings
+from diystore.infrastructure.main import create_ioc_container
+from .fakes import FakeRedisRepresentationCache
+
+
+KEYS = [f"ProductController:get_products:{i}" for i in range(10000)]
+
+
+@pytest.fixture
+def sharded_cache():
+    return ShardedRepresentationCache(
+        {f"node-{i}": FakeRedisRepresentationCache() for i in range(4)}
+    )
+
+
+def test_infra_sharded_cache_ring_spreads_keys_evenly():
+    ring = HashRing([f"node-{i}" for i in range(4)])
+    counts = Counter(ring.get_node(k) for k in KEYS)
+    assert len(counts) == 4
+    assert all(0.18 < c / len(KEYS) < 0.32 for c in counts.values())
+
+
+def test_infra_sharded_cache_ring_node_added_remaps_few_keys():
+    # GIVEN keys spread over 4 nodes
+    ring = HashRing([f"node-{i}" for i in range(4)])
+    before = {k: ring.get_node(k) for k in KEYS}
+    # WHEN a fifth node is added
+    ring.add_node("node-4")
+    # THEN only the keys it takes over are remapped, about a fifth of them
+    moved = [k for k in KEYS if ring.get_node(k) != before[k]]
+    assert 0.12 < len(moved) / len(KEYS) < 0.28
+    assert all(ring.get_node(k) == "node-4" for k in moved)
+
+
+def test_infra_sharded_cache_ring_node_removed_remaps_its_keys_only():
+    ring = HashRing([f"node-{i}" for i in range(4)])
+    before = {k: ring.get_node(k) for k in KEYS}
+    ring.remove_node("node-0")
+    moved = {k for k in KEYS if ring.get_node(k) != before[k]}
+    assert moved == {k for k in KEYS if before[k] == "node-0"}
+
+
+def test_infra_sharded_cache_ring_same_mapping_in_every_process():
+    nodes = [f"node-{i}" for i in range(4)]
+    first, second = HashRing(nodes), HashRing(reversed(nodes))
+    assert all(first.get_node(k) == second.get_node(k) for k in KEYS[:1000])
+
+
+def test_infra_sharded_cache_ring_errors():
+    ring = HashRing(["node-0"])
+    with pytest.raises(ValueError):
+        ring.add_node("node-0")
+    with pytest.raises(KeyError):
+        ring.remove_node("node-1")
+    ring.remove_node("node-0")
+    with pytest.raises(LookupError):
+        ring.get_node("key")
+
+
+def test_infra_sharded_cache_representation_keys_on_one_shard(sharded_cache):
+    # GIVEN a representation, its ETag and a compressed variant
+    sharded_cache.set("[]", etag="abc", cname="ProductController", fname="get_vendors")
+    sharded_cache.set_encoded(
+        "gzip", b"compressed", "abc", cname="ProductController", fname="get_vendors"
+    )
+    # THEN they're all stored on a single shard
+    (shard,) = [s for s in sharded_cache.shards.values() if s._conn._data]
+    assert len(shard._conn._data) == 4
+    assert sharded_cache.get(cname="ProductController", fname="get_vendors") == "[]"
+    assert sharded_cache.get_etag(cname="ProductController", fname="get_vendors") == "abc"
+    assert sharded_cache.get_encoded(
+        "gzip", cname="ProductController", fname="get_vendors"
+    ) == (b"compressed", "abc")
+    sharded_cache.delete(cname="ProductController", fname="get_vendors")
+    assert sharded_cache.get(cname="ProductController", fname="get_vendors") is None
+
+
+def test_infra_sharded_cache_spreads_representations(sharded_cache):
+    for i in range(400):
+        sharded_cache.set("[]", fname="get_product", product_id=i)
+    assert all(len(s._conn._data) > 50 for s in sharded_cache.shards.values())
+
+
+def test_infra_sharded_cache_many_representations(sharded_cache, monkeypatch):
+    reads, writes = {}, {}
+    for name, shard in sharded_cache.shards.items():
+        reads[name] = Mock(wraps=shard._binary_conn.mget)
+        writes[name] = Mock(wraps=shard._conn.pipeline)
+        monkeypatch.setattr(shard._binary_conn, "mget", reads[name])
+        monkeypatch.setattr(shard._conn, "pipeline", writes[name])
+    keys = [dict(fname="get_product", product_id=i) for i in range(40)]
+    # WHEN representations spread over every shard are written and read
+    sharded_cache.set_many(
+        [(f"[{i}]", "abc", kwargs) for i, kwargs in enumerate(keys)]
+    )
+    values = sharded_cache.get_many([*keys, dict(fname="get_vendors")])
+    # THEN each shard is written in a pipeline, and read in a round trip
+    assert values == [f"[{i}]" for i in range(40)] + [None]
+    assert all(write.call_count == 1 for write in writes.values())
+    assert sum(read.call_count for read in reads.values()) == 4
+    assert sharded_cache.get_etag(**keys[0]) == "abc"
+
+
+def test_infra_sharded_cache_many_representations_without_batching():
+    cache = ShardedRepresentationCache(
+        {f"node-{i}": MemoryRepresentationCache() for i in range(2)}
+    )
+    keys = [dict(fname="get_product", product_id=i) for i in range(10)]
+    assert cache.set_many([("[]", None, kwargs) for kwargs in keys])
+    assert cache.get_many(keys) == ["[]"] * 10
+
+
+def test_infra_sharded_cache_shard_removed(sharded_cache):
+    for i in range(100):
+        sharded_cache.set("[]", fname="get_product", product_id=i)
+    removed = sharded_cache.remove_shard("node-0")
+    assert "node-0" not in sharded_cache.shards
+    # the keys of the removed shard are missed, the others still hit
+    hits = sum(
+        sharded_cache.get(fname="get_product", product_id=i) is not None
+        for i in range(100)
+    )
+    assert hits == 100 - len(removed._conn._data)
+
+
+def test_infra_sharded_cache_dispose():
+    shards = {f"node-{i}": Mock(Cache) for i in range(2)}
+    for shard in shards.values():
+        shard.dispose = Mock()
+    ShardedRepresentationCache(shards).dispose(close=False)
+    for shard in shards.values():
+        shard.dispose.assert_called_once_with(close=False)
+
+
+def test_infra_sharded_cache_from_settings(monkeypatch):
+    monkeypatch.setenv(
+        "REDIS_SHARD_URLS", '["redis://:pw@node-0:6379/0", "redis://:pw@node-1:6380/0"]'
+    )
+    cache = create_ioc_container(InfraSettings()).provide(Cache)
+    assert isinstance(cache, ShardedRepresentationCache)
+    assert set(cache.shards) == {"node-0:6379/0", "node-1:6380/0"}
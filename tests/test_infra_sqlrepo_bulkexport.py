@@ -0,0 +1,169 @@
+import io
+import csv
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from .conftest import persist_new_products_and_return_category_id
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository import ProductOrmModel
+from diystore.infrastructure.repositories.sqlrepository import ProductVendorOrmModel
+from diystore.infrastructure.repositories.sqlrepository import TerminalCategoryOrmModel
+from diystore.infrastructure.repositories.sqlrepository.bulkexport import export_catalog
+
+
+def test_infra_sqlrepo_bulkexport_unknown_format(sqlrepo: SQLProductRepository):
+    with pytest.raises(ValueError):
+        export_catalog(sqlrepo, io.StringIO(), "parquet")
+
+
+def test_infra_sqlrepo_bulkexport_ndjson_catalog(sqlrepo: SQLProductRepository):
+    category_id = persist_new_products_and_return_category_id(5, sqlrepo._session)
+    output = io.StringIO()
+
+    report = export_catalog(sqlrepo, output, "ndjson", batch_size=2)
+
+    assert report.rows_exported == 5
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    products = {p.id.hex: p for p in sqlrepo.get_products(category_id)}
+    assert {r["id"] for r in records} == set(products)
+    for record in records:
+        product = products[record["id"]]
+        assert record["price"]["final"] == str(product.get_final_price())
+        assert record["vendor"]["name"] == product.vendor.name
+        assert [c["id"] for c in record["category_path"]] == [
+            product.category.parent.parent.id.hex,
+            product.category.parent.id.hex,
+            category_id.hex,
+        ]
+
+
+def test_infra_sqlrepo_bulkexport_csv_catalog(sqlrepo: SQLProductRepository):
+    persist_new_products_and_return_category_id(3, sqlrepo._session)
+    output = io.StringIO()
+
+    export_catalog(sqlrepo, output, "csv")
+
+    output.seek(0)
+    rows = list(csv.DictReader(output))
+    assert len(rows) == 3
+    assert {"price_final", "vendor_name", "category_path", "category_path_ids"} <= set(
+        rows[0]
+    )
+    assert rows[0]["category_path"].count(" > ") == 2
+
+
+def test_infra_sqlrepo_bulkexport_incremental_catalog(sqlrepo: SQLProductRepository):
+    # GIVEN a full export
+    category_id = persist_new_products_and_return_category_id(4, sqlrepo._session)
+    full_report = export_catalog(sqlrepo, io.StringIO(), "ndjson")
+
+    # WHEN a product is changed after it
+    changed_product = sqlrepo.get_products(category_id)[0]
+    with sqlrepo._session as s:
+        orm_product = s.get(ProductOrmModel, changed_product.get_id_in_bytes_format())
+        orm_product.quantity += 1
+        s.commit()
+    output = io.StringIO()
+    report = export_catalog(
+        sqlrepo, output, "ndjson", since=full_report.watermark, overlap=timedelta(0)
+    )
+
+    # THEN only that product is exported and the watermark moves forward
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["id"] for r in records] == [changed_product.id.hex]
+    assert report.watermark > full_report.watermark
+
+
+def test_infra_sqlrepo_bulkexport_incremental_catalog_without_changes(
+    sqlrepo: SQLProductRepository,
+):
+    persist_new_products_and_return_category_id(2, sqlrepo._session)
+    full_report = export_catalog(sqlrepo, io.StringIO(), "ndjson")
+
+    report = export_catalog(
+        sqlrepo,
+        io.StringIO(),
+        "ndjson",
+        since=full_report.watermark,
+        overlap=timedelta(0),
+    )
+
+    assert report.rows_exported == 0
+    assert report.watermark == full_report.watermark
+
+
+def _exported_ids(sqlrepo: SQLProductRepository, since, **kwargs) -> set[str]:
+    output = io.StringIO()
+    export_catalog(sqlrepo, output, "ndjson", since=since, **kwargs)
+    return {json.loads(line)["id"] for line in output.getvalue().splitlines()}
+
+
+def test_infra_sqlrepo_bulkexport_incremental_catalog_overlap(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN a full export
+    category_id = persist_new_products_and_return_category_id(3, sqlrepo._session)
+    full_report = export_catalog(sqlrepo, io.StringIO(), "ndjson")
+
+    # WHEN a transaction committed after it had changed a product before its
+    # watermark
+    late_product = sqlrepo.get_products(category_id)[0]
+    with sqlrepo._session as s:
+        s.execute(
+            update(ProductOrmModel)
+            .where(ProductOrmModel.id == late_product.get_id_in_bytes_format())
+            .values(updated_at=full_report.watermark - timedelta(seconds=1))
+        )
+        s.commit()
+
+    # THEN the next export reads that product again, within the overlap only
+    assert late_product.id.hex in _exported_ids(sqlrepo, full_report.watermark)
+    assert late_product.id.hex not in _exported_ids(
+        sqlrepo, full_report.watermark, overlap=timedelta(milliseconds=500)
+    )
+
+
+def test_infra_sqlrepo_bulkexport_incremental_catalog_after_vendor_rename(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN a full export
+    category_id = persist_new_products_and_return_category_id(3, sqlrepo._session)
+    full_report = export_catalog(sqlrepo, io.StringIO(), "ndjson")
+
+    # WHEN the vendor of a product is renamed
+    renamed_product = sqlrepo.get_products(category_id)[0]
+    with sqlrepo._session as s:
+        vendor = s.get(ProductVendorOrmModel, renamed_product.vendor.id.bytes)
+        vendor.name = "Renamed vendor"
+        s.commit()
+    output = io.StringIO()
+    export_catalog(
+        sqlrepo, output, "ndjson", since=full_report.watermark, overlap=timedelta(0)
+    )
+
+    # THEN that product is exported again with the new name
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [r["id"] for r in records] == [renamed_product.id.hex]
+    assert records[0]["vendor"]["name"] == "Renamed vendor"
+
+
+def test_infra_sqlrepo_bulkexport_incremental_catalog_after_category_rename(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN a full export of the products of two categories
+    category_id = persist_new_products_and_return_category_id(3, sqlrepo._session)
+    persist_new_products_and_return_category_id(2, sqlrepo._session)
+    full_report = export_catalog(sqlrepo, io.StringIO(), "ndjson")
+
+    # WHEN the top level category of the first one is renamed
+    with sqlrepo._session as s:
+        category = s.get(TerminalCategoryOrmModel, category_id.bytes)
+        category.parent.parent.name = "Renamed category"
+        s.commit()
+    ids = _exported_ids(sqlrepo, full_report.watermark, overlap=timedelta(0))
+
+    # THEN only its products are exported again
+    assert ids == {p.id.hex for p in sqlrepo.get_products(category_id)}
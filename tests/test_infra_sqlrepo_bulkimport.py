@@ -0,0 +1,186 @@
+import io
+import csv
+import json
+from uuid import UUID
+from uuid import uuid4
+from decimal import Decimal
+
+import pytest
+
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository import ProductOrmModel
+from diystore.infrastructure.repositories.sqlrepository.bulkimport import CatalogImporter
+from diystore.infrastructure.repositories.sqlrepository.bulkimport import ImportProgress
+from diystore.infrastructure.repositories.sqlrepository.bulkimport import import_catalog
+from diystore.infrastructure.repositories.sqlrepository.bulkimport import read_rows
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import VatOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import DiscountOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductVendorOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import TerminalCategoryOrmModelStub
+
+
+@pytest.fixture
+def references(sqlrepo: SQLProductRepository) -> dict:
+    vat = VatOrmModelStub(rate=Decimal("0.20"))
+    discount = DiscountOrmModelStub(rate=Decimal("0.50"))
+    vendor = ProductVendorOrmModelStub()
+    category = TerminalCategoryOrmModelStub()
+    ids = dict(
+        vat_id=UUID(bytes=vat.id).hex,
+        discount_id=UUID(bytes=discount.id).hex,
+        vendor_id=UUID(bytes=vendor.id).hex,
+        category_id=UUID(bytes=category.id).hex,
+    )
+    with sqlrepo._session as s:
+        s.add_all((vat, discount, vendor, category))
+        s.commit()
+    return ids
+
+
+def _catalog_row(references: dict, **kwargs) -> dict:
+    row = dict(
+        ean="1234567890123",
+        name="hammer",
+        description="a steel hammer",
+        base_price="10.00",
+        quantity="5",
+        height="10.0",
+        width="2.0",
+        length="30.0",
+        color="black",
+        material="steel",
+        country_of_origin="Portugal",
+        warranty="2",
+        thumbnail_photo_url="https://cdn.diystore.com/hammer.jpg?size=200x200",
+        medium_size_photo_url="https://cdn.diystore.com/hammer.jpg?size=640x640",
+        large_size_photo_url="https://cdn.diystore.com/hammer.jpg?size=1000x1000",
+        **references,
+    )
+    row.update(kwargs)
+    return row
+
+
+def _csv_catalog(rows: list[dict]) -> io.StringIO:
+    file = io.StringIO()
+    writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    file.seek(0)
+    return file
+
+
+def _jsonl_catalog(rows: list[dict]) -> io.StringIO:
+    return io.StringIO("\n".join(json.dumps(r) for r in rows))
+
+
+def test_infra_sqlrepo_bulkimport_unknown_format():
+    with pytest.raises(ValueError):
+        read_rows(io.StringIO(), "xml")
+
+
+def test_infra_sqlrepo_bulkimport_csv_catalog(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    rows = [_catalog_row(references, ean=f"{i:013}") for i in range(5)]
+
+    report = import_catalog(sqlrepo, _csv_catalog(rows), "csv", workers=0)
+
+    assert report.rows_read == report.rows_imported == 5
+    assert report.errors == []
+    assert report.rows_per_second > 0
+    with sqlrepo._session as s:
+        products = s.query(ProductOrmModel).all()
+        assert len(products) == 5
+        assert {p.final_price for p in products} == {Decimal("6.00")}
+        assert {p.final_price_without_discount for p in products} == {Decimal("12.00")}
+
+
+def test_infra_sqlrepo_bulkimport_jsonl_catalog_with_explicit_ids(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    product_id = uuid4()
+    rows = [_catalog_row(references, id=product_id.hex, quantity=5, warranty=2)]
+
+    report = import_catalog(sqlrepo, _jsonl_catalog(rows), "jsonl", workers=0)
+
+    assert report.rows_imported == 1
+    assert sqlrepo.get_product(product_id).name == "hammer"
+
+
+def test_infra_sqlrepo_bulkimport_invalid_rows_are_reported(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    rows = [
+        _catalog_row(references),
+        _catalog_row(references, ean="123"),
+        _catalog_row(references, vat_id=uuid4().hex),
+        _catalog_row(references, quantity="many"),
+        _catalog_row(references, base_price="0"),
+    ]
+
+    report = import_catalog(sqlrepo, _csv_catalog(rows), "csv", workers=0)
+
+    assert report.rows_read == 5
+    assert report.rows_imported == 1
+    assert [e.line for e in report.errors] == [3, 4, 5, 6]
+    assert "ean" in report.errors[0].error
+    assert "vat_id" in report.errors[1].error
+    assert "quantity" in report.errors[2].error
+    assert "value" in report.errors[3].error
+
+
+def test_infra_sqlrepo_bulkimport_invalid_json_line_is_reported(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    catalog = io.StringIO(json.dumps(_catalog_row(references)) + "\n{not json\n[]")
+
+    report = import_catalog(sqlrepo, catalog, "jsonl", workers=0)
+
+    assert report.rows_imported == 1
+    assert [e.line for e in report.errors] == [2, 3]
+
+
+def test_infra_sqlrepo_bulkimport_reimport_updates_existing_products(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    import_catalog(
+        sqlrepo, _csv_catalog([_catalog_row(references)]), "csv", workers=0
+    )
+    updated_row = _catalog_row(references, base_price="20.00", name="big hammer")
+
+    report = import_catalog(sqlrepo, _csv_catalog([updated_row]), "csv", workers=0)
+
+    assert report.rows_imported == 1
+    with sqlrepo._session as s:
+        product = s.query(ProductOrmModel).one()
+        assert product.name == "big hammer"
+        assert product.final_price == Decimal("12.00")
+
+
+def test_infra_sqlrepo_bulkimport_progress_is_reported_per_batch(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    rows = [_catalog_row(references, ean=f"{i:013}") for i in range(5)]
+    progress: list[ImportProgress] = []
+    importer = CatalogImporter(
+        sqlrepo, batch_size=2, workers=0, on_progress=progress.append
+    )
+
+    importer.run(read_rows(_csv_catalog(rows), "csv"))
+
+    assert [p.rows_read for p in progress] == [2, 4, 5]
+    assert progress[-1].rows_imported == 5
+
+
+def test_infra_sqlrepo_bulkimport_parallel_validation(
+    sqlrepo: SQLProductRepository, references: dict
+):
+    rows = [_catalog_row(references, ean=f"{i:013}") for i in range(10)]
+    rows.append(_catalog_row(references, ean="abc"))
+
+    report = import_catalog(
+        sqlrepo, _csv_catalog(rows), "csv", workers=2, batch_size=3
+    )
+
+    assert report.rows_imported == 10
+    assert [e.line for e in report.errors] == [12]
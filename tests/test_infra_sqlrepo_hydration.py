@@ -0,0 +1,77 @@
+from uuid import UUID
+
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository.hydration import hydration_context
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import TerminalCategoryOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import VatOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import DiscountOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductVendorOrmModelStub
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import ProductOrmModelStub
+
+from .conftest import persist_new_products_and_return_category_id
+
+
+def test_infra_sqlrepo_hydration_listing_shares_categories(sqlrepo: SQLProductRepository):
+    # GIVEN a category with many products
+    category_id = persist_new_products_and_return_category_id(20, sqlrepo._session)
+    # WHEN they are retrieved
+    products = sqlrepo.get_products(category_id)
+    # THEN the category chain is built once for the whole listing
+    assert len(products) == 20
+    assert len({id(p.category) for p in products}) == 1
+    assert len({id(p.category.parent) for p in products}) == 1
+    assert len({id(p.category.parent.parent) for p in products}) == 1
+
+
+def test_infra_sqlrepo_hydration_context_is_per_call(sqlrepo: SQLProductRepository):
+    category_id = persist_new_products_and_return_category_id(2, sqlrepo._session)
+    first = sqlrepo.get_products(category_id)
+    second = sqlrepo.get_products(category_id)
+    assert first[0].category == second[0].category
+    assert first[0].category is not second[0].category
+
+
+def test_infra_sqlrepo_hydration_without_context_builds_new_objects():
+    category = TerminalCategoryOrmModelStub()
+    assert category.to_domain_entity() is not category.to_domain_entity()
+
+
+def test_infra_sqlrepo_hydration_with_context_reuses_objects():
+    category = TerminalCategoryOrmModelStub()
+    with hydration_context():
+        assert category.to_domain_entity() is category.to_domain_entity()
+        assert category.parent.to_domain_entity() is category.parent.to_domain_entity()
+
+
+def test_infra_sqlrepo_hydration_listing_shares_value_objects(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN products sharing their VAT, discount and vendor
+    category = TerminalCategoryOrmModelStub()
+    vat, discount, vendor = (
+        VatOrmModelStub(),
+        DiscountOrmModelStub(),
+        ProductVendorOrmModelStub(),
+    )
+    products_orm = ProductOrmModelStub.build_batch(
+        10,
+        category_id=category.id,
+        category=category,
+        vat_id=vat.id,
+        vat=vat,
+        discount_id=discount.id,
+        discount=discount,
+        vendor_id=vendor.id,
+        vendor=vendor,
+    )
+    with sqlrepo._session as s:
+        s.add_all(products_orm)
+        s.commit()
+        category_id = UUID(bytes=category.id)
+    # WHEN they are retrieved
+    products = sqlrepo.get_products(category_id)
+    # THEN each shared object is built once
+    assert len(products) == 10
+    assert len({id(p.price.vat) for p in products}) == 1
+    assert len({id(p.price.discount) for p in products}) == 1
+    assert len({id(p.vendor) for p in products}) == 1
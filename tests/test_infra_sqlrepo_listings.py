@@ -0,0 +1,335 @@
+from uuid import UUID
+from threading import Event
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+
+from .conftest import persist_new_products_and_return_category_id
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository import ProductOrmModel
+from diystore.infrastructure.repositories.sqlrepository import ProductReviewOrmModel
+from diystore.infrastructure.repositories.sqlrepository.listings import ListingIndex
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import TerminalCategoryOrmModelStub
+from diystore.infrastructure.main.settings import RepositorySettings
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    # repositories sharing a database, with and without the index
+    def make(**kwargs) -> SQLProductRepository:
+        return SQLProductRepository(
+            scheme="sqlite", host=f"/{tmp_path / 'db.sqlite'}", **kwargs
+        )
+
+    return make
+
+
+@pytest.fixture
+def sql_repo(make_repo) -> SQLProductRepository:
+    repo = make_repo()
+    repo.create_schema()
+    return repo
+
+
+@pytest.fixture
+def indexed_repo(make_repo, sql_repo) -> SQLProductRepository:
+    return make_repo(listings=True, listings_refresh_interval=0)
+
+
+def _ordered_keys(products, order_by: str) -> list:
+    if order_by == "price":
+        return [p.get_final_price() for p in products]
+    return [p.rating for p in products]
+
+
+@pytest.mark.parametrize("order_by", ("price", "rating"))
+@pytest.mark.parametrize("descending", (False, True))
+@pytest.mark.parametrize(
+    "filters",
+    (
+        dict(),
+        dict(price_min=Decimal("50"), price_max=Decimal("500")),
+        dict(rating_min=Decimal("2"), rating_max=Decimal("4.5")),
+        dict(with_discounts_only=True),
+    ),
+)
+def test_infra_sqlrepo_listings_same_as_sql(
+    sql_repo, indexed_repo, order_by, descending, filters
+):
+    category_id = persist_new_products_and_return_category_id(30, sql_repo._session)
+    persist_new_products_and_return_category_id(5, sql_repo._session)
+    method = f"get_products_ordering_by_{order_by}"
+
+    expected = getattr(sql_repo, method)(category_id, descending=descending, **filters)
+    products = getattr(indexed_repo, method)(category_id, descending=descending, **filters)
+
+    assert {p.id for p in products} == {p.id for p in expected}
+    assert _ordered_keys(products, order_by) == _ordered_keys(expected, order_by)
+    assert len(indexed_repo._listings) == 30
+
+
+def test_infra_sqlrepo_listings_unknown_category(indexed_repo):
+    assert indexed_repo.get_products_ordering_by_rating(UUID(int=1)) == ()
+
+
+def test_infra_sqlrepo_listings_follow_product_updates(sql_repo, indexed_repo):
+    # GIVEN a listed category
+    category_id = persist_new_products_and_return_category_id(10, sql_repo._session)
+    products = indexed_repo.get_products_ordering_by_price(category_id)
+    cheapest, most_expensive = products[0], products[-1]
+    # WHEN the price of its cheapest product is raised, and its most expensive
+    # product is moved to another category
+    with sql_repo._session as s:
+        product = s.get(ProductOrmModel, cheapest.id.bytes)
+        product.base_price = Decimal("9999")
+        product.discount_id = None
+        other = TerminalCategoryOrmModelStub()
+        other_id = other.id
+        s.add(other)
+        s.get(ProductOrmModel, most_expensive.id.bytes).category_id = other_id
+        s.commit()
+    # THEN the listing is updated
+    products = indexed_repo.get_products_ordering_by_price(category_id)
+    assert products[-1].id == cheapest.id
+    assert most_expensive.id not in {p.id for p in products}
+    assert len(products) == 9
+    products = indexed_repo.get_products_ordering_by_price(UUID(bytes=other_id))
+    assert [p.id for p in products] == [most_expensive.id]
+
+
+def test_infra_sqlrepo_listings_follow_bulk_updates(sql_repo, indexed_repo):
+    category_id = persist_new_products_and_return_category_id(5, sql_repo._session)
+    assert len(indexed_repo.get_products_ordering_by_rating(category_id)) == 5
+    # the ratings are reset once the reviews are deleted
+    with sql_repo._session as s:
+        s.execute(delete(ProductReviewOrmModel))
+        s.commit()
+    sql_repo.recompute_rating_aggregates()
+    assert indexed_repo.get_products_ordering_by_rating(category_id) == ()
+
+
+def test_infra_sqlrepo_listings_refreshed_every_interval(sql_repo):
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    index = ListingIndex(refresh_interval=10, clock=clock)
+    category_id = persist_new_products_and_return_category_id(3, sql_repo._session)
+    select = dict(
+        category_id=category_id.bytes,
+        order_by="rating",
+        price_min=Decimal("0.01"),
+        price_max=Decimal("1000000"),
+        rating_min=Decimal("0"),
+        rating_max=Decimal("5"),
+    )
+    with sql_repo._session as s:
+        assert len(index.select(s, **select)) == 3
+    with sql_repo._session as s:
+        s.execute(update(ProductOrmModel).values(rating=None))
+        s.commit()
+    with sql_repo._session as s:
+        assert len(index.select(s, **select)) == 3
+    clock.now = 10
+    with sql_repo._session as s:
+        # the bulk update left updated_at, within the overlap
+        assert len(index.select(s, **select)) == 0
+
+
+class _Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+_SELECT_ALL = dict(
+    order_by="final_price",
+    price_min=Decimal("0.01"),
+    price_max=Decimal("1000000"),
+    rating_min=Decimal("0"),
+    rating_max=Decimal("5"),
+)
+
+
+def test_infra_sqlrepo_listings_rebuilt_every_interval(sql_repo):
+    # GIVEN a loaded category
+    clock = _Clock()
+    index = ListingIndex(refresh_interval=1, rebuild_interval=60, clock=clock)
+    category_id = persist_new_products_and_return_category_id(3, sql_repo._session)
+    with sql_repo._session as s:
+        ids = index.select(s, category_id.bytes, **_SELECT_ALL)
+    # WHEN its cheapest product is repriced by a writer whose clock lags, and
+    # its most expensive one moved away
+    with sql_repo._session as s:
+        lagging = s.scalar(select(func.min(ProductOrmModel.updated_at)))
+        s.execute(
+            update(ProductOrmModel)
+            .where(ProductOrmModel.id == ids[0])
+            .values(final_price=Decimal("99999"), updated_at=lagging - timedelta(1))
+        )
+        s.execute(
+            update(ProductOrmModel)
+            .where(ProductOrmModel.id == ids[-1])
+            .values(category_id=UUID(int=1).bytes, updated_at=lagging - timedelta(1))
+        )
+        s.commit()
+    # THEN the refreshes miss the change, until the category is rebuilt
+    clock.now = 59
+    with sql_repo._session as s:
+        assert index.select(s, category_id.bytes, **_SELECT_ALL) == ids
+    clock.now = 60
+    with sql_repo._session as s:
+        assert index.select(s, category_id.bytes, **_SELECT_ALL) == [ids[1], ids[0]]
+
+
+class _RecordingSession:
+    """Session recording the number of rows of each query."""
+
+    def __init__(self, session):
+        self._session = session
+        self.rows: list[int] = []
+
+    def scalar(self, *args, **kwargs):
+        return self._session.scalar(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        result = self._session.execute(*args, **kwargs).freeze()
+        self.rows.append(len(result.data))
+        return result()
+
+
+def test_infra_sqlrepo_listings_without_updated_at(sql_repo):
+    # GIVEN products written before updated_at was
+    clock = _Clock()
+    index = ListingIndex(refresh_interval=1, clock=clock)
+    category_id = persist_new_products_and_return_category_id(3, sql_repo._session)
+    persist_new_products_and_return_category_id(5, sql_repo._session)
+    with sql_repo._session as s:
+        s.execute(update(ProductOrmModel).values(updated_at=None))
+        s.commit()
+    with sql_repo._session as s:
+        ids = index.select(s, category_id.bytes, **_SELECT_ALL)
+    # WHEN one of them is written
+    with sql_repo._session as s:
+        s.get(ProductOrmModel, ids[0]).base_price = Decimal("99999")
+        s.commit()
+    clock.now = 1
+    with sql_repo._session as s:
+        session = _RecordingSession(s)
+        # THEN the refresh reads it alone, not the whole table
+        assert index.select(session, category_id.bytes, **_SELECT_ALL)[-1] == ids[0]
+        assert session.rows == [1]
+
+
+def test_infra_sqlrepo_listings_cleared_with_the_schema(indexed_repo):
+    indexed_repo.create_schema()
+    category_id = persist_new_products_and_return_category_id(3, indexed_repo._session)
+    indexed_repo.get_products_ordering_by_rating(category_id)
+    indexed_repo.drop_schema()
+    assert len(indexed_repo._listings) == 0
+
+
+def test_infra_sqlrepo_listings_settings(monkeypatch):
+    monkeypatch.setenv("DATABASE_LISTING_INDEX", "true")
+    monkeypatch.setenv("DATABASE_LISTING_REFRESH_INTERVAL", "0.5")
+    monkeypatch.setenv("DATABASE_LISTING_REBUILD_INTERVAL", "30")
+    settings = RepositorySettings()
+    assert settings.listings
+    assert settings.listings_refresh_interval == 0.5
+    assert settings.listings_rebuild_interval == 30
+
+
+class _BlockingSession:
+    """Session whose queries wait for ``release``."""
+
+    def __init__(self, session, blocked: Event, release: Event):
+        self._session = session
+        self._blocked = blocked
+        self._release = release
+
+    def execute(self, *args, **kwargs):
+        self._blocked.set()
+        self._release.wait(5)
+        return self._session.execute(*args, **kwargs)
+
+
+def test_infra_sqlrepo_listings_not_locked_during_queries(sql_repo):
+    # GIVEN a loaded category, whose refresh waits on the database
+    class Clock:
+        now = 0.0
+
+        def __call__(self):
+            return self.now
+
+    clock = Clock()
+    index = ListingIndex(refresh_interval=10, clock=clock)
+    category_id = persist_new_products_and_return_category_id(3, sql_repo._session)
+    select = dict(
+        category_id=category_id.bytes,
+        order_by="rating",
+        price_min=Decimal("0.01"),
+        price_max=Decimal("1000000"),
+        rating_min=Decimal("0"),
+        rating_max=Decimal("5"),
+    )
+    with sql_repo._session as s:
+        index.select(s, **select)
+    clock.now = 10
+    blocked, release = Event(), Event()
+
+    def refresh():
+        with sql_repo._session as s:
+            index.select(_BlockingSession(s, blocked, release), **select)
+
+    thread = Thread(target=refresh)
+    thread.start()
+    assert blocked.wait(5)
+    try:
+        # WHEN another listing is requested meanwhile
+        # THEN it's answered from the index, without waiting for the refresh
+        def list_products():
+            with sql_repo._session as s:
+                return index.select(s, **select)
+
+        with ThreadPoolExecutor(1) as pool:
+            assert len(pool.submit(list_products).result(timeout=1)) == 3
+    finally:
+        release.set()
+        thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_infra_sqlrepo_listings_concurrent_listings_and_updates(sql_repo, indexed_repo):
+    category_id = persist_new_products_and_return_category_id(20, sql_repo._session)
+    with sql_repo._session as s:
+        ids = [p.id for p in s.query(ProductOrmModel)]
+
+    def list_products(_):
+        return indexed_repo.get_products_ordering_by_price(category_id)
+
+    def update_price(i):
+        with sql_repo._session as s:
+            s.get(ProductOrmModel, ids[i % len(ids)]).base_price = Decimal(i + 1)
+            s.commit()
+
+    with ThreadPoolExecutor(8) as pool:
+        listings = pool.map(list_products, range(40))
+        updates = pool.map(update_price, range(20))
+        assert all(len(products) == 20 for products in listings)
+        list(updates)
+    expected = sql_repo.get_products_ordering_by_price(category_id)
+    products = indexed_repo.get_products_ordering_by_price(category_id)
+    # the ties are ordered by id in the index only
+    assert {p.id for p in products} == {p.id for p in expected}
+    assert _ordered_keys(products, "price") == _ordered_keys(expected, "price")
@@ -1,5 +1,6 @@
 from uuid import UUID
 from uuid import uuid4
+from decimal import Decimal
 
 import pytest
 from sqlalchemy.orm import Session
@@ -104,7 +105,7 @@ def test_infra_sqlrepo_product_review_relationship(orm_session: Session):
     orm_session.add_all((product_orm, *reviews))
     orm_session.commit()
     product_orm = orm_session.get(ProductOrmModel, product_orm.id)
-    assert product_orm.reviews == reviews
+    assert set(product_orm.reviews) == set(reviews)
     for review in product_orm.reviews:
         assert review.product == product_orm
 
@@ -148,6 +149,8 @@ def test_infra_sqlrepo_product_to_domain_entity(orm_session: Session):
     assert product_entity.category == validated_entity.category
     assert product_entity.rating == validated_entity.rating
     assert product_entity.reviews == validated_entity.reviews == {}
+    assert product_entity.review_count == validated_entity.review_count == 3
+    assert product_entity.rating_sum == validated_entity.rating_sum
     assert product_entity.photo_url == validated_entity.photo_url
     assert product_entity.vendor == validated_entity.vendor
 
@@ -184,6 +187,8 @@ def test_infra_sqlrepo_product_from_domain_entity_correct_type(orm_session: Sess
     assert product_orm.warranty == product.warranty
     assert product_orm.category_id == product.get_category_id_in_bytes_format()
     assert product_orm.rating == product.rating
+    assert product_orm.review_count == product.review_count == 3
+    assert product_orm.rating_sum == product.rating_sum
     assert product_orm.thumbnail_photo_url == product.get_thumbnail_photo_url()
     assert product_orm.medium_size_photo_url == product.get_medium_size_photo_url()
     assert product_orm.large_size_photo_url == product.get_large_size_photo_url()
@@ -194,3 +199,77 @@ def test_infra_sqlrepo_product_from_domain_entity_correct_type(orm_session: Sess
     assert isinstance(product_orm.vendor, ProductVendorOrmModel)
     for rev in product_orm.reviews:
         assert isinstance(rev, ProductReviewOrmModel)
+
+
+def test_infra_sqlrepo_product_final_prices_are_set_on_insert(orm_session: Session):
+    product_orm = LoadedProductOrmModelStub()
+    orm_session.add(product_orm)
+    orm_session.commit()
+
+    product = product_orm.to_domain_entity()
+    assert product_orm.final_price == product.get_final_price()
+    assert (
+        product_orm.final_price_without_discount
+        == product.get_final_price_without_discount()
+    )
+
+
+def test_infra_sqlrepo_product_final_prices_without_vat_are_not_set(
+    orm_session: Session,
+):
+    product_orm = ProductOrmModelStub(vat_id=uuid4())
+    orm_session.add(product_orm)
+    orm_session.commit()
+    assert product_orm.final_price is None
+    assert product_orm.final_price_without_discount is None
+
+
+def test_infra_sqlrepo_product_final_prices_are_updated_on_base_price_change(
+    orm_session: Session,
+):
+    product_orm = LoadedProductOrmModelStub(
+        base_price=Decimal("10"), vat=VatOrmModelStub(rate=Decimal("0.20"))
+    )
+    orm_session.add(product_orm)
+    orm_session.commit()
+
+    product_orm.base_price = Decimal("20")
+    orm_session.commit()
+    assert product_orm.final_price_without_discount == Decimal("24.00")
+
+
+def test_infra_sqlrepo_product_final_prices_are_updated_on_vat_rate_change(
+    orm_session: Session,
+):
+    vat_orm = VatOrmModelStub(rate=Decimal("0.20"))
+    products = LoadedProductOrmModelStub.build_batch(
+        3, base_price=Decimal("10"), discount_id=None, vat=vat_orm
+    )
+    orm_session.add_all(products)
+    orm_session.commit()
+
+    vat_orm.rate = Decimal("0.10")
+    orm_session.commit()
+    for product_orm in products:
+        orm_session.refresh(product_orm)
+        assert product_orm.final_price == Decimal("11.00")
+
+
+def test_infra_sqlrepo_product_final_prices_are_updated_on_discount_rate_change(
+    orm_session: Session,
+):
+    discount_orm = DiscountOrmModelStub(rate=Decimal("0.50"))
+    product_orm = LoadedProductOrmModelStub(
+        base_price=Decimal("10"),
+        vat=VatOrmModelStub(rate=Decimal("0")),
+        discount=discount_orm,
+    )
+    orm_session.add(product_orm)
+    orm_session.commit()
+    assert product_orm.final_price == Decimal("5.00")
+
+    discount_orm.rate = Decimal("0.10")
+    orm_session.commit()
+    orm_session.refresh(product_orm)
+    assert product_orm.final_price == Decimal("9.00")
+    assert product_orm.final_price_without_discount == Decimal("10.00")
@@ -0,0 +1,118 @@
+from uuid import UUID
+
+import pytest
+from sqlalchemy import select
+
+from diystore.infrastructure.instrumentation import db_operation
+from diystore.infrastructure.repositories.sqlrepository import SQLProductRepository
+from diystore.infrastructure.repositories.sqlrepository import QueryProfiler
+from diystore.infrastructure.repositories.sqlrepository import QueryBudgetExceeded
+from diystore.infrastructure.repositories.sqlrepository import ProductVendorOrmModel
+from diystore.infrastructure.repositories.sqlrepository.models.stubs import LoadedProductOrmModelStub
+
+from .conftest import persist_new_products_and_return_category_id
+
+
+def _persist_products(sqlrepo: SQLProductRepository, no: int) -> list[UUID]:
+    products_orm = LoadedProductOrmModelStub.build_batch(no)
+    ids = [UUID(bytes=p.id) for p in products_orm]
+    with sqlrepo._session as s:
+        s.add_all(products_orm)
+        s.commit()
+    return ids
+
+
+def test_infra_sqlrepo_profiler_groups_statements_by_call(
+    sqlrepo: SQLProductRepository, query_profiler: QueryProfiler
+):
+    # GIVEN persisted products
+    ids = _persist_products(sqlrepo, 3)
+    query_profiler.reset()
+    # WHEN they are retrieved one by one
+    for _id in ids:
+        sqlrepo.get_product(_id)
+    sqlrepo.get_vendors()
+    # THEN each call is recorded with its statements
+    summaries = query_profiler.summarize()
+    assert summaries["get_product"].calls == 3
+    assert summaries["get_vendors"].calls == 1
+    assert summaries["get_vendors"].statements == 1
+    assert [c.method for c in query_profiler.calls] == ["get_product"] * 3 + [
+        "get_vendors"
+    ]
+
+
+def test_infra_sqlrepo_profiler_stops_recording(sqlrepo: SQLProductRepository):
+    with sqlrepo.profile() as profiler:
+        sqlrepo.get_vendors()
+    sqlrepo.get_vendors()
+    assert len(profiler.calls) == 1
+
+
+def test_infra_sqlrepo_profiler_detects_n_plus_one(
+    sqlrepo: SQLProductRepository, query_profiler: QueryProfiler
+):
+    # GIVEN a call executing the same query for every product
+    ids = _persist_products(sqlrepo, 3)
+    with db_operation("get_vendors_one_by_one"), sqlrepo._session as s:
+        for _id in ids:
+            s.execute(select(ProductVendorOrmModel).filter_by(id=_id.bytes)).all()
+    # THEN it is flagged as a N+1 load
+    found = query_profiler.find_n_plus_one()
+    assert list(found) == ["get_vendors_one_by_one"]
+    assert list(found["get_vendors_one_by_one"].values()) == [3]
+    assert "N+1 in get_vendors_one_by_one (3 times)" in query_profiler.report()
+    with pytest.raises(QueryBudgetExceeded):
+        query_profiler.assert_budgets()
+    query_profiler.assert_budgets(allow_n_plus_one=True)
+
+
+def test_infra_sqlrepo_profiler_budget_exceeded(
+    sqlrepo: SQLProductRepository, query_profiler: QueryProfiler
+):
+    sqlrepo.get_vendors()
+    with pytest.raises(QueryBudgetExceeded, match="get_vendors executed 1"):
+        query_profiler.assert_budgets(get_vendors=0)
+
+
+def test_infra_sqlrepo_profiler_explains_slow_queries(sqlrepo: SQLProductRepository):
+    with sqlrepo.profile(slow_query_threshold=0) as profiler:
+        sqlrepo.get_vendors()
+    [(method, statement)] = profiler.find_slow_statements()
+    assert method == "get_vendors"
+    assert any("vendor" in " ".join(map(str, row)) for row in statement.plan)
+    assert "slow query in get_vendors" in profiler.report()
+
+
+def test_infra_sqlrepo_query_budgets(
+    sqlrepo: SQLProductRepository, query_profiler: QueryProfiler
+):
+    category_id = persist_new_products_and_return_category_id(10, sqlrepo._session)
+    product_orm = LoadedProductOrmModelStub()
+    product_id = UUID(bytes=product_orm.id)
+    mid_category_id = UUID(bytes=product_orm.category.parent.id)
+    top_category_id = UUID(bytes=product_orm.category.parent.parent.id)
+    with sqlrepo._session as s:
+        s.add(product_orm)
+        s.commit()
+    query_profiler.reset()
+    sqlrepo.get_product(product_id)
+    sqlrepo.get_products(category_id)
+    sqlrepo.get_products_ordering_by_price(category_id)
+    sqlrepo.get_top_level_categories()
+    sqlrepo.get_mid_level_category(mid_category_id)
+    sqlrepo.get_mid_level_categories(top_category_id)
+    sqlrepo.get_terminal_level_categories(mid_category_id)
+    sqlrepo.get_vendors()
+    sqlrepo.get_reviews(product_id)
+    query_profiler.assert_budgets(
+        get_product=1,
+        get_products=2,
+        get_products_ordering_by_price=2,
+        get_top_level_categories=1,
+        get_mid_level_category=1,
+        get_mid_level_categories=1,
+        get_terminal_level_categories=1,
+        get_vendors=1,
+        get_reviews=2,
+    )
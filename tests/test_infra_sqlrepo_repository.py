@@ -4,6 +4,7 @@ from uuid import uuid1
 from decimal import Decimal
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from factory import Factory
 
@@ -104,6 +105,28 @@ def test_infra_sqlrepo_repository_get_product_that_has_no_reviews(
     assert fetched_product.get_client_reviews() == ()
 
 
+def test_infra_sqlrepo_repository_get_product_first_page_of_reviews(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN a product with more reviews than a page
+    product = LoadedProductOrmModelStub()
+    reviews = ProductReviewOrmModelStub.build_batch(2, product_id=product.id)
+    product_id = UUID(bytes=product.id)
+    with sqlrepo._session as s:
+        s.add_all((product, *reviews))
+        s.commit()
+
+    # WHEN it's fetched with its reviews
+    fetched_product = sqlrepo.get_product(
+        product_id, with_reviews=True, reviews_limit=2
+    )
+
+    # THEN only the newest ones are loaded, along the count of all of them
+    newest = sqlrepo.get_reviews(product_id, limit=2)
+    assert fetched_product.get_client_reviews() == newest
+    assert fetched_product.get_review_count() == 5
+
+
 def test_infra_sqlrepo_get_products_wrong_id_type(sqlrepo: SQLProductRepository):
     with pytest.raises(TypeError):
         sqlrepo.get_products(category_id=1)
@@ -155,7 +178,7 @@ def test_infra_sqlrepo_get_products_price_min_restricts_no_of_products(
 ):
     no_products = 5
     category_id = persist_new_products_and_return_category_id(
-        no_products, sqlrepo._session, base_price=Decimal("99")
+        no_products, sqlrepo._session, base_price=Decimal("49"), discount_id=None
     )
     products = sqlrepo.get_products(category_id, price_min=Decimal("100"))
     assert len(products) == 0
@@ -166,12 +189,23 @@ def test_infra_sqlrepo_get_products_price_max_restricts_no_of_products(
 ):
     no_products = 5
     category_id = persist_new_products_and_return_category_id(
-        no_products, sqlrepo._session, base_price=Decimal("100")
+        no_products, sqlrepo._session, base_price=Decimal("100"), discount_id=None
     )
     products = sqlrepo.get_products(category_id, price_max=Decimal("99"))
     assert len(products) == 0
 
 
+def test_infra_sqlrepo_get_products_price_filters_use_final_price(
+    sqlrepo: SQLProductRepository,
+):
+    vat = VatOrmModelStub(rate=Decimal("0.50"))
+    category_id = persist_new_products_and_return_category_id(
+        3, sqlrepo._session, base_price=Decimal("80"), discount_id=None, vat=vat
+    )
+    assert len(sqlrepo.get_products(category_id, price_max=Decimal("100"))) == 0
+    assert len(sqlrepo.get_products(category_id, price_min=Decimal("120"))) == 3
+
+
 def test_infra_sqlrepo_get_products_rating_min_wrong_type(
     sqlrepo: SQLProductRepository,
 ):
@@ -254,7 +288,7 @@ def test_infra_sqlrepo_get_products_ordering_by_price_descending(
     category_id = persist_new_products_and_return_category_id(5, sqlrepo._session)
 
     products = sqlrepo.get_products_ordering_by_price(category_id, descending=True)
-    products_prices = [p.get_base_price() for p in products]
+    products_prices = [p.get_final_price() for p in products]
     expected_result = sorted(products_prices, reverse=True)
     assert products_prices == expected_result
 
@@ -265,7 +299,7 @@ def test_infra_sqlrepo_get_products_ordering_by_price_ascending(
     category_id = persist_new_products_and_return_category_id(5, sqlrepo._session)
 
     products = sqlrepo.get_products_ordering_by_price(category_id, descending=False)
-    products_prices = [p.get_base_price() for p in products]
+    products_prices = [p.get_final_price() for p in products]
     expected_result = sorted(products_prices)
     assert products_prices == expected_result
 
@@ -646,5 +680,169 @@ def test_infra_sqlrepo_get_reviews_existing_product_with_reviews(
     # WHEN all of its reviews are queried
     retrieved_reviews = sqlrepo.get_reviews(product.id)
 
-    # THEN all of its reviews are returned
-    assert retrieved_reviews == tuple(reviews)
+    # THEN all of its reviews are returned, newest first
+    assert retrieved_reviews == tuple(
+        sorted(reviews, key=lambda r: r.creation_date, reverse=True)
+    )
+
+
+def _persist_product_with_reviews(sqlrepo: SQLProductRepository, no_reviews: int):
+    product = ProductStub()
+    reviews = ProductReviewStub.build_batch(no_reviews, product_id=product.id)
+    with sqlrepo._session as s:
+        s.add(ProductOrmModel.from_domain_entity(product))
+        s.add_all((ProductReviewOrmModel.from_domain_entity(r) for r in reviews))
+        s.commit()
+    return product, sorted(reviews, key=lambda r: (r.creation_date, r.id.bytes))[::-1]
+
+
+def test_infra_sqlrepo_get_reviews_limit(sqlrepo: SQLProductRepository):
+    # GIVEN an existing product with reviews
+    product, reviews = _persist_product_with_reviews(sqlrepo, 5)
+
+    # WHEN a limited number of its reviews is queried
+    retrieved_reviews = sqlrepo.get_reviews(product.id, limit=2)
+
+    # THEN only the newest reviews are returned
+    assert retrieved_reviews == tuple(reviews[:2])
+
+
+def test_infra_sqlrepo_get_reviews_after_keyset(sqlrepo: SQLProductRepository):
+    # GIVEN an existing product with reviews
+    product, reviews = _persist_product_with_reviews(sqlrepo, 5)
+
+    # WHEN the reviews following a given one are queried
+    last_seen = reviews[1]
+    retrieved_reviews = sqlrepo.get_reviews(
+        product.id, after_date=last_seen.creation_date, after_id=last_seen.id
+    )
+
+    # THEN only the reviews older than that one are returned
+    assert retrieved_reviews == tuple(reviews[2:])
+
+
+def test_infra_sqlrepo_get_reviews_same_creation_date_are_not_skipped(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN an existing product with reviews sharing the same creation date
+    product = ProductStub()
+    date = ProductReviewStub().creation_date
+    reviews = ProductReviewStub.build_batch(4, product_id=product.id, creation_date=date)
+    with sqlrepo._session as s:
+        s.add(ProductOrmModel.from_domain_entity(product))
+        s.add_all((ProductReviewOrmModel.from_domain_entity(r) for r in reviews))
+        s.commit()
+
+    # WHEN they are walked through page by page
+    first_page = sqlrepo.get_reviews(product.id, limit=2)
+    second_page = sqlrepo.get_reviews(
+        product.id, limit=2, after_date=date, after_id=first_page[-1].id
+    )
+
+    # THEN every review is returned exactly once
+    assert set(first_page + second_page) == set(reviews)
+
+
+def test_infra_sqlrepo_count_reviews_non_existing_product(
+    sqlrepo: SQLProductRepository,
+):
+    assert sqlrepo.count_reviews(uuid4()) is None
+
+
+def test_infra_sqlrepo_count_reviews_existing_product(sqlrepo: SQLProductRepository):
+    product, _ = _persist_product_with_reviews(sqlrepo, 4)
+    assert sqlrepo.count_reviews(product.id) == 4
+
+
+def test_infra_sqlrepo_recompute_final_prices_all_products(
+    sqlrepo: SQLProductRepository,
+):
+    category_id = persist_new_products_and_return_category_id(5, sqlrepo._session)
+    with sqlrepo._session as s:
+        s.query(ProductOrmModel).update(
+            {ProductOrmModel.final_price: None}, synchronize_session=False
+        )
+        s.commit()
+
+    assert sqlrepo.recompute_final_prices() == 5
+    for product in sqlrepo.get_products(category_id):
+        with sqlrepo._session as s:
+            orm_product = s.get(ProductOrmModel, product.get_id_in_bytes_format())
+            assert orm_product.final_price == product.get_final_price()
+
+
+def test_infra_sqlrepo_recompute_final_prices_filtered_by_vat(
+    sqlrepo: SQLProductRepository,
+):
+    vat = VatOrmModelStub()
+    vat_id = UUID(bytes=vat.id)
+    persist_new_products_and_return_category_id(2, sqlrepo._session, vat=vat)
+    persist_new_products_and_return_category_id(3, sqlrepo._session)
+    with sqlrepo._session as s:
+        s.query(ProductOrmModel).update(
+            {ProductOrmModel.final_price: None}, synchronize_session=False
+        )
+        s.commit()
+    assert sqlrepo.recompute_final_prices(vat_id=vat_id) == 2
+
+
+def test_infra_sqlrepo_recompute_final_prices_unchanged(
+    sqlrepo: SQLProductRepository,
+):
+    persist_new_products_and_return_category_id(3, sqlrepo._session)
+    query = select(ProductOrmModel.id, ProductOrmModel.updated_at)
+    with sqlrepo._session as s:
+        updated_at = dict(s.execute(query).all())
+
+    assert sqlrepo.recompute_final_prices() == 0
+    with sqlrepo._session as s:
+        assert dict(s.execute(query).all()) == updated_at
+
+
+def test_infra_sqlrepo_recompute_rating_aggregates(sqlrepo: SQLProductRepository):
+    product = ProductOrmModelStub(rating=Decimal("0.5"))
+    reviews = [
+        ProductReviewOrmModelStub(product_id=product.id, rating=Decimal(rating))
+        for rating in (2, 3, 5)
+    ]
+    unreviewed_product = ProductOrmModelStub(
+        rating=Decimal("4"), review_count=2, rating_sum=Decimal(8)
+    )
+    product_id, unreviewed_product_id = product.id, unreviewed_product.id
+    with sqlrepo._session as s:
+        s.add_all((product, unreviewed_product, *reviews))
+        s.commit()
+
+    assert sqlrepo.recompute_rating_aggregates() == 2
+    with sqlrepo._session as s:
+        product = s.get(ProductOrmModel, product_id)
+        assert product.review_count == 3
+        assert product.rating_sum == Decimal(10)
+        assert product.rating == Decimal("3.3")
+        unreviewed_product = s.get(ProductOrmModel, unreviewed_product_id)
+        assert unreviewed_product.review_count == 0
+        assert unreviewed_product.rating is None
+
+
+def test_infra_sqlrepo_recompute_rating_aggregates_unchanged(
+    sqlrepo: SQLProductRepository,
+):
+    # GIVEN products whose aggregates are up to date, with and without reviews
+    product = ProductOrmModelStub()
+    reviews = [
+        ProductReviewOrmModelStub(product_id=product.id, rating=Decimal(rating))
+        for rating in (2, 3, 5)
+    ]
+    with sqlrepo._session as s:
+        s.add_all((product, ProductOrmModelStub(), *reviews))
+        s.commit()
+    sqlrepo.recompute_rating_aggregates()
+    query = select(ProductOrmModel.id, ProductOrmModel.updated_at)
+    with sqlrepo._session as s:
+        updated_at = dict(s.execute(query).all())
+
+    # WHEN they're recomputed again
+    # THEN none is written, nor marked as changed
+    assert sqlrepo.recompute_rating_aggregates() == 0
+    with sqlrepo._session as s:
+        assert dict(s.execute(query).all()) == updated_at
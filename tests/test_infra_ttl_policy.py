@@ -0,0 +1,120 @@
+from unittest.mock import Mock
+
+import pytest
+
+from diystore.infrastructure.cache.interfaces import Cache
+from diystore.infrastructure.cache.local_cache import MemoryRepresentationCache
+from diystore.infrastructure.cache.ttl_policy import TTLPolicy
+from diystore.infrastructure.main.settings import InfraSettings
+from diystore.infrastructure.main import create_ioc_container
+from .fakes import FakeRedis
+from .fakes import FakeRedisRepresentationCache
+
+
+def test_infra_ttl_policy_by_method():
+    policy = TTLPolicy(60, methods={"get_vendors": 600})
+    assert policy.ttl("get_vendors", "get_vendors", "abc") == 600
+    assert policy.ttl("get_product:1", "get_product", "abc") == 60
+    assert policy.ttls() == {}
+
+
+def test_infra_ttl_policy_grows_while_unchanged_and_hit():
+    policy = TTLPolicy(60, adaptive=True, max_ttl=200)
+    assert policy.ttl("k", "get_product", "abc") == 60
+    policy.record_hit("k")
+    assert policy.ttl("k", "get_product", "abc") == 120
+    policy.record_hit("k")
+    assert policy.ttl("k", "get_product", "abc") == 200
+    assert policy.current_ttl("k", "get_product") == 200
+
+
+def test_infra_ttl_policy_does_not_grow_without_hits():
+    policy = TTLPolicy(60, adaptive=True)
+    policy.ttl("k", "get_product", "abc")
+    assert policy.ttl("k", "get_product", "abc") == 60
+
+
+def test_infra_ttl_policy_shrinks_when_changed():
+    policy = TTLPolicy(60, adaptive=True, min_ttl=20)
+    policy.ttl("k", "get_product", "abc")
+    policy.record_hit("k")
+    assert policy.ttl("k", "get_product", "def") == 30
+    assert policy.ttl("k", "get_product", "ghi") == 20
+    assert policy.ttls() == {"k": 20}
+
+
+def test_infra_ttl_policy_bounds_the_keys():
+    policy = TTLPolicy(60, adaptive=True, max_keys=2)
+    for key in ("a", "b", "c"):
+        policy.ttl(key, "get_product", "abc")
+    assert list(policy.ttls()) == ["b", "c"]
+
+
+def test_infra_ttl_policy_redis_cache(monkeypatch):
+    # GIVEN a cached representation read since it was stored
+    policy = TTLPolicy(60, adaptive=True)
+    cache = FakeRedisRepresentationCache(ttl_policy=policy)
+    cache.set("[]", etag="abc", fname="get_vendors")
+    assert cache.get(fname="get_vendors") == "[]"
+    ttls = {}
+    set_ = FakeRedis.set
+
+    def spy(self, key, value, ex=None):
+        ttls[key] = ex
+        return set_(self, key, value, ex)
+
+    monkeypatch.setattr(FakeRedis, "set", spy)
+    # WHEN it's recomputed unchanged
+    cache.set("[]", etag="abc", fname="get_vendors")
+    cache.set_encoded("gzip", b"compressed", "abc", fname="get_vendors")
+    # THEN it's kept twice as long, with its ETag and compressed variant
+    assert ttls == {
+        "repr:get_vendors": 120,
+        "repr:get_vendors:etag": 120,
+        "repr:get_vendors:gzip": 120,
+        "repr:get_vendors:gzip:etag": 120,
+    }
+
+
+@pytest.mark.parametrize(
+    "make_cache",
+    (
+        lambda policy: FakeRedisRepresentationCache(ttl_policy=policy),
+        lambda policy: MemoryRepresentationCache(ttl_policy=policy),
+    ),
+    ids=("redis", "memory"),
+)
+def test_infra_ttl_policy_etag_revalidation_is_a_hit(make_cache):
+    # GIVEN a cached representation only revalidated since it was stored
+    policy = TTLPolicy(60, adaptive=True)
+    cache = make_cache(policy)
+    cache.set("[]", etag="abc", fname="get_vendors")
+    assert cache.get_etag(fname="get_vendors") == "abc"
+    assert cache.get_etag(fname="get_top_categories") is None
+    # THEN it's kept longer once recomputed unchanged
+    vendors = cache._generate_key(fname="get_vendors")
+    top_categories = cache._generate_key(fname="get_top_categories")
+    assert policy.ttl(vendors, "get_vendors", "abc") == 120
+    assert policy.ttl(top_categories, "get_top_categories", "abc") == 60
+
+
+def test_infra_ttl_policy_local_cache():
+    clock = Mock(return_value=0)
+    cache = MemoryRepresentationCache(
+        clock=clock, ttl_policy=TTLPolicy(60, methods={"get_vendors": 600})
+    )
+    cache.set("[]", fname="get_vendors")
+    clock.return_value = 599
+    assert cache.get(fname="get_vendors") == "[]"
+    clock.return_value = 600
+    assert cache.get(fname="get_vendors") is None
+
+
+def test_infra_ttl_policy_from_settings(monkeypatch):
+    monkeypatch.delenv("REDIS_URL")
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    monkeypatch.setenv("CACHE_TTL_BY_METHOD", '{"get_vendors": 600}')
+    monkeypatch.setenv("CACHE_ADAPTIVE_TTL", "true")
+    cache = create_ioc_container(InfraSettings()).provide(Cache)
+    assert cache._ttl_policy.ttl("get_vendors", "get_vendors", "abc") == 600
+    assert cache._ttl_policy.current_ttl("get_product:1", "get_product") == 60